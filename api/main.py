@@ -8,6 +8,7 @@ from api.routers.health import router as health_router
 from api.routers.model_info import router as info_router
 from api.routers.predict import router as predict_router
 from api.routers.decision import router as decision_router  # ✅ AJOUT
+from api.routers.candles import router as candles_router
 
 
 @asynccontextmanager
@@ -31,3 +32,4 @@ app.include_router(health_router)
 app.include_router(info_router)
 app.include_router(predict_router)      # (debug)
 app.include_router(decision_router)     # ✅ (production)
+app.include_router(candles_router)      # bougies M15 -> features incrémentales
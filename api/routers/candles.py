@@ -0,0 +1,14 @@
+from fastapi import APIRouter, HTTPException, Request
+from api.schemas.request import CandlesRequest
+from api.schemas.response import CandlesResponse
+
+router = APIRouter()
+
+@router.post("/candles", response_model=CandlesResponse)
+def push_candles(req: CandlesRequest, request: Request):
+    svc = request.app.state.infer
+    try:
+        res = svc.push_candles([c.model_dump() for c in req.candles])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return CandlesResponse(**res)
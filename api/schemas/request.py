@@ -1,5 +1,17 @@
 from pydantic import BaseModel
-from typing import Dict
+from datetime import datetime
+from typing import Dict, List
 
 class PredictRequest(BaseModel):
     features: Dict[str, float]
+
+class Candle(BaseModel):
+    timestamp: datetime
+    open_15m: float
+    high_15m: float
+    low_15m: float
+    close_15m: float
+    volume_15m: float = 0.0
+
+class CandlesRequest(BaseModel):
+    candles: List[Candle]
@@ -1,6 +1,12 @@
 from pydantic import BaseModel
 from typing import Optional
 
+class CandlesResponse(BaseModel):
+    accepted: int
+    skipped: int
+    last_candle: Optional[str] = None
+    latest_features: Optional[str] = None
+
 class PredictResponse(BaseModel):
     action: str
     score: Optional[float] = None
@@ -1,18 +1,104 @@
 from __future__ import annotations
 from pathlib import Path
+import json
+import os
+import threading
 import pandas as pd
+import pyarrow.parquet as pq
+
+from src.feature_engine import IncrementalFeatureEngine
+from src.feature_store import read_latest
+
+# un seul writer à la fois pour l'état du moteur (endpoints servis en threads)
+_ENGINE_LOCK = threading.Lock()
+
 
 class FeatureService:
-    def __init__(self, project_root: Path, parquet_relpath: str = "data/processed/m15_2024_features.parquet"):
+    def __init__(
+        self,
+        project_root: Path,
+        parquet_relpath: str = "data/processed/m15_2024_features.parquet",
+        store_relpath: str = "data/processed/features",
+        symbol: str | None = None,
+        engine_relpath: str = "data/processed/feature_engine.json",
+    ):
         self.root = project_root
         self.parquet_path = self.root / parquet_relpath
-        if not self.parquet_path.exists():
+        self.store_path = self.root / store_relpath
+        self.symbol = symbol
+        # moteur incrémental alimenté par push_candles : état + dernière ligne
+        # de features sur disque, repris tel quel après un redémarrage
+        self.engine_path = self.root / engine_relpath
+        # feature store partitionné si disponible, sinon parquet annuel
+        pattern = "year=*/month=*/part-0.parquet" if symbol is None else f"symbol={symbol}/year=*/month=*/part-0.parquet"
+        self.use_store = any(self.store_path.glob(pattern))
+
+    # -------------------------
+    # moteur incrémental (bougies M15 poussées à l'API)
+    # -------------------------
+    def _read_engine(self) -> dict | None:
+        if not self.engine_path.exists():
+            return None
+        return json.loads(self.engine_path.read_text(encoding="utf-8"))
+
+    def push_candles(self, candles: pd.DataFrame | list[dict]) -> dict:
+        """
+        Bougies M15 (timestamp, open_15m, high_15m, low_15m, close_15m,
+        volume_15m) à la suite des précédentes. Celles déjà vues (timestamp <=
+        dernière bougie, ex. renvoi après une erreur) sont ignorées. Il faut
+        ~200 bougies de warm-up avant la première ligne de features.
+        """
+        df = pd.DataFrame(candles)
+        with _ENGINE_LOCK:
+            saved = self._read_engine()
+            eng = IncrementalFeatureEngine() if saved is None else IncrementalFeatureEngine.from_state(saved["engine"])
+            latest = None if saved is None else saved["latest"]
+            accepted = skipped = 0
+            for rec in df.sort_values("timestamp").to_dict("records"):
+                if eng.last_ts is not None and pd.Timestamp(rec["timestamp"]) <= eng.last_ts:
+                    skipped += 1
+                    continue
+                out = eng.update(rec)
+                accepted += 1
+                if out is not None:
+                    latest = {**out, "timestamp": out["timestamp"].isoformat()}
+
+            # écriture atomique : un crash laisse l'ancien état intact
+            self.engine_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.engine_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"engine": eng.to_state(), "latest": latest}), encoding="utf-8")
+            os.replace(tmp, self.engine_path)
+        return {
+            "accepted": accepted,
+            "skipped": skipped,
+            "last_candle": None if eng.last_ts is None else eng.last_ts.isoformat(),
+            "latest_features": None if latest is None else latest["timestamp"],
+        }
+
+    def get_latest_row(self, columns: list[str] | None = None) -> pd.Series:
+        # features du moteur incrémental si des bougies ont été poussées
+        saved = self._read_engine()
+        if saved is not None and saved["latest"] is not None:
+            row = pd.Series(saved["latest"])
+            row["timestamp"] = pd.Timestamp(row["timestamp"])
+            return row
+        if not self.use_store and not self.parquet_path.exists():
+            if saved is not None:
+                raise ValueError("Feature engine still warming up: push more candles.")
             raise FileNotFoundError(f"Parquet not found: {self.parquet_path}")
 
-    def get_latest_row(self) -> pd.Series:
-        df = pd.read_parquet(self.parquet_path)
-        if "timestamp" in df.columns:
-            df = df.sort_values("timestamp")
+        # colonnes absentes du parquet ignorées : row_to_feature_dict les met à 0.0
+        if self.use_store:
+            # ne lit que le dernier row group et les colonnes demandées
+            df = read_latest(self.store_path, columns=columns, symbol=self.symbol)
+        else:
+            cols = None
+            if columns is not None:
+                names = set(pq.read_schema(self.parquet_path).names)
+                cols = ["timestamp", *[c for c in columns if c != "timestamp" and c in names]]
+            df = pd.read_parquet(self.parquet_path, columns=cols)
+            if "timestamp" in df.columns:
+                df = df.sort_values("timestamp")
         if len(df) == 0:
             raise ValueError("Parquet is empty.")
         return df.iloc[-1]
@@ -2,9 +2,8 @@ from __future__ import annotations
 from pathlib import Path
 import json
 import numpy as np
-import pandas as pd
 
-from src.strategies.ml_infer import load_model as load_ml_model, predict_proba_up
+from src.strategies.ml_infer import load_flat_forest, load_model as load_ml_model
 from api.services.feature_service import FeatureService
 
 try:
@@ -35,7 +34,13 @@ class InferenceService:
 
         if self.model_type == "ml":
             self.model_dir = _existing_dir(self.root, ["models/V1", "models/v1"])
-            self.model, self.meta = load_ml_model(self.model_dir)
+            # forêt aplatie si disponible : ni joblib ni sklearn au chargement
+            self.forest = load_flat_forest(self.model_dir)
+            if self.forest is not None:
+                self.model = None
+                self.meta = json.loads((self.model_dir / "metadata.json").read_text(encoding="utf-8"))
+            else:
+                self.model, self.meta = load_ml_model(self.model_dir)
             self.features = self.meta["features"]
 
         elif self.model_type == "rl":
@@ -57,11 +62,14 @@ class InferenceService:
     # predict from provided features (debug / legacy)
     # -------------------------
     def predict(self, features_dict: dict) -> tuple[str, float | None]:
-        row = {f: float(features_dict.get(f, 0.0)) for f in self.features}
-        df = pd.DataFrame([row])
+        # vecteur NumPy direct : pas de DataFrame d'une ligne
+        x = np.array([float(features_dict.get(f, 0.0)) for f in self.features])
 
         if self.model_type == "ml":
-            proba = float(predict_proba_up(df, self.model, self.features).iloc[0])
+            if self.forest is not None:
+                proba = self.forest.predict_one(x)
+            else:
+                proba = float(self.model.predict_proba(x[None, :])[0, 1])
             if proba > 0.55:
                 return "long", proba
             if proba < 0.45:
@@ -69,7 +77,7 @@ class InferenceService:
             return "flat", proba
 
         # RL (PPO): action 0/1/2
-        action, _ = self.model.predict(df.values.astype(np.float32), deterministic=True)
+        action, _ = self.model.predict(x[None, :].astype(np.float32), deterministic=True)
         if isinstance(action, (np.ndarray, list)):
             action = int(action[0])
         else:
@@ -87,9 +95,13 @@ class InferenceService:
     def predict_from_features(self, features_dict: dict) -> tuple[str, float | None]:
         return self.predict(features_dict)
 
+    def push_candles(self, candles: list[dict]) -> dict:
+        # nouvelles bougies M15 -> moteur incrémental (état persistant, voir FeatureService)
+        return FeatureService(self.root).push_candles(candles)
+
     def predict_latest(self) -> dict:
-        fs = FeatureService(self.root)  # lit data/processed/m15_2024_features.parquet
-        row = fs.get_latest_row()
+        fs = FeatureService(self.root)  # feature store (data/processed/features) ou parquet 2024
+        row = fs.get_latest_row(columns=list(dict.fromkeys([*self.features, "close_15m"])))
 
         features_dict = fs.row_to_feature_dict(row, self.features)
         action, score = self.predict_from_features(features_dict)
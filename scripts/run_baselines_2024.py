@@ -4,8 +4,8 @@ import pandas as pd
 from src.strategies.baselines import (
     baseline_always_long, baseline_always_flat, baseline_random, baseline_ema_rsi_rule
 )
-from src.strategies.backtest import backtest_m15
-from src.strategies.metrics import summary_metrics
+from src.strategies.backtest import backtest_batch
+from src.strategies.metrics import summary_metrics_batch
 
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "data" / "processed" / "m15_2024_features.parquet"
@@ -20,19 +20,20 @@ strategies = {
     "ema_rsi_rule": baseline_ema_rsi_rule(df),
 }
 
-rows = []
-for name, pos in strategies.items():
-    tmp = df.copy()
-    tmp["position"] = pos
-    bt = backtest_m15(tmp, transaction_cost=0.00005)
-    met = summary_metrics(bt)
-    met["strategy"] = name
-    rows.append(met)
-
-res = pd.DataFrame(rows).set_index("strategy").sort_values("final_equity", ascending=False)
+# toutes les stratégies en un seul backtest vectorisé
+bt = backtest_batch(df["close_15m"].to_numpy(), {k: v.to_numpy() for k, v in strategies.items()},
+                    transaction_cost=0.00005)
+res = summary_metrics_batch(bt).sort_values("final_equity", ascending=False)
 print(res)
 
 out = ROOT / "reports" / "baselines_2024.csv"
 out.parent.mkdir(exist_ok=True)
 res.to_csv(out)
 print("Saved:", out)
+
+# rendements nets par barre (intervalles de confiance dans run_final_comparison_2024)
+ret_out = ROOT / "reports" / "baselines_2024_returns.parquet"
+rets = pd.DataFrame(bt.net.T, columns=bt.names)
+rets.insert(0, "timestamp", df["timestamp"].to_numpy())
+rets.to_parquet(ret_out, index=False)
+print("Saved:", ret_out)
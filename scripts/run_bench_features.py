@@ -0,0 +1,57 @@
+"""
+Benchmark des backends de add_features ("ta" vs "numpy").
+
+    python -m scripts.run_bench_features --years 3
+    python -m scripts.run_bench_features --parquet data/processed/m15_2024_features.parquet
+
+La parité ta / numpy est vérifiée par tests/test_features.py.
+"""
+from __future__ import annotations
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.features import add_features
+from src.synthetic import synthetic_m15
+
+M15_COLS = ["timestamp", "open_15m", "high_15m", "low_15m", "close_15m", "volume_15m"]
+
+
+def run(df: pd.DataFrame, backend: str, dtype=None) -> tuple[pd.DataFrame, dict]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = add_features(df, backend=backend, dtype=dtype)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    name = backend if dtype is None else f"{backend}_{np.dtype(dtype).name}"
+    return out, {"backend": name, "seconds": elapsed, "peak_mb": peak / 1e6, "rows_out": len(out)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--parquet", type=Path, default=None, help="M15 (OHLCV) existant, sinon synthétique")
+    ap.add_argument("--years", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.parquet is not None:
+        df = pd.read_parquet(args.parquet, columns=M15_COLS + ["ret"])
+    else:
+        df = synthetic_m15(args.years)[M15_COLS + ["ret"]]
+    print("Rows in:", len(df))
+
+    _, r_ta = run(df, "ta")
+    _, r_np = run(df, "numpy")
+    _, r_32 = run(df, "numpy", np.float32)
+
+    for r in [r_ta, r_np, r_32]:
+        print(r)
+    print(f"Speedup: x{r_ta['seconds'] / r_np['seconds']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
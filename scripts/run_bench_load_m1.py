@@ -0,0 +1,92 @@
+"""
+Benchmark du chargement M1 : ancien loader pandas vs loader streaming pyarrow.
+
+    python -m scripts.run_bench_load_m1 --years 3
+
+Les CSV sont générés (format HistData) dans un dossier temporaire si
+--csv n'est pas fourni. Chaque loader tourne dans un process séparé pour
+mesurer son pic mémoire (RSS).
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.data_import import iter_m1_csv, load_m1_csv
+from src.synthetic import write_synthetic_m1_csvs
+
+
+def legacy_load_m1_csv(path: str) -> pd.DataFrame:
+    # implémentation d'origine (référence du benchmark)
+    df = pd.read_csv(path, header=None, names=["date","time","open","high","low","close","volume"])
+    df["timestamp"] = pd.to_datetime(
+        df["date"].astype(str) + " " + df["time"].astype(str),
+        format="%Y.%m.%d %H:%M",
+        errors="coerce"
+    )
+    df = df.dropna(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
+    for c in ["open","high","low","close","volume"]:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df.dropna(subset=["open","high","low","close"]).reset_index(drop=True)
+
+
+def _run(name: str, paths: list[str], queue) -> None:
+    t0 = time.perf_counter()
+    if name == "legacy":
+        rows = len(pd.concat([legacy_load_m1_csv(p) for p in paths], ignore_index=True))
+    elif name == "streaming":
+        rows = len(load_m1_csv(paths))
+    else:
+        # flux de chunks sans matérialiser l'historique complet
+        rows = sum(len(chunk) for chunk in iter_m1_csv(paths))
+    elapsed = time.perf_counter() - t0
+    try:
+        import resource
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:  # Windows
+        peak_mb = None
+    queue.put({"loader": name, "rows": int(rows), "seconds": elapsed, "peak_rss_mb": peak_mb})
+
+
+def bench(paths: list[str]) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    results = []
+    for name in ["legacy", "streaming", "streaming_chunks"]:
+        q = ctx.Queue()
+        p = ctx.Process(target=_run, args=(name, paths, q))
+        p.start()
+        results.append(q.get())
+        p.join()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", nargs="*", help="CSV M1 HistData (sinon données synthétiques)")
+    ap.add_argument("--years", type=int, default=3)
+    ap.add_argument("--out", type=Path, default=None)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.csv or [str(p) for p in write_synthetic_m1_csvs(tmp, years=args.years)]
+        results = bench(paths)
+
+    legacy, streaming = results[0], results[1]
+    speedup = legacy["seconds"] / streaming["seconds"]
+    for r in results:
+        print(r)
+    print(f"Speedup: x{speedup:.1f}")
+
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps({"results": results, "speedup": speedup}, indent=2), encoding="utf-8")
+        print("Saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Benchmark de bout en bout du pipeline sur données synthétiques (src.synthetic) :
+temps et pic mémoire (tracemalloc) de chaque étape, résultats en JSON.
+
+    python -m scripts.run_bench_pipeline --years 1
+    python -m scripts.run_bench_pipeline --years 5 --out reports/bench/pipeline_5y.json
+    python -m scripts.run_bench_pipeline --years 1 --compare reports/bench/pipeline_1y.json
+
+Étapes : load_m1_csv, aggregate_m15, clean_m15, add_features, make_target,
+fit_and_eval (logreg, rf), backtest_m15, TradingEnv.step (débit),
+InferenceService.predict (latence). Avec --compare, le script sort en erreur
+(code 1) si une étape est plus lente que la référence au-delà de --tolerance.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from src.cleaning import clean_m15
+from src.data_import import load_m1_csv
+from src.features import add_features
+from src.m15_agg import aggregate_m15
+from src.strategies.backtest import backtest_m15
+from src.strategies.ml_infer import positions_from_proba, predict_proba_up
+from src.strategies.ml_train import fit_and_eval, make_target, save_model, select_feature_cols
+from src.strategies.rl_env import TradingEnv
+from src.synthetic import write_synthetic_m1_csvs
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def measure(fn, repeat: int = 1, memory: bool = True) -> tuple[object, dict]:
+    """Meilleur temps sur `repeat` appels, puis un appel sous tracemalloc pour le pic mémoire."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    res = {"seconds": min(times)}
+    if memory:
+        tracemalloc.start()
+        fn()
+        res["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return out, res
+
+
+def bench_env(df: pd.DataFrame, feats: list[str], n_steps: int) -> dict:
+    env = TradingEnv(df, feats)
+    actions = np.random.default_rng(0).integers(0, 3, n_steps)
+    env.reset(seed=0)
+    steps = 0
+    t0 = time.perf_counter()
+    for a in actions:
+        _, _, done, _, _ = env.step(int(a))
+        steps += 1
+        if done:
+            env.reset()
+    elapsed = time.perf_counter() - t0
+    return {"seconds": elapsed, "rows": steps, "steps_per_s": steps / elapsed}
+
+
+def bench_inference(model, meta: dict, df: pd.DataFrame, n_calls: int) -> dict:
+    from api.services.inference_service import InferenceService
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        save_model(model, meta, root / "models" / "v1")
+        (root / "models" / "active_model.json").write_text(json.dumps({"type": "ml"}), encoding="utf-8")
+        svc = InferenceService(root)
+
+        rows = df[meta["features"]].tail(n_calls).to_dict("records")
+        svc.predict(rows[0])  # premier appel (imports paresseux) hors mesure
+        lat = np.empty(len(rows))
+        for i, row in enumerate(rows):
+            t0 = time.perf_counter()
+            svc.predict(row)
+            lat[i] = time.perf_counter() - t0
+    return {
+        "seconds": float(lat.sum()),
+        "rows": len(rows),
+        "latency_ms_p50": float(np.percentile(lat, 50) * 1e3),
+        "latency_ms_p95": float(np.percentile(lat, 95) * 1e3),
+        "latency_ms_max": float(lat.max() * 1e3),
+    }
+
+
+def run_benchmarks(args) -> dict:
+    results: dict[str, dict] = {}
+
+    def stage(name: str, fn, rows: int | None = None):
+        print(f"- {name} ...", flush=True)
+        out, res = measure(fn, repeat=args.repeat, memory=not args.no_memory)
+        n = rows if rows is not None else (len(out) if hasattr(out, "__len__") else None)
+        if n is not None:
+            res["rows"] = int(n)
+            res["rows_per_s"] = n / res["seconds"] if res["seconds"] > 0 else None
+        results[name] = res
+        return out
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        paths = write_synthetic_m1_csvs(tmp, years=args.years, seed=args.seed)
+        print(f"Synthetic M1: {args.years} year(s) in {time.perf_counter() - t0:.1f}s")
+        m1 = stage("load_m1_csv", lambda: load_m1_csv(paths))
+
+    m15 = stage("aggregate_m15", lambda: aggregate_m15(m1), rows=len(m1))
+    m15_clean = stage("clean_m15", lambda: clean_m15(m15, assume_sorted=True)[0], rows=len(m15))
+    feat = None
+    for backend in args.feature_backends:
+        feat = stage(f"add_features[{backend}]", lambda: add_features(m15_clean, backend=backend), rows=len(m15_clean))
+    d = stage("make_target", lambda: make_target(feat, horizon=1))
+
+    cut = int(len(d) * 0.8)
+    train, val = d.iloc[:cut], d.iloc[cut:]
+    candidates = {
+        "logreg": lambda: LogisticRegression(max_iter=600),
+        "rf": lambda: RandomForestClassifier(n_estimators=300, min_samples_leaf=10, random_state=42, n_jobs=-1),
+    }
+    fitted = {}
+    for name in args.models:
+        def fit(name=name):
+            model = candidates[name]()
+            meta = fit_and_eval(model, train, val)
+            fitted[name] = (model, meta)
+            return meta
+        stage(f"fit_and_eval[{name}]", fit, rows=len(train))
+
+    model, meta = fitted[args.models[0]]
+    val = val.copy()
+    val["position"] = positions_from_proba(predict_proba_up(val, model, meta["features"]).to_numpy())
+    stage("backtest_m15", lambda: backtest_m15(val))
+
+    print("- TradingEnv.step ...", flush=True)
+    results["TradingEnv.step"] = bench_env(d, select_feature_cols(d), args.env_steps)
+
+    print("- InferenceService.predict ...", flush=True)
+    results["InferenceService.predict"] = bench_inference(model, meta, val, args.predict_calls)
+    return results
+
+
+def run_meta(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "years": args.years,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(current: dict, reference: dict, tolerance: float) -> list[str]:
+    """Étapes plus lentes que la référence de plus de `tolerance` (0.25 = +25 %)."""
+    regressions = []
+    print(f"\n{'stage':<28}{'ref s':>10}{'new s':>10}{'ratio':>8}  (par ligne)")
+    for name, new in current["stages"].items():
+        ref = reference.get("stages", {}).get(name)
+        if ref is None or not ref.get("seconds"):
+            continue
+        # temps par ligne : comparable même si --years / --env-steps diffèrent
+        ratio = (new["seconds"] / new.get("rows", 1)) / (ref["seconds"] / ref.get("rows", 1))
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = "  <-- regression"
+        print(f"{name:<28}{ref['seconds']:>10.3f}{new['seconds']:>10.3f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", type=int, default=1, help="1 à 20 ans de barres M1 synthétiques")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--no-memory", action="store_true", help="pas de passe tracemalloc")
+    ap.add_argument("--feature-backends", nargs="+", default=["ta", "numpy"])
+    ap.add_argument("--models", nargs="+", default=["logreg", "rf"], choices=["logreg", "rf"])
+    ap.add_argument("--env-steps", type=int, default=100_000)
+    ap.add_argument("--predict-calls", type=int, default=1_000)
+    ap.add_argument("--out", type=Path, default=None)
+    ap.add_argument("--compare", type=Path, default=None, help="JSON de référence")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    args = ap.parse_args()
+
+    # lu avant d'écrire : --compare peut pointer sur le fichier de sortie
+    reference = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare is not None else None
+
+    report = {"meta": run_meta(args), "stages": run_benchmarks(args)}
+    for name, res in report["stages"].items():
+        print(name, {k: round(v, 4) if isinstance(v, float) else v for k, v in res.items()})
+
+    out = args.out or ROOT / "reports" / "bench" / f"pipeline_{args.years}y.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print("Saved:", out)
+
+    if reference is not None:
+        regressions = compare(report, reference, args.tolerance)
+        if regressions:
+            print("Regressions:", regressions)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
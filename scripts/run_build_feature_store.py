@@ -0,0 +1,17 @@
+from pathlib import Path
+import pandas as pd
+
+from src.feature_store import DEFAULT_STORE, store_info, write_features
+
+ROOT = Path(__file__).resolve().parent.parent
+PROCESSED = ROOT / "data" / "processed"
+
+# migre les parquet annuels (m15_YYYY_features.parquet) vers le feature store partitionné
+for p in sorted(PROCESSED.glob("m15_*_features.parquet")):
+    df = pd.read_parquet(p)
+    written = write_features(df, DEFAULT_STORE)
+    print(f"{p.name}: {len(df)} rows -> {len(written)} partitions")
+
+info = store_info(DEFAULT_STORE)
+print("Feature store:", DEFAULT_STORE)
+print("Version:", info["version"], "| partitions:", info["partitions"][0], "->", info["partitions"][-1])
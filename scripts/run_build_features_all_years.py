@@ -0,0 +1,54 @@
+from pathlib import Path
+import argparse
+
+from src.data_import import load_m1_csv
+from src.m15_agg import aggregate_m15
+from src.cleaning import clean_m15
+from src.features_parallel import add_features_chunked
+from src.feature_store import DEFAULT_STORE, write_features
+
+
+def main():
+    ROOT = Path(__file__).resolve().parent.parent
+    RAW = ROOT / "data" / "raw"
+    PROCESSED = ROOT / "data" / "processed"
+    PROCESSED.mkdir(parents=True, exist_ok=True)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pattern", default="DAT_MT_GBPUSD_M1_*.csv")
+    ap.add_argument("--backend", default="ta", choices=["ta", "numpy"])
+    ap.add_argument("--n-jobs", type=int, default=None)
+    ap.add_argument("--chunk-rows", type=int, default=50_000)
+    args = ap.parse_args()
+
+    paths = sorted(RAW.glob(args.pattern))
+    if not paths:
+        raise FileNotFoundError(f"No raw CSV matching {args.pattern} in {RAW}")
+    print("Raw files:", [p.name for p in paths])
+
+    # historique complet en un seul flux : le warm-up n'est perdu qu'une fois,
+    # au tout début, et plus à chaque 1er janvier
+    m1 = load_m1_csv(paths)
+    m15 = aggregate_m15(m1)
+    m15_clean, rep = clean_m15(m15, assume_sorted=True)
+    print("Clean report:", rep)
+
+    feat = add_features_chunked(
+        m15_clean,
+        chunk_rows=args.chunk_rows,
+        n_jobs=args.n_jobs,
+        backend=args.backend,
+    )
+    print("Features shape:", feat.shape)
+
+    for year, part in feat.groupby(feat["timestamp"].dt.year):
+        out = PROCESSED / f"m15_{year}_features.parquet"
+        part.reset_index(drop=True).to_parquet(out, index=False)
+        print("Saved:", out, part.shape)
+
+    write_features(feat, DEFAULT_STORE)
+    print("Feature store:", DEFAULT_STORE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from pathlib import Path
+import argparse
+import json
+
+from src.data_import import load_m1_csv
+from src.m15_agg import aggregate_m15
+from src.cleaning import clean_m15
+from src.features import add_features
+from src.feature_store import DEFAULT_STORE, write_features
+
+
+def main():
+    ROOT = Path(__file__).resolve().parent.parent
+    RAW = ROOT / "data" / "raw"
+    REPORTS = ROOT / "reports"
+    REPORTS.mkdir(parents=True, exist_ok=True)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pattern", default="DAT_MT_*_M1_*.csv")
+    ap.add_argument("--backend", default="numpy", choices=["ta", "numpy"])
+    ap.add_argument("--store", default=str(DEFAULT_STORE))
+    args = ap.parse_args()
+
+    paths = sorted(RAW.glob(args.pattern))
+    if not paths:
+        raise FileNotFoundError(f"No raw CSV matching {args.pattern} in {RAW}")
+
+    # toutes les paires en un seul panel (symbol, timestamp) : agrégation et
+    # nettoyage vectorisés sur l'ensemble des symboles
+    m1 = load_m1_csv(paths, with_symbol=True)
+    print("Symbols:", list(m1["symbol"].cat.categories), "M1 rows:", len(m1))
+    m15 = aggregate_m15(m1)
+    m15_clean, rep = clean_m15(m15, assume_sorted=True)
+    print("Clean report:", {k: v for k, v in rep.items() if k != "rows_out_by_symbol"})
+
+    # indicateurs récursifs : calculés paire par paire
+    for sym, part in m15_clean.groupby("symbol", observed=True, sort=True):
+        feat = add_features(part.drop(columns="symbol").reset_index(drop=True), backend=args.backend)
+        feat.insert(0, "symbol", sym)
+        write_features(feat, args.store)
+        print(sym, feat.shape)
+
+    out = REPORTS / "panel_clean_report.json"
+    out.write_text(json.dumps(rep, indent=2), encoding="utf-8")
+    print("Feature store:", args.store)
+    print("Saved:", out)
+
+
+if __name__ == "__main__":
+    main()
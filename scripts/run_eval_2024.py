@@ -57,3 +57,6 @@ fin_metrics["threshold_long"] = 0.55
 fin_metrics["threshold_short"] = 0.45
 
 ( REPORTS / "ml_2024_finance.json" ).write_text(json.dumps(fin_metrics, indent=2), encoding="utf-8")
+bt[["timestamp", "strat_ret_net"]].rename(columns={"strat_ret_net": "ML"}).to_parquet(
+    REPORTS / "ml_2024_returns.parquet", index=False
+)
@@ -49,3 +49,8 @@ fin["transaction_cost"] = float(meta["transaction_cost"])
 
 (REPORTS / "rl_2024_finance.json").write_text(json.dumps(fin, indent=2), encoding="utf-8")
 print("Saved:", REPORTS / "rl_2024_finance.json")
+
+bt[["timestamp", "strat_ret_net"]].rename(columns={"strat_ret_net": "RL_PPO"}).to_parquet(
+    REPORTS / "rl_2024_returns.parquet", index=False
+)
+print("Saved:", REPORTS / "rl_2024_returns.parquet")
@@ -2,6 +2,8 @@ from pathlib import Path
 import json
 import pandas as pd
 
+from src.evaluation.bootstrap import bootstrap_ci
+
 ROOT = Path(__file__).resolve().parent.parent
 REPORTS = ROOT / "reports"
 REPORTS.mkdir(exist_ok=True)
@@ -19,6 +21,18 @@ rl_row = pd.DataFrame([rl_fin], index=["RL_PPO"]).rename_axis("strategy")
 
 final = pd.concat([base, ml_row, rl_row], axis=0, sort=False)
 
+# Intervalles de confiance bootstrap (si les rendements par barre sont là)
+returns = {}
+for name in ["baselines_2024_returns.parquet", "ml_2024_returns.parquet", "rl_2024_returns.parquet"]:
+    path = REPORTS / name
+    if path.exists():
+        r = pd.read_parquet(path).drop(columns="timestamp")
+        returns.update({c: r[c].to_numpy() for c in r.columns})
+returns = {k: v for k, v in returns.items() if k in final.index}
+if returns:
+    ci = bootstrap_ci(returns, alpha=0.05, n_resamples=10_000, method="stationary", block_size=96)
+    final = final.join(ci.drop(columns=[c for c in ci.columns if c in final.columns]))
+
 out = REPORTS / "final_comparison_2024.csv"
 final.to_csv(out)
 print("Saved:", out)
@@ -0,0 +1,65 @@
+from pathlib import Path
+import argparse
+import time
+
+import pandas as pd
+
+from src.data_import import load_m1_csv
+from src.strategies.baselines import baseline_always_long, baseline_ema_rsi_rule, baseline_random
+from src.strategies.backtest import backtest_batch
+from src.strategies.execution import simulate_execution
+from src.strategies.metrics import summary_metrics_batch
+from src.strategies.ml_infer import load_model, positions_from_proba, predict_proba_up
+
+
+def main():
+    ROOT = Path(__file__).resolve().parent.parent
+    REPORTS = ROOT / "reports"
+    REPORTS.mkdir(exist_ok=True)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--m1", default=str(ROOT / "data" / "raw" / "DAT_MT_GBPUSD_M1_2024.csv"))
+    ap.add_argument("--data", default=str(ROOT / "data" / "processed" / "m15_2024_features.parquet"))
+    ap.add_argument("--model-dir", default=str(ROOT / "models" / "v1"))
+    ap.add_argument("--stop-loss", type=float, default=None, help="fraction du prix d'entrée, ex. 0.002")
+    ap.add_argument("--take-profit", type=float, default=None)
+    ap.add_argument("--spread", type=float, default=0.0001, help="en prix (0.0001 = 1 pip)")
+    ap.add_argument("--slippage", type=float, default=0.0)
+    ap.add_argument("--quote", choices=["bid", "mid"], default="bid", help="cotation des barres M1 (HistData : bid)")
+    args = ap.parse_args()
+
+    df = pd.read_parquet(args.data).sort_values("timestamp").reset_index(drop=True)
+    m1 = load_m1_csv(args.m1)
+
+    strategies = {
+        "always_long": baseline_always_long(df).to_numpy(),
+        "random": baseline_random(df, seed=42).to_numpy(),
+        "ema_rsi_rule": baseline_ema_rsi_rule(df).to_numpy(),
+    }
+    if Path(args.model_dir).exists():
+        model, meta = load_model(args.model_dir)
+        strategies["ML"] = positions_from_proba(predict_proba_up(df, model, meta["features"]).to_numpy())
+
+    t0 = time.perf_counter()
+    res = simulate_execution(
+        m1, df["timestamp"], strategies,
+        stop_loss=args.stop_loss, take_profit=args.take_profit,
+        spread=args.spread, slippage=args.slippage, quote=args.quote,
+    )
+    print(f"Simulated {len(strategies)} strategies x {len(m1)} M1 bars in {time.perf_counter() - t0:.2f}s")
+
+    # métriques à l'échelle M15 (même Sharpe annualisé que backtest_m15)
+    intrabar = summary_metrics_batch(res.to_m15())
+    intrabar["n_stop_loss"] = res.n_stop_loss
+    intrabar["n_take_profit"] = res.n_take_profit
+    flat_cost = summary_metrics_batch(backtest_batch(df["close_15m"].to_numpy(), strategies, transaction_cost=0.00005))
+    out = pd.concat({"intrabar": intrabar, "m15_close": flat_cost}, axis=1)
+    print(out)
+
+    path = REPORTS / "intrabar_2024.csv"
+    out.to_csv(path)
+    print("Saved:", path)
+
+
+if __name__ == "__main__":
+    main()
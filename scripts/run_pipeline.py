@@ -0,0 +1,69 @@
+"""
+Pipeline complet (données brutes -> comparaison finale) avec cache.
+
+    python -m scripts.run_pipeline --n-jobs 3
+    python -m scripts.run_pipeline --set ml_predict.threshold_long=0.6 --no-rl
+    python -m scripts.run_pipeline --plan
+"""
+from pathlib import Path
+import argparse
+import json
+
+from src.evaluation.eval_pipeline import build_trading_pipeline
+
+
+def parse_overrides(items: list[str]) -> dict[str, dict]:
+    # "stage.param=value" (value en JSON si possible, sinon string)
+    out: dict[str, dict] = {}
+    for item in items:
+        lhs, value = item.split("=", 1)
+        stage, param = lhs.split(".", 1)
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            pass
+        out.setdefault(stage, {})[param] = value
+    return out
+
+
+def main():
+    ROOT = Path(__file__).resolve().parent.parent
+    REPORTS = ROOT / "reports"
+    REPORTS.mkdir(exist_ok=True)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--raw", nargs="*", default=None, help="CSV M1 (défaut: data/raw/DAT_MT_GBPUSD_M1_*.csv)")
+    ap.add_argument("--train-years", type=int, nargs="+", default=[2022])
+    ap.add_argument("--val-years", type=int, nargs="+", default=[2023])
+    ap.add_argument("--test-years", type=int, nargs="+", default=[2024])
+    ap.add_argument("--no-rl", action="store_true")
+    ap.add_argument("--n-jobs", type=int, default=1)
+    ap.add_argument("--set", nargs="*", default=[], metavar="STAGE.PARAM=VALUE")
+    ap.add_argument("--plan", action="store_true", help="affiche les stages à recalculer sans rien lancer")
+    args = ap.parse_args()
+
+    raw = args.raw or sorted(str(p) for p in (ROOT / "data" / "raw").glob("DAT_MT_GBPUSD_M1_*.csv"))
+    pipe = build_trading_pipeline(
+        raw,
+        train_years=tuple(args.train_years),
+        val_years=tuple(args.val_years),
+        test_years=tuple(args.test_years),
+        include_rl=not args.no_rl,
+    )
+    pipe.set_params(parse_overrides(args.set))
+
+    if args.plan:
+        for name, stale in pipe.plan().items():
+            print(f"{name:<20} {'run' if stale else 'cached'}")
+        return
+
+    final = pipe.run(["compare"], n_jobs=args.n_jobs)["compare"]
+    print(final)
+
+    out = REPORTS / "final_comparison_pipeline.csv"
+    final.to_csv(out)
+    print("Saved:", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ from src.strategies.baselines import (
     baseline_random,
     baseline_ema_rsi_rule
 )
-from src.strategies.backtest import backtest_m15
+from src.strategies.backtest import backtest_batch
 from src.strategies.ml_infer import load_model, predict_proba_up
 from src.strategies.ml_train import make_target
 
@@ -101,29 +101,27 @@ def main():
     # -----------------------------
     plt.figure(figsize=(11, 4.5))
 
-    for name, pos in strategies.items():
+    # baselines + ML : un seul backtest vectorisé ; RL à part (longueur et coût propres)
+    price = df["close_15m"].to_numpy()
+    batches = [
+        (df, backtest_batch(price, {k: v.values for k, v in strategies.items() if k != "RL_PPO"},
+                            transaction_cost=transaction_cost)),
+        (df_rl, backtest_batch(price[:len(df_rl)], {"RL_PPO": strategies["RL_PPO"].values},
+                               transaction_cost=float(rl_meta["transaction_cost"]))),
+    ]
 
-        if name == "RL_PPO":
-            tmp = df_rl.copy()
-            tc = float(rl_meta["transaction_cost"])
-        else:
-            tmp = df.copy()
-            tc = transaction_cost
+    for frame, bt in batches:
+        for name, eq in zip(bt.names, bt.equity):
 
-        tmp["position"] = pos.values
-        bt = backtest_m15(tmp, transaction_cost=tc)
+            # 🔥 SAFE NORMALIZATION (avoid NaN issue)
+            s = pd.Series(eq).dropna()
+            if len(s) == 0:
+                continue
 
-        eq = bt["equity"].astype(float).values
+            base = float(s.iloc[0])
+            eq = eq / base
 
-        # 🔥 SAFE NORMALIZATION (avoid NaN issue)
-        s = pd.Series(eq).dropna()
-        if len(s) == 0:
-            continue
-
-        base = float(s.iloc[0])
-        eq = eq / base
-
-        plt.plot(bt["timestamp"], eq, label=name)
+            plt.plot(frame["timestamp"], eq, label=name)
 
     plt.title("Equity Curves (2024) — Baselines vs ML vs RL")
     plt.xlabel("Time")
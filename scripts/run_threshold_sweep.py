@@ -0,0 +1,62 @@
+from pathlib import Path
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import matplotlib
+matplotlib.use("Agg")
+
+from src.strategies.ml_infer import load_model, predict_proba_up
+from src.evaluation.threshold_sweep import plot_sweep_heatmap, sweep_thresholds
+
+
+def main():
+    ROOT = Path(__file__).resolve().parent.parent
+    REPORTS = ROOT / "reports"
+    REPORTS.mkdir(exist_ok=True)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default=str(ROOT / "data" / "processed" / "m15_2024_features.parquet"))
+    ap.add_argument("--model-dir", default=str(ROOT / "models" / "v1"))
+    ap.add_argument("--long", type=float, nargs=2, default=[0.50, 0.70], metavar=("MIN", "MAX"))
+    ap.add_argument("--short", type=float, nargs=2, default=[0.30, 0.50], metavar=("MIN", "MAX"))
+    ap.add_argument("--steps", type=int, default=50)
+    ap.add_argument("--costs", type=float, nargs="+", default=[0.0, 0.00002, 0.00005, 0.0001, 0.0002])
+    ap.add_argument("--metric", default="sharpe")
+    ap.add_argument("--n-jobs", type=int, default=None)
+    args = ap.parse_args()
+
+    df = pd.read_parquet(args.data).sort_values("timestamp").reset_index(drop=True)
+    model, meta = load_model(args.model_dir)
+
+    # une seule inférence, réutilisée pour toute la grille
+    proba = predict_proba_up(df, model, meta["features"]).to_numpy()
+
+    t0 = time.perf_counter()
+    table = sweep_thresholds(
+        proba,
+        df["close_15m"].to_numpy(),
+        np.linspace(*args.long, args.steps),
+        np.linspace(*args.short, args.steps),
+        args.costs,
+        n_jobs=args.n_jobs,
+    )
+    print(f"Sweep: {len(table)} combinations in {time.perf_counter() - t0:.2f}s ({table.attrs['backend']} backend)")
+
+    out = REPORTS / "ml_2024_threshold_sweep.csv"
+    table.to_csv(out, index=False)
+    print("Saved:", out)
+
+    best = table.sort_values(args.metric, ascending=False).groupby("transaction_cost").head(1)
+    print(best.to_string(index=False))
+
+    for cost in args.costs:
+        png = REPORTS / f"ml_2024_threshold_sweep_{args.metric}_cost{cost:g}.png"
+        plot_sweep_heatmap(table, metric=args.metric, transaction_cost=cost, path=png)
+        print("Saved:", png)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,22 @@
 from pathlib import Path
+import argparse
+import json
 import pandas as pd
 
 from src.strategies.ml_train import make_target, train_compare_models, save_model
 
 ROOT = Path(__file__).resolve().parent.parent
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--search", action="store_true", help="recherche logreg / RF / XGBoost (successive halving)")
+ap.add_argument("--n-configs", type=int, default=100)
+ap.add_argument("--metric", default="roc_auc")
+ap.add_argument("--n-jobs", type=int, default=-1)
+ap.add_argument("--prune", action="store_true", help="élagage des features par importance de permutation")
+ap.add_argument("--f1-tol", type=float, default=0.005)
+ap.add_argument("--sharpe-tol", type=float, default=0.1)
+args = ap.parse_args()
+
 p22 = ROOT / "data" / "processed" / "m15_2022_features.parquet"
 p23 = ROOT / "data" / "processed" / "m15_2023_features.parquet"
 
@@ -13,7 +26,30 @@ df23 = pd.read_parquet(p23)
 df22 = make_target(df22, horizon=1)
 df23 = make_target(df23, horizon=1)
 
-model, meta = train_compare_models(df22, df23)
+if args.search:
+    # cache des essais : relancer la commande reprend une recherche interrompue
+    model, meta = train_compare_models(
+        df22, df23, n_jobs=args.n_jobs, search=True, n_configs=args.n_configs, metric=args.metric,
+        cache_dir=ROOT / "data" / "cache" / "model_search",
+    )
+else:
+    model, meta = train_compare_models(df22, df23, n_jobs=args.n_jobs)
+
+if args.prune:
+    from src.strategies.feature_pruning import prune_features
+
+    n_before = len(meta["features"])
+    model, slim_meta, report = prune_features(
+        model, df22, df23, meta["features"], f1_tol=args.f1_tol, sharpe_tol=args.sharpe_tol, n_jobs=args.n_jobs,
+        verbose=True,
+    )
+    meta = {**meta, **slim_meta}
+    report_path = ROOT / "reports" / "feature_pruning.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Pruned: {n_before} -> {len(meta['features'])} features | dropped: {report['dropped']}")
+    print(f"fit speedup x{report['fit_speedup']:.2f} | predict speedup x{report['predict_speedup']:.2f}")
+    print("Saved:", report_path)
 
 out_dir = ROOT / "models" / "v1"
 save_model(model, meta, out_dir)
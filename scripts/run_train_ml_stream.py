@@ -0,0 +1,54 @@
+"""
+Entraînement hors mémoire (src.strategies.ml_stream) sur des parquets de
+features (une année par fichier, dans l'ordre) ou une FeatureMatrix mmap.
+
+    python -m scripts.run_train_ml_stream --train data/processed/m15_20{18,19,20,21,22}_features.parquet \
+        --val data/processed/m15_2023_features.parquet --model sgd --epochs 5
+    python -m scripts.run_train_ml_stream --train-matrix data/cache/fm_train --model xgb --epochs 300
+"""
+from pathlib import Path
+import argparse
+
+from src.feature_matrix import FeatureMatrix
+from src.strategies.ml_stream import STREAM_MODELS, MatrixBatches, ParquetBatches, fit_incremental
+from src.strategies.ml_train import save_model
+
+
+def main():
+    ROOT = Path(__file__).resolve().parent.parent
+
+    ap = argparse.ArgumentParser()
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--train", nargs="+", help="parquets de features, dans l'ordre chronologique")
+    src.add_argument("--train-matrix", help="dossier FeatureMatrix (ouvert en mmap), avec y")
+    ap.add_argument("--val", nargs="+", default=None, help="parquets de validation")
+    ap.add_argument("--model", choices=STREAM_MODELS, default="sgd")
+    ap.add_argument("--epochs", type=int, default=3, help="passes SGD, ou rounds XGBoost")
+    ap.add_argument("--batch-rows", type=int, default=65_536)
+    ap.add_argument("--horizon", type=int, default=1)
+    ap.add_argument("--out", default=str(ROOT / "models" / "v1"))
+    args = ap.parse_args()
+
+    if args.train_matrix:
+        train = MatrixBatches(FeatureMatrix.open(args.train_matrix), batch_rows=args.batch_rows)
+    else:
+        train = ParquetBatches(args.train, batch_rows=args.batch_rows, horizon=args.horizon)
+    val = None
+    if args.val:
+        val = ParquetBatches(args.val, features=train.features, batch_rows=args.batch_rows, horizon=args.horizon)
+
+    model, meta = fit_incremental(
+        train, val, model=args.model, epochs=args.epochs, cache_dir=ROOT / "data" / "cache",
+    )
+    out_dir = Path(args.out)
+    save_model(model, meta, out_dir)
+
+    print("Saved model to:", out_dir)
+    print(f"{meta['model_name']} | rows: {meta['train_rows']} | fit: {meta['fit_seconds']:.1f}s")
+    if val is not None:
+        print("val_f1:", meta["val_f1"], "| val_acc:", meta["val_accuracy"], "| val_log_loss:", meta["val_log_loss"])
+        print(f"val mean proba {meta['val_mean_proba']:.3f} vs pos rate {meta['val_pos_rate']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare plusieurs horizons de cible en un seul run (train 2022, validation 2023).
+
+    python -m scripts.run_train_multi_horizon --horizons 1 4 8 16
+    python -m scripts.run_train_multi_horizon --threshold 0.0005 --mode multi_output
+    python -m scripts.run_train_multi_horizon --save-best   # meilleur horizon -> models/v1
+"""
+from pathlib import Path
+import argparse
+
+import pandas as pd
+
+from src.strategies.ml_train import make_targets, save_model, select_feature_cols
+from src.strategies.multi_horizon import MODES, train_multi_horizon
+
+
+def main():
+    ROOT = Path(__file__).resolve().parent.parent
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--horizons", type=int, nargs="+", default=[1, 4, 8, 16])
+    ap.add_argument("--threshold", type=float, default=None, help="cibles 3 classes (-1 / 0 / 1) au-delà de ce seuil")
+    ap.add_argument("--model", choices=["logreg", "rf"], default="rf")
+    ap.add_argument("--mode", choices=MODES, default="per_horizon")
+    ap.add_argument("--n-jobs", type=int, default=-1)
+    ap.add_argument("--save-best", action="store_true", help="sauve le modèle du meilleur horizon (binaire, per_horizon)")
+    args = ap.parse_args()
+
+    df22 = pd.read_parquet(ROOT / "data" / "processed" / "m15_2022_features.parquet")
+    df23 = pd.read_parquet(ROOT / "data" / "processed" / "m15_2023_features.parquet")
+    train = make_targets(df22, args.horizons, args.threshold)
+    val = make_targets(df23, args.horizons, args.threshold)
+
+    models, report = train_multi_horizon(
+        train, val, horizons=args.horizons, model=args.model, mode=args.mode, n_jobs=args.n_jobs,
+    )
+    print(report.to_string(index=False))
+
+    out = ROOT / "reports" / "multi_horizon.csv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    report.to_csv(out, index=False)
+    print("Saved:", out)
+
+    if args.save_best:
+        # l'API lit predict_proba[:, 1] : seul un modèle binaire par horizon convient
+        if args.threshold is not None or args.mode != "per_horizon":
+            raise SystemExit("--save-best needs binary targets (no --threshold) and --mode per_horizon")
+        best = report.iloc[0]
+        h = int(best["horizon"])
+        meta = {
+            "features": select_feature_cols(train),
+            "model_name": args.model,
+            "horizon": h,
+            "val_accuracy": float(best["val_accuracy"]),
+            "val_f1": float(best["val_f1"]),
+            "val_sharpe": float(best["val_sharpe"]),
+            "selected_by": "val_sharpe",
+        }
+        save_model(models[h], meta, ROOT / "models" / "v1")
+        print(f"Saved model (horizon {h}) to:", ROOT / "models" / "v1")
+
+
+if __name__ == "__main__":
+    main()
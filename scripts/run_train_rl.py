@@ -1,9 +1,17 @@
 from pathlib import Path
+import argparse
 import pandas as pd
 from src.strategies.rl_train import train_ppo
 
 ROOT = Path(__file__).resolve().parent.parent
 
+ap = argparse.ArgumentParser()
+ap.add_argument("--n-envs", type=int, default=1, help="> 1 : env vectorisé BatchTradingEnv")
+ap.add_argument("--episode-len", type=int, default=None, help="longueur des épisodes (départs aléatoires)")
+ap.add_argument("--n-steps", type=int, default=512, help="pas par env et par rollout")
+ap.add_argument("--batch-size", type=int, default=32)
+args = ap.parse_args()
+
 p22 = ROOT / "data" / "processed" / "m15_2022_features.parquet"
 df22 = pd.read_parquet(p22)
 
@@ -14,6 +22,10 @@ train_ppo(
     out_dir=out_dir,
     total_timesteps=50_000,
     seed=42,
+    n_envs=args.n_envs,
+    episode_len=args.episode_len,
+    n_steps=args.n_steps,
+    batch_size=args.batch_size,
 )
 
 print("Saved RL model to:", out_dir)
@@ -0,0 +1,67 @@
+from pathlib import Path
+import argparse
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from src.evaluation.walk_forward import walk_forward
+from src.feature_store import DEFAULT_STORE, read_features
+from src.strategies.metrics import summary_metrics
+
+
+def main():
+    ROOT = Path(__file__).resolve().parent.parent
+    REPORTS = ROOT / "reports"
+    REPORTS.mkdir(exist_ok=True)
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--store", default=str(DEFAULT_STORE))
+    ap.add_argument("--window", default="rolling", choices=["rolling", "expanding"])
+    ap.add_argument("--train-months", type=int, default=12)
+    ap.add_argument("--val-months", type=int, default=3)
+    ap.add_argument("--test-months", type=int, default=1, help="fréquence de réentraînement")
+    ap.add_argument("--embargo-bars", type=int, default=None)
+    ap.add_argument("--first-test", default=None)
+    ap.add_argument("--n-jobs", type=int, default=None)
+    args = ap.parse_args()
+
+    df = read_features(args.store)
+    res = walk_forward(
+        df,
+        train_months=args.train_months,
+        val_months=args.val_months,
+        test_months=args.test_months,
+        embargo_bars=args.embargo_bars,
+        window=args.window,
+        first_test=args.first_test,
+        n_jobs=args.n_jobs,
+    )
+
+    print(res.folds[["fold", "test_start", "model_name", "val_f1", "test_accuracy", "final_equity", "sharpe"]])
+    print("Models selected:", res.folds["model_name"].value_counts().to_dict())
+    print("Stitched OOS:", summary_metrics(res.backtest))
+
+    res.folds.to_csv(REPORTS / "walk_forward_folds.csv", index=False)
+    res.backtest[["timestamp", "close_15m", "proba_up", "position", "fold", "strat_ret_net", "equity"]].to_parquet(
+        REPORTS / "walk_forward_oos.parquet", index=False
+    )
+
+    plt.figure(figsize=(11, 4.5))
+    plt.plot(res.backtest["timestamp"], res.backtest["equity"], label="walk-forward ML (OOS)")
+    for t in res.folds["test_start"]:
+        plt.axvline(t, color="grey", alpha=0.15, linewidth=0.8)
+    plt.title(f"Walk-forward equity ({args.window}, retrain every {args.test_months} month(s))")
+    plt.xlabel("Time")
+    plt.ylabel("Equity")
+    plt.legend()
+    plt.tight_layout()
+    out = REPORTS / "walk_forward_equity.png"
+    plt.savefig(out, dpi=150)
+    plt.close()
+    print("Saved:", REPORTS / "walk_forward_folds.csv")
+    print("Saved:", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from pathlib import Path
+import argparse
 import json
 import pandas as pd
 
@@ -10,13 +11,21 @@ MODELS.mkdir(exist_ok=True)
 final_path = REPORTS / "final_comparison_2024.csv"
 df = pd.read_csv(final_path).set_index("strategy")
 
-best = df["final_equity"].astype(float).idxmax()
+# ex. --select-by final_equity_lo : borne basse de l'IC bootstrap (run_final_comparison_2024)
+ap = argparse.ArgumentParser()
+ap.add_argument("--select-by", default="final_equity")
+args = ap.parse_args()
+if args.select_by not in df.columns:
+    raise SystemExit(f"Unknown column {args.select_by!r} in {final_path}: {list(df.columns)}")
+
+# max_drawdown est négatif : plus grand = meilleur, idxmax convient aussi
+best = df[args.select_by].astype(float).idxmax()
 
 # Dossiers modèles (chez toi: V1 en majuscule)
 ml_dir = "models/V1"
 rl_dir = "models/rl_v1"
 
-payload = {"selected_strategy": best}
+payload = {"selected_strategy": best, "selected_by": args.select_by}
 
 if str(best).upper().startswith("RL"):
     payload.update({"type": "rl", "dir": rl_dir})
@@ -1,36 +1,96 @@
-import numpy as np
-import pandas as pd
-
-def clean_m15(m15: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
-    df = m15.sort_values("timestamp").reset_index(drop=True).copy()
-
-    price_cols = ["open_15m","high_15m","low_15m","close_15m"]
-
-    # prix > 0
-    before = len(df)
-    df = df[(df[price_cols] > 0).all(axis=1)].copy()
-    removed_nonpos = before - len(df)
-
-    # cohérence OHLC
-    before = len(df)
-    df = df[df["high_15m"] >= df["low_15m"]].copy()
-    removed_hilo = before - len(df)
-
-    before = len(df)
-    df = df[(df["open_15m"].between(df["low_15m"], df["high_15m"])) &
-            (df["close_15m"].between(df["low_15m"], df["high_15m"]))].copy()
-    removed_openclose = before - len(df)
-
-    # ret log
-    df["ret"] = np.log(df["close_15m"]).diff()
-
-    report = {
-        "rows_in": int(len(m15)),
-        "rows_out": int(len(df)),
-        "removed_non_positive": int(removed_nonpos),
-        "removed_high_low_incoherent": int(removed_hilo),
-        "removed_openclose_outside_range": int(removed_openclose),
-        "start": str(df["timestamp"].min()),
-        "end": str(df["timestamp"].max()),
-    }
-    return df.reset_index(drop=True), report
+import numpy as np
+import pandas as pd
+
+from src.data_import import is_sorted_panel, sort_panel, symbol_codes
+from src.profiling import profiled
+
+PRICE_COLS = ["open_15m","high_15m","low_15m","close_15m"]
+
+# bits du masque de rejet (une barre peut cumuler plusieurs raisons)
+REJECT_NON_POSITIVE = np.uint8(1)
+REJECT_HIGH_LOW = np.uint8(2)
+REJECT_OPENCLOSE = np.uint8(4)
+
+
+def rejection_mask(m15: pd.DataFrame) -> np.ndarray:
+    """
+    Évalue toutes les règles de validité en une passe vectorisée.
+    Retourne un uint8 par ligne (0 = barre valide), aligné sur m15.
+    """
+    o, h, l, c = (m15[col].to_numpy(dtype=np.float64, copy=False) for col in PRICE_COLS)
+
+    # NaN -> comparaisons fausses -> rejet (comme le filtre d'origine)
+    with np.errstate(invalid="ignore"):
+        nonpos = ~((o > 0) & (h > 0) & (l > 0) & (c > 0))
+        hilo = ~(h >= l)
+        openclose = ~((o >= l) & (o <= h) & (c >= l) & (c <= h))
+
+    mask = nonpos.astype(np.uint8)
+    mask |= hilo.astype(np.uint8) * REJECT_HIGH_LOW
+    mask |= openclose.astype(np.uint8) * REJECT_OPENCLOSE
+    return mask
+
+
+@profiled()
+def clean_m15(
+    m15: pd.DataFrame,
+    assume_sorted: bool = False,
+    keep_mask: bool = False,
+) -> tuple[pd.DataFrame, dict] | tuple[pd.DataFrame, dict, np.ndarray]:
+    """
+    Accepte aussi un panel multi-symboles (colonne `symbol`) : les règles sont
+    évaluées en une passe sur toutes les paires, trié par (symbol, timestamp),
+    et `ret` repart de NaN au début de chaque symbole.
+    keep_mask=True : renvoie (out, report, mask), mask = rejection_mask aligné
+    sur les lignes de m15 dans leur ordre d'origine (audit des rejets :
+    m15[mask != 0]) ; report reste sérialisable.
+    """
+    df = m15
+    perm = None
+    if not assume_sorted and not is_sorted_panel(df):
+        # index positionnel : après le tri, df.index = position dans m15
+        df = sort_panel(df.reset_index(drop=True))
+        perm = df.index.to_numpy()
+
+    mask = rejection_mask(df)
+    nonpos = (mask & REJECT_NON_POSITIVE) != 0
+    hilo = (mask & REJECT_HIGH_LOW) != 0
+
+    # les compteurs suivent l'ordre des filtres : chaque règle ne compte
+    # que les barres qui ont passé les précédentes
+    removed_nonpos = int(nonpos.sum())
+    removed_hilo = int((hilo & ~nonpos).sum())
+    removed_openclose = int(((mask & REJECT_OPENCLOSE) != 0)[~nonpos & ~hilo].sum())
+
+    # filtre unique -> une seule copie
+    out = df.loc[mask == 0].reset_index(drop=True)
+
+    # ret log
+    ret = np.diff(np.log(out["close_15m"].to_numpy(dtype=np.float64)), prepend=np.nan)
+    if "symbol" in out.columns and len(out):
+        # pas de rendement entre la dernière barre d'une paire et la première de la suivante
+        codes = symbol_codes(out)
+        ret[1:][codes[1:] != codes[:-1]] = np.nan
+    out["ret"] = ret
+
+    report = {
+        "rows_in": int(len(m15)),
+        "rows_out": int(len(out)),
+        "removed_non_positive": removed_nonpos,
+        "removed_high_low_incoherent": removed_hilo,
+        "removed_openclose_outside_range": removed_openclose,
+        "start": str(out["timestamp"].min()),
+        "end": str(out["timestamp"].max()),
+    }
+    if "symbol" in out.columns:
+        report["rows_out_by_symbol"] = {
+            str(k): int(v) for k, v in out["symbol"].value_counts(sort=False).items()
+        }
+    if keep_mask:
+        if perm is not None:
+            # retour à l'ordre des lignes de l'appelant
+            orig = np.empty_like(mask)
+            orig[perm] = mask
+            mask = orig
+        return out, report, mask
+    return out, report
@@ -1,22 +1,179 @@
-import pandas as pd
-
-def load_m1_csv(path: str) -> pd.DataFrame:
-    df = pd.read_csv(
-        path,
-        header=None,
-        names=["date","time","open","high","low","close","volume"]
-    )
-
-    df["timestamp"] = pd.to_datetime(
-        df["date"].astype(str) + " " + df["time"].astype(str),
-        format="%Y.%m.%d %H:%M",
-        errors="coerce"
-    )
-
-    df = df.dropna(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
-
-    for c in ["open","high","low","close","volume"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-
-    df = df.dropna(subset=["open","high","low","close"]).reset_index(drop=True)
-    return df
+from __future__ import annotations
+import re
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from src.profiling import profiled
+
+M1_RAW_COLUMNS = ["date", "time", "open", "high", "low", "close", "volume"]
+M1_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+PRICE_COLS = ["open", "high", "low", "close"]
+
+# ~16 Mo de CSV par bloc (≈ 300k barres M1)
+DEFAULT_BLOCK_SIZE = 1 << 24
+
+
+def symbol_from_path(path: str | Path) -> str:
+    # DAT_MT_GBPUSD_M1_2022.csv -> GBPUSD (sinon le nom du fichier)
+    m = re.search(r"DAT_[A-Z]+_([A-Z0-9]+)_M1", Path(path).name)
+    return m.group(1) if m else Path(path).stem
+
+
+def symbol_codes(df: pd.DataFrame) -> np.ndarray:
+    # codes entiers dans l'ordre de tri des symboles (catégoriel ou str)
+    sym = df["symbol"]
+    if isinstance(sym.dtype, pd.CategoricalDtype):
+        return sym.cat.codes.to_numpy()
+    return pd.factorize(sym, sort=True)[0]
+
+
+def is_sorted_panel(df: pd.DataFrame) -> bool:
+    """Trié par timestamp, ou par (symbol, timestamp) si la colonne symbol existe."""
+    if "symbol" not in df.columns:
+        return df["timestamp"].is_monotonic_increasing
+    codes = np.diff(symbol_codes(df).astype(np.int64))
+    dts = np.diff(df["timestamp"].to_numpy().astype(np.int64))
+    return bool(np.all((codes > 0) | ((codes == 0) & (dts >= 0))))
+
+
+def sort_panel(df: pd.DataFrame) -> pd.DataFrame:
+    if is_sorted_panel(df):
+        return df
+    keys = ["symbol", "timestamp"] if "symbol" in df.columns else ["timestamp"]
+    return df.sort_values(keys, kind="stable")
+
+
+def _as_paths(paths: str | Path | Iterable[str | Path]) -> list[Path]:
+    if isinstance(paths, (str, Path)):
+        return [Path(paths)]
+    return [Path(p) for p in paths]
+
+
+def _finalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.dropna(subset=["timestamp", *PRICE_COLS])
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp", kind="stable")
+    return df.reset_index(drop=True)
+
+
+def _batch_to_frame(batch: pa.RecordBatch) -> pd.DataFrame:
+    # date (timestamp[s]) + time (time32[s]) -> timestamp, sans concaténer de strings
+    secs = pc.add(
+        batch.column("date").cast(pa.int64()),
+        batch.column("time").cast(pa.int32()).cast(pa.int64()),
+    )
+    ts = secs.cast(pa.timestamp("s")).cast(pa.timestamp("us"))
+    table = pa.Table.from_arrays(
+        [ts, *(batch.column(c) for c in M1_COLUMNS[1:])],
+        names=M1_COLUMNS,
+    )
+    return _finalize_chunk(table.to_pandas())
+
+
+def _iter_arrow(path: Path, block_size: int) -> Iterator[tuple[pd.DataFrame, int]]:
+    # (chunk, lignes CSV lues pour ce chunk, avant dropna)
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(column_names=M1_RAW_COLUMNS, block_size=block_size),
+        convert_options=pacsv.ConvertOptions(
+            column_types={
+                "date": pa.timestamp("s"),
+                "time": pa.time32("s"),
+                **{c: pa.float64() for c in PRICE_COLS},
+                "volume": pa.int64(),
+            },
+            timestamp_parsers=["%Y.%m.%d"],
+        ),
+    )
+    for batch in reader:
+        if batch.num_rows:
+            yield _batch_to_frame(batch), batch.num_rows
+
+
+def _iter_pandas(path: Path, chunksize: int, skiprows: int = 0) -> Iterator[pd.DataFrame]:
+    # parse tolérant (valeurs invalides -> NaN / NaT), utilisé si pyarrow refuse le fichier
+    reader = pd.read_csv(
+        path,
+        header=None,
+        names=M1_RAW_COLUMNS,
+        dtype={"date": str, "time": str},
+        chunksize=chunksize,
+        skiprows=skiprows,
+    )
+    for raw in reader:
+        day = pd.to_datetime(raw["date"], format="%Y.%m.%d", errors="coerce")
+        tod = pd.to_datetime(raw["time"], format="%H:%M", errors="coerce")
+        df = pd.DataFrame({"timestamp": day + (tod - tod.dt.normalize())})
+        df["timestamp"] = df["timestamp"].astype("datetime64[us]")
+        for c in M1_COLUMNS[1:]:
+            df[c] = pd.to_numeric(raw[c], errors="coerce")
+        yield _finalize_chunk(df)
+
+
+def iter_m1_csv(
+    paths: str | Path | Iterable[str | Path],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    with_symbol: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lit un ou plusieurs CSV M1 HistData (dans l'ordre donné) comme un seul flux.
+    Chaque chunk est typé (float64 / int64 / datetime64) et trié par timestamp
+    à l'intérieur du chunk seulement : le flux n'est globalement trié que si
+    les fichiers le sont (load_m1_csv trie le résultat complet).
+    La mémoire reste bornée par la taille d'un bloc.
+    with_symbol=True : ajoute une colonne catégorielle `symbol` déduite du nom
+    de fichier (panel multi-paires).
+    """
+    paths = _as_paths(paths)
+    symbol_dtype = pd.CategoricalDtype(sorted({symbol_from_path(p) for p in paths}))
+    for path in paths:
+        if with_symbol:
+            sym = symbol_from_path(path)
+            for chunk in _iter_file(path, block_size):
+                chunk.insert(0, "symbol", pd.Categorical([sym] * len(chunk), dtype=symbol_dtype))
+                yield chunk
+        else:
+            yield from _iter_file(path, block_size)
+
+
+def _iter_file(path: Path, block_size: int) -> Iterator[pd.DataFrame]:
+    rows_done = 0
+    try:
+        for chunk, n_rows in _iter_arrow(path, block_size):
+            rows_done += n_rows
+            yield chunk
+    except pa.ArrowInvalid:
+        # ligne non conforme : on reprend le fichier en mode tolérant à la
+        # première ligne CSV non encore émise (offset en lignes, pas en
+        # timestamp : aucune barre n'est perdue si le fichier n'est pas trié)
+        for chunk in _iter_pandas(path, chunksize=max(block_size // 48, 10_000), skiprows=rows_done):
+            if len(chunk):
+                yield chunk
+
+
+@profiled()
+def load_m1_csv(
+    path: str | Path | Iterable[str | Path],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    with_symbol: bool = False,
+) -> pd.DataFrame:
+    """
+    with_symbol=True : panel long (symbol, timestamp, OHLCV) trié par
+    (symbol, timestamp), ex. load_m1_csv(glob("DAT_MT_*_M1_2024.csv"), with_symbol=True).
+    """
+    chunks = list(iter_m1_csv(path, block_size=block_size, with_symbol=with_symbol))
+    if not chunks:
+        return pd.DataFrame({
+            "timestamp": pd.Series(dtype="datetime64[us]"),
+            **{c: pd.Series(dtype=np.float64) for c in PRICE_COLS},
+            "volume": pd.Series(dtype=np.int64),
+        })
+
+    df = pd.concat(chunks, ignore_index=True)
+    return sort_panel(df).reset_index(drop=True)
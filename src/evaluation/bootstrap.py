@@ -0,0 +1,248 @@
+"""
+Intervalles de confiance par bootstrap (blocs fixes ou stationnaire) pour
+Sharpe, max drawdown et equity finale des stratégies.
+
+Un rééchantillonnage est une suite de blocs circulaires de la série des
+rendements nets : deux matrices d'indices (B, n_blocs), débuts et longueurs
+(longueur fixe `block_size`, ou géométrique de moyenne `block_size` pour le
+bootstrap stationnaire de Politis-Romano ; le dernier bloc est tronqué pour
+faire exactement n barres). Les stratégies évaluées sur les mêmes barres
+partagent les mêmes indices (comparaison appariée).
+
+Évaluation sans matérialiser les (B, n) rendements : chaque bloc est résumé
+par (somme, somme des carrés, plus haut / plus bas de la log-equity, drawdown
+interne) en O(1) grâce à des sommes préfixes et des tables creuses ; les
+blocs sont ensuite enchaînés avec la même règle de fusion que
+StreamingMetrics.merge. Le coût est en O(B x n_blocs) au lieu de O(B x n),
+par paquets de lignes bornés par `memory_mb`.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.metrics import StreamingMetrics
+
+PERIODS_PER_YEAR = 252 * 24 * 4
+BOOTSTRAP_METRICS = ["sharpe", "max_drawdown", "final_equity"]
+
+# statistiques d'un bloc : somme, somme des carrés, plus haut / plus bas
+# de la somme cumulée, drawdown interne (<= 0) en espace log
+_SUM, _SQ, _PEAK, _TROUGH, _MDD = range(5)
+
+
+def _floor_log2(x: np.ndarray) -> np.ndarray:
+    # exact pour des entiers > 0 (frexp : x = m * 2^e, m dans [0.5, 1))
+    return np.frexp(x.astype(np.float64))[1].astype(np.int64) - 1
+
+
+class _SegmentTable:
+    """
+    Requêtes O(1) sur des segments circulaires [s, s + L) de r, via la série
+    doublée : sommes préfixes S (et des carrés), tables creuses de max / min
+    de S, et D[k][s] = drawdown interne de [s, s + 2^k) construit par
+    doublement avec la règle de fusion de StreamingMetrics.merge.
+    """
+
+    def __init__(self, r: np.ndarray, max_len: int):
+        n = len(r)
+        r2 = np.concatenate([r, r])
+        self.S = np.concatenate([[0.0], np.cumsum(r2)])
+        self.Q = np.concatenate([[0.0], np.cumsum(r2 * r2)])
+        levels = int(_floor_log2(np.array([max(max_len, 1)]))[0]) + 1
+        m = len(self.S)
+        # niveaux empilés en (levels, m) pour indexer par [k, i] ; le bourrage
+        # en fin de ligne n'est jamais lu
+        self.MX = np.full((levels, m), -np.inf)
+        self.MN = np.full((levels, m), np.inf)
+        self.D = np.zeros((levels, m))
+        self.MX[0] = self.MN[0] = self.S
+        for k in range(1, levels):
+            h = 1 << (k - 1)
+            w = m - (2 * h - 1)
+            mx, mn, d = self.MX[k - 1], self.MN[k - 1], self.D[k - 1]
+            self.MX[k, :w] = np.maximum(mx[:w], mx[h:h + w])
+            self.MN[k, :w] = np.minimum(mn[:w], mn[h:h + w])
+            # [s, s+2h) = [s, s+h) puis [s+h, s+2h)
+            cnt = 2 * n - 2 * h + 1
+            cross = mn[h + 1:h + 1 + cnt] - mx[1:1 + cnt]
+            self.D[k, :cnt] = np.minimum(np.minimum(d[:cnt], d[h:h + cnt]), cross)
+
+    @staticmethod
+    def _range(table: np.ndarray, op, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        # op sur S[lo..hi] (inclus), deux fenêtres 2^k qui se recouvrent
+        k = _floor_log2(hi - lo + 1)
+        return op(table[k, lo], table[k, hi - (1 << k) + 1])
+
+    def blocks(self, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Statistiques (5, ...) de chaque bloc ; longueur 0 -> élément neutre."""
+        out = np.zeros((5, *starts.shape))
+        out[_PEAK] = -np.inf
+        out[_TROUGH] = np.inf
+        nz = lengths > 0
+        s, L = starts[nz], lengths[nz]
+        e = s + L
+        base = self.S[s]
+        out[_SUM][nz] = self.S[e] - base
+        out[_SQ][nz] = self.Q[e] - self.Q[s]
+        out[_PEAK][nz] = self._range(self.MX, np.maximum, s + 1, e) - base
+        out[_TROUGH][nz] = self._range(self.MN, np.minimum, s + 1, e) - base
+
+        # drawdown interne : deux fenêtres 2^k [s, s+2^k) et [b, e), b = e - 2^k,
+        # plus le terme croisé (creux de [b, e) contre le pic de [s, b)) ;
+        # les parties communes ne peuvent pas créer de faux drawdown
+        k = _floor_log2(L)
+        b = e - (1 << k)
+        mdd = np.minimum(self.D[k, s], self.D[k, b])
+        over = b > s
+        if over.any():
+            so, bo, eo = s[over], b[over], e[over]
+            cross = self._range(self.MN, np.minimum, bo + 1, eo) - self._range(self.MX, np.maximum, so + 1, bo)
+            mdd[over] = np.minimum(mdd[over], cross)
+        out[_MDD][nz] = mdd
+        return out
+
+
+def block_indices(
+    n: int,
+    n_resamples: int,
+    block_size: int = 96,
+    method: str = "stationary",
+    rng: np.random.Generator | int | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Matrices (B, n_blocs) des débuts et longueurs de blocs ; chaque ligne
+    couvre exactement n barres (longueurs nulles en fin de ligne si besoin).
+    """
+    if method not in ("stationary", "block"):
+        raise ValueError(f"method must be 'stationary' or 'block', got {method!r}")
+    rng = np.random.default_rng(rng)
+    block_size = max(1, min(int(block_size), n))
+
+    if method == "block":
+        nb = -(-n // block_size)
+        lengths = np.full((n_resamples, nb), block_size, dtype=np.int64)
+        lengths[:, -1] = n - (nb - 1) * block_size
+    else:
+        # marge large sur le nombre de blocs ; on retire les (rares) lignes trop courtes
+        nb = int(np.ceil(n / block_size * 1.3)) + 16
+        lengths = rng.geometric(1.0 / block_size, size=(n_resamples, nb)).astype(np.int64)
+        short = lengths.sum(axis=1) < n
+        while short.any():
+            lengths[short] = rng.geometric(1.0 / block_size, size=(int(short.sum()), nb))
+            short = lengths.sum(axis=1) < n
+        # tronque au n-ième élément
+        end = np.cumsum(lengths, axis=1)
+        lengths = np.clip(lengths - np.maximum(end - n, 0), 0, None)
+
+    starts = rng.integers(0, n, size=lengths.shape, dtype=np.int64)
+    return starts, lengths
+
+
+def expand_indices(starts: np.ndarray, lengths: np.ndarray, n: int) -> np.ndarray:
+    """Matrice (B, n) des indices de barres (utile pour contrôler / petits B)."""
+    out = np.empty((starts.shape[0], n), dtype=np.int64)
+    for b in range(starts.shape[0]):
+        keep = lengths[b] > 0
+        s, l = starts[b, keep], lengths[b, keep]
+        offs = np.arange(n) - np.repeat(np.cumsum(l) - l, l)
+        out[b] = (np.repeat(s, l) + offs) % n
+    return out
+
+
+def _evaluate(table: _SegmentTable, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Statistiques (5, B) de la série rééchantillonnée complète."""
+    blocks = table.blocks(starts, lengths)
+
+    # enchaînement des blocs : log-equity avant chaque bloc et pic courant
+    c_prev = np.cumsum(blocks[_SUM], axis=1) - blocks[_SUM]
+    peak_after = np.maximum.accumulate(c_prev + blocks[_PEAK], axis=1)
+    peak_before = np.empty_like(peak_after)
+    peak_before[:, 0] = -np.inf
+    peak_before[:, 1:] = peak_after[:, :-1]
+
+    out = np.empty((5, starts.shape[0]))
+    out[_SUM] = blocks[_SUM].sum(axis=1)
+    out[_SQ] = blocks[_SQ].sum(axis=1)
+    out[_PEAK] = peak_after[:, -1]
+    out[_TROUGH] = (c_prev + blocks[_TROUGH]).min(axis=1)
+    with np.errstate(invalid="ignore"):
+        cross = c_prev + blocks[_TROUGH] - peak_before
+    out[_MDD] = np.minimum(blocks[_MDD], cross).min(axis=1)
+    return out
+
+
+def _to_metrics(stats: np.ndarray, n: int, periods_per_year: int) -> pd.DataFrame:
+    mean = stats[_SUM] / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(np.maximum(stats[_SQ] - n * mean * mean, 0.0) / (n - 1))
+        sharpe = np.where((n < 5) | (std == 0), 0.0, mean / std * np.sqrt(periods_per_year))
+    return pd.DataFrame({
+        "sharpe": sharpe,
+        "max_drawdown": np.expm1(stats[_MDD]),
+        "final_equity": np.exp(stats[_SUM]),
+    })
+
+
+def bootstrap_metrics(
+    returns: dict[str, np.ndarray | pd.Series],
+    n_resamples: int = 10_000,
+    method: str = "stationary",
+    block_size: int = 96,
+    seed: int = 42,
+    memory_mb: int = 256,
+    periods_per_year: int = PERIODS_PER_YEAR,
+) -> dict[str, pd.DataFrame]:
+    """
+    Distributions bootstrap (une ligne par rééchantillonnage) de Sharpe,
+    max drawdown et equity finale pour chaque série de rendements nets
+    (ex. backtest["strat_ret_net"] ; les NaN sont retirés comme dans
+    summary_metrics).
+    """
+    series = {name: np.asarray(r, dtype=np.float64) for name, r in returns.items()}
+    series = {name: r[~np.isnan(r)] for name, r in series.items()}
+
+    # stratégies de même longueur -> mêmes indices
+    groups: dict[int, list[str]] = {}
+    for name, r in series.items():
+        groups.setdefault(len(r), []).append(name)
+
+    out = {}
+    rng = np.random.default_rng(seed)
+    for n, names in groups.items():
+        if n < 2:
+            raise ValueError(f"Not enough returns to bootstrap for {names}: {n}")
+        starts, lengths = block_indices(n, n_resamples, block_size, method, rng)
+        # ~ 24 tableaux (ligne, n_blocs) de 8 octets en vol pendant _evaluate
+        rows = max(1, int(memory_mb * 2**20 // (starts.shape[1] * 8 * 24)))
+        for name in names:
+            table = _SegmentTable(series[name], int(lengths.max()))
+            stats = [
+                _evaluate(table, starts[lo:lo + rows], lengths[lo:lo + rows])
+                for lo in range(0, n_resamples, rows)
+            ]
+            out[name] = _to_metrics(np.concatenate(stats, axis=1), n, periods_per_year)
+    return {name: out[name] for name in returns}
+
+
+def bootstrap_ci(
+    returns: dict[str, np.ndarray | pd.Series],
+    alpha: float = 0.05,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Une ligne par stratégie : valeur observée (comme summary_metrics) et
+    bornes [alpha/2, 1 - alpha/2] du bootstrap, colonnes <métrique>_lo / _hi.
+    """
+    dists = bootstrap_metrics(returns, **kwargs)
+    rows = {}
+    for name, dist in dists.items():
+        point = StreamingMetrics.from_arrays(returns[name]).summary()
+        row = {}
+        for m in BOOTSTRAP_METRICS:
+            lo, hi = np.quantile(dist[m].to_numpy(), [alpha / 2, 1 - alpha / 2])
+            row[m] = point[m]
+            row[f"{m}_lo"] = float(lo)
+            row[f"{m}_hi"] = float(hi)
+        rows[name] = row
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis("strategy")
@@ -0,0 +1,415 @@
+"""
+Pipeline d'évaluation complet sous forme de DAG avec cache adressé par contenu.
+
+    load -> aggregate -> clean -> features -> target
+    target -> baselines   -> baselines_backtest -> baselines_metrics ┐
+    target -> ml_train -> ml_predict -> ml_backtest -> ml_metrics     ├-> compare
+    target -> rl_train -> rl_predict -> rl_backtest -> rl_metrics     ┘
+
+La clé d'un stage = hash(nom, code du stage et des modules qu'il utilise,
+y compris les modules src.* qu'ils importent (transitivement), paramètres,
+clés des stages amont, contenu des fichiers bruts pour `load`).
+Un artefact déjà présent dans le cache n'est pas recalculé : changer un
+paramètre ne relance que le stage concerné et ce qui est en aval. Les
+branches indépendantes (baselines / ML / RL) tournent en parallèle.
+"""
+from __future__ import annotations
+import ast
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import src.cleaning
+import src.data_import
+import src.feature_kernels
+import src.features
+import src.features_parallel
+import src.m15_agg
+import src.strategies.backtest
+import src.strategies.baselines
+import src.strategies.metrics
+import src.strategies.ml_infer
+import src.strategies.ml_train
+from src.cleaning import clean_m15
+from src.data_import import load_m1_csv
+from src.features_parallel import add_features_chunked
+from src.m15_agg import aggregate_m15
+from src.strategies.backtest import BatchBacktest, backtest_batch
+from src.strategies.baselines import (
+    baseline_always_flat, baseline_always_long, baseline_ema_rsi_rule, baseline_random
+)
+from src.strategies.metrics import summary_metrics_batch
+from src.strategies.ml_infer import positions_from_proba, predict_proba_up
+from src.strategies.ml_train import make_target, train_compare_models
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_CACHE = ROOT / "data" / "cache" / "pipeline"
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable
+    deps: list[str] = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+    code: list[ModuleType] = field(default_factory=list)
+    input_files: list[Path] = field(default_factory=list)
+
+
+def _hash_file(path: Path, h) -> None:
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+
+
+def _src_imports(path: Path) -> set[str]:
+    # noms src.* importés par un fichier (import src.x / from src.x import y)
+    names = set()
+    for node in ast.walk(ast.parse(path.read_bytes())):
+        if isinstance(node, ast.Import):
+            names.update(a.name for a in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module)
+            # `from src.strategies import rl_env` : rl_env est un module
+            names.update(f"{node.module}.{a.name}" for a in node.names)
+    return {n for n in names if n == "src" or n.startswith("src.")}
+
+
+def _module_file(name: str) -> Path | None:
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        # ex. "src.cleaning.clean_m15" : une fonction, pas un module
+        return None
+    if spec is None or spec.origin is None or not spec.origin.endswith(".py"):
+        return None
+    return Path(spec.origin)
+
+
+def _code_files(modules: list[ModuleType]) -> dict[str, Path]:
+    """Fichiers des modules et de leurs imports src.* transitifs, par nom de module."""
+    files: dict[str, Path] = {}
+    todo = [m.__name__ for m in modules]
+    while todo:
+        name = todo.pop()
+        if name in files:
+            continue
+        path = _module_file(name)
+        if path is None:
+            continue
+        files[name] = path
+        todo.extend(_src_imports(path) - files.keys())
+    return files
+
+
+def _code_hash(stage: Stage) -> str:
+    h = hashlib.sha256(inspect.getsource(stage.fn).encode("utf-8"))
+    for name, path in sorted(_code_files(stage.code).items()):
+        h.update(name.encode("utf-8"))
+        h.update(path.read_bytes().replace(b"\r\n", b"\n"))
+    return h.hexdigest()
+
+
+def _run_stage(fn: Callable, dep_paths: list[str], params: dict, out_path: str) -> str:
+    # exécuté dans un worker : lit les artefacts amont depuis le cache, écrit le sien
+    inputs = [joblib.load(p) for p in dep_paths]
+    artifact = fn(*inputs, **params)
+    tmp = out_path + ".tmp"
+    joblib.dump(artifact, tmp)
+    os.replace(tmp, out_path)
+    return out_path
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage], cache_dir: str | Path = DEFAULT_CACHE):
+        self.stages = {s.name: s for s in stages}
+        self.cache_dir = Path(cache_dir)
+        for s in stages:
+            for d in s.deps:
+                if d not in self.stages:
+                    raise ValueError(f"Stage {s.name!r} depends on unknown stage {d!r}")
+        self._keys: dict[str, str] = {}
+
+    def set_params(self, overrides: dict[str, dict]) -> None:
+        unknown = sorted(set(overrides) - set(self.stages))
+        if unknown:
+            raise ValueError(f"Unknown stage(s) {unknown}; stages: {list(self.stages)}")
+        for name, params in overrides.items():
+            self.stages[name].params.update(params)
+        self._keys = {}
+
+    # -------------------------
+    # clés / cache
+    # -------------------------
+    def key(self, name: str) -> str:
+        if name not in self._keys:
+            s = self.stages[name]
+            h = hashlib.sha256()
+            h.update(name.encode("utf-8"))
+            h.update(_code_hash(s).encode("utf-8"))
+            h.update(json.dumps(s.params, sort_keys=True, default=str).encode("utf-8"))
+            for d in s.deps:
+                h.update(self.key(d).encode("utf-8"))
+            for p in s.input_files:
+                _hash_file(Path(p), h)
+            self._keys[name] = h.hexdigest()[:20]
+        return self._keys[name]
+
+    def artifact_path(self, name: str) -> Path:
+        return self.cache_dir / f"{name}-{self.key(name)}.joblib"
+
+    def upstream(self, targets: list[str]) -> list[str]:
+        # ordre topologique des stages nécessaires aux cibles
+        order: list[str] = []
+        visiting: set[str] = set()
+
+        def visit(n: str) -> None:
+            if n in order:
+                return
+            if n in visiting:
+                raise ValueError(f"Cycle detected at stage {n!r}")
+            visiting.add(n)
+            for d in self.stages[n].deps:
+                visit(d)
+            visiting.discard(n)
+            order.append(n)
+
+        for t in targets:
+            visit(t)
+        return order
+
+    def plan(self, targets: list[str] | None = None) -> dict[str, bool]:
+        """{stage: True si à recalculer} pour les stages nécessaires aux cibles."""
+        targets = targets or list(self.stages)
+        return {n: not self.artifact_path(n).exists() for n in self.upstream(targets)}
+
+    # -------------------------
+    # exécution
+    # -------------------------
+    def run(self, targets: list[str] | None = None, n_jobs: int = 1, verbose: bool = True) -> dict:
+        targets = targets or [n for n in self.stages if not any(n in s.deps for s in self.stages.values())]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        todo = {n for n, stale in self.plan(targets).items() if stale}
+        done = set(self.upstream(targets)) - todo
+        if verbose:
+            for n in self.upstream(targets):
+                print(f"[pipeline] {n:<20} {'run' if n in todo else 'cached'}  {self.key(n)}")
+
+        def ready() -> list[str]:
+            return sorted(n for n in todo if all(d in done for d in self.stages[n].deps))
+
+        def submit_args(n: str) -> tuple:
+            s = self.stages[n]
+            deps = [str(self.artifact_path(d)) for d in s.deps]
+            return s.fn, deps, s.params, str(self.artifact_path(n))
+
+        if n_jobs == 1:
+            while todo:
+                for n in ready():
+                    _run_stage(*submit_args(n))
+                    todo.discard(n)
+                    done.add(n)
+                    if verbose:
+                        print(f"[pipeline] {n} done")
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+                running: dict = {}
+                while todo or running:
+                    for n in ready():
+                        if n not in running.values():
+                            running[ex.submit(_run_stage, *submit_args(n))] = n
+                    finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        n = running.pop(fut)
+                        fut.result()
+                        todo.discard(n)
+                        done.add(n)
+                        if verbose:
+                            print(f"[pipeline] {n} done")
+
+        return {t: joblib.load(self.artifact_path(t)) for t in targets}
+
+
+# -------------------------
+# stages du pipeline de trading
+# -------------------------
+def _stage_load(paths: list[str]) -> pd.DataFrame:
+    return load_m1_csv(paths)
+
+
+def _stage_aggregate(m1: pd.DataFrame) -> pd.DataFrame:
+    return aggregate_m15(m1)
+
+
+def _stage_clean(m15: pd.DataFrame) -> pd.DataFrame:
+    df, _ = clean_m15(m15, assume_sorted=True)
+    return df
+
+
+def _stage_features(m15: pd.DataFrame, backend: str, chunk_rows: int) -> pd.DataFrame:
+    return add_features_chunked(m15, chunk_rows=chunk_rows, n_jobs=1, backend=backend)
+
+
+def _stage_target(feat: pd.DataFrame, horizon: int) -> pd.DataFrame:
+    d = make_target(feat, horizon=horizon)
+    d["year"] = d["timestamp"].dt.year
+    return d
+
+
+def _split(df: pd.DataFrame, years: list[int]) -> pd.DataFrame:
+    return df[df["year"].isin(years)].reset_index(drop=True)
+
+
+def _stage_ml_train(df: pd.DataFrame, train_years: list[int], val_years: list[int]) -> tuple:
+    return train_compare_models(_split(df, train_years), _split(df, val_years))
+
+
+def _stage_ml_predict(
+    df: pd.DataFrame, trained: tuple, test_years: list[int],
+    threshold_long: float, threshold_short: float,
+) -> dict[str, np.ndarray]:
+    model, meta = trained
+    proba = predict_proba_up(_split(df, test_years), model, meta["features"]).values
+    return {"ML": positions_from_proba(proba, threshold_long, threshold_short)}
+
+
+def _stage_baselines(df: pd.DataFrame, test_years: list[int], seed: int) -> dict[str, np.ndarray]:
+    test = _split(df, test_years)
+    return {
+        "always_long": baseline_always_long(test).values,
+        "always_flat": baseline_always_flat(test).values,
+        "random": baseline_random(test, seed=seed).values,
+        "ema_rsi_rule": baseline_ema_rsi_rule(test).values,
+    }
+
+
+def _stage_rl_train(
+    df: pd.DataFrame, train_years: list[int], transaction_cost: float,
+    total_timesteps: int, seed: int,
+) -> dict:
+    from src.strategies.rl_train import train_ppo
+
+    # le modèle SB3 est sérialisé en bytes pour rester dans l'artefact
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        train_ppo(
+            _split(df, train_years).drop(columns=["year"]),
+            transaction_cost=transaction_cost,
+            out_dir=Path(tmp),
+            total_timesteps=total_timesteps,
+            seed=seed,
+        )
+        return {
+            "model_zip": (Path(tmp) / "ppo_model.zip").read_bytes(),
+            "meta": json.loads((Path(tmp) / "metadata.json").read_text(encoding="utf-8")),
+        }
+
+
+def _stage_rl_predict(df: pd.DataFrame, trained: dict, test_years: list[int]) -> dict[str, np.ndarray]:
+    import io
+    from stable_baselines3 import PPO
+    from src.strategies.rl_env import NormStats, TradingEnv
+
+    meta = trained["meta"]
+    test = _split(df, test_years)
+    norm = NormStats(mean=np.array(meta["norm_mean"]), std=np.array(meta["norm_std"]))
+    env = TradingEnv(df=test, feature_cols=meta["features"],
+                     transaction_cost=float(meta["transaction_cost"]), norm=norm)
+    model = PPO.load(io.BytesIO(trained["model_zip"]))
+
+    obs, _ = env.reset()
+    positions = []
+    done = False
+    while not done:
+        action, _ = model.predict(obs, deterministic=True)
+        obs, _, done, _, info = env.step(int(action))
+        positions.append(info["pos"])
+    # même alignement que scripts/run_eval_rl_2024.py, complété à flat
+    pos = np.zeros(len(test), dtype=int)
+    pos[:len(positions)] = positions
+    return {"RL_PPO": pos}
+
+
+def _stage_backtest(
+    df: pd.DataFrame, positions: dict[str, np.ndarray], test_years: list[int], transaction_cost: float,
+) -> BatchBacktest:
+    test = _split(df, test_years)
+    return backtest_batch(test["close_15m"].to_numpy(), positions, transaction_cost=transaction_cost)
+
+
+def _stage_metrics(bt: BatchBacktest) -> dict[str, dict]:
+    return summary_metrics_batch(bt).to_dict(orient="index")
+
+
+def _stage_compare(*metrics: dict[str, dict]) -> pd.DataFrame:
+    rows = []
+    for m in metrics:
+        for name, met in m.items():
+            rows.append({"strategy": name, **met})
+    return pd.DataFrame(rows).set_index("strategy").sort_values("final_equity", ascending=False)
+
+
+def build_trading_pipeline(
+    raw_paths: list[str | Path],
+    train_years: tuple[int, ...] = (2022,),
+    val_years: tuple[int, ...] = (2023,),
+    test_years: tuple[int, ...] = (2024,),
+    transaction_cost: float = 0.00005,
+    include_rl: bool = True,
+    cache_dir: str | Path = DEFAULT_CACHE,
+) -> Pipeline:
+    raw_paths = [Path(p) for p in raw_paths]
+    test = {"test_years": list(test_years)}
+    bt = {**test, "transaction_cost": transaction_cost}
+    S = Stage
+    stages = [
+        S("load", _stage_load, params={"paths": [str(p) for p in raw_paths]},
+          code=[src.data_import], input_files=raw_paths),
+        S("aggregate", _stage_aggregate, ["load"], code=[src.m15_agg]),
+        S("clean", _stage_clean, ["aggregate"], code=[src.cleaning]),
+        S("features", _stage_features, ["clean"], {"backend": "numpy", "chunk_rows": 50_000},
+          code=[src.features, src.feature_kernels, src.features_parallel]),
+        S("target", _stage_target, ["features"], {"horizon": 1}, code=[src.strategies.ml_train]),
+
+        S("baselines", _stage_baselines, ["target"], {**test, "seed": 42}, code=[src.strategies.baselines]),
+        S("baselines_backtest", _stage_backtest, ["target", "baselines"], bt, code=[src.strategies.backtest]),
+        S("baselines_metrics", _stage_metrics, ["baselines_backtest"], code=[src.strategies.metrics]),
+
+        S("ml_train", _stage_ml_train, ["target"],
+          {"train_years": list(train_years), "val_years": list(val_years)}, code=[src.strategies.ml_train]),
+        S("ml_predict", _stage_ml_predict, ["target", "ml_train"],
+          {**test, "threshold_long": 0.55, "threshold_short": 0.45}, code=[src.strategies.ml_infer]),
+        S("ml_backtest", _stage_backtest, ["target", "ml_predict"], bt, code=[src.strategies.backtest]),
+        S("ml_metrics", _stage_metrics, ["ml_backtest"], code=[src.strategies.metrics]),
+    ]
+    compare_deps = ["baselines_metrics", "ml_metrics"]
+
+    if include_rl:
+        # import tardif : stable-baselines3 / torch seulement si la branche RL est demandée
+        rl_code = [importlib.import_module("src.strategies.rl_env"),
+                   importlib.import_module("src.strategies.rl_train")]
+        stages += [
+            S("rl_train", _stage_rl_train, ["target"],
+              {"train_years": list(train_years), "transaction_cost": transaction_cost,
+               "total_timesteps": 50_000, "seed": 42}, code=rl_code),
+            S("rl_predict", _stage_rl_predict, ["target", "rl_train"], test, code=rl_code),
+            S("rl_backtest", _stage_backtest, ["target", "rl_predict"], bt, code=[src.strategies.backtest]),
+            S("rl_metrics", _stage_metrics, ["rl_backtest"], code=[src.strategies.metrics]),
+        ]
+        compare_deps.append("rl_metrics")
+
+    stages.append(S("compare", _stage_compare, compare_deps))
+    return Pipeline(stages, cache_dir=cache_dir)
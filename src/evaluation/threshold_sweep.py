@@ -0,0 +1,234 @@
+"""
+Balayage (seuil long, seuil short, coût de transaction) pour la règle ML :
+
+    pos = 1 si proba > seuil_long, -1 si proba < seuil_short, 0 sinon
+
+predict_proba_up est appelé une seule fois par l'appelant ; le balayage ne
+travaille que sur les tableaux proba / prix. Les couples de seuils sont
+répartis par blocs de `chunk_size` sur un process pool. Pour chaque couple,
+une seule passe sur les barres accumule, pour tous les coûts à la fois, ce
+qu'il faut pour les métriques : log-equity finale, drawdown en espace log,
+gains / pertes, sommes pour le Sharpe.
+
+Avec numba (dans requirements.txt) la passe est compilée et ne matérialise
+aucune matrice ; sinon repli numpy sur une matrice de positions (k, n) par
+bloc. Le backend utilisé est noté dans table.attrs["backend"].
+Les métriques sont celles de summary_metrics (à l'arrondi flottant près).
+"""
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
+PERIODS_PER_YEAR = 252 * 24 * 4
+METRIC_COLUMNS = ["final_equity", "max_drawdown", "sharpe", "profit_factor", "n_trades"]
+KEY_COLUMNS = ["threshold_long", "threshold_short", "transaction_cost"]
+
+# statistiques accumulées par (couple, coût)
+_S_LOG_EQ, _S_MIN_DD, _S_GAINS, _S_LOSSES, _S_SUM, _S_SUM2 = range(6)
+
+
+def _path_stats_numpy(proba, ret, pairs, costs):
+    k = len(pairs)
+    # positions (k, n) : même règle que ml_infer.positions_from_proba, vectorisée sur les seuils
+    pos = np.where(proba[None, :] > pairs[:, :1], 1, 0).astype(np.int8)
+    pos[proba[None, :] < pairs[:, 1:2]] = -1
+
+    trade = np.abs(np.diff(pos, axis=1)).astype(np.float64)   # barres 1..n-1
+    n_trades = (trade > 0).sum(axis=1)
+
+    # barres où strat_ret_net est défini (ret non NaN) ; la barre 0 ne l'est jamais
+    valid = ~np.isnan(ret[1:])
+    if valid.all():
+        gross = pos[:, :-1] * ret[1:]
+    else:
+        gross = pos[:, :-1][:, valid] * ret[1:][valid]
+        trade = trade[:, valid]
+
+    stats = np.zeros((k, len(costs), 6))
+    if gross.shape[1] == 0:
+        return stats, n_trades, 0
+
+    # buffers réutilisés d'un coût à l'autre
+    net = np.empty_like(gross)
+    cs = np.empty_like(gross)
+    tmp = np.empty_like(gross)
+    for j, c in enumerate(costs):
+        np.multiply(trade, c, out=net)
+        np.subtract(gross, net, out=net)
+        np.cumsum(net, axis=1, out=cs)
+        stats[:, j, _S_LOG_EQ] = cs[:, -1]
+        # eq / cummax(eq) - 1 = exp(cs - cummax(cs)) - 1
+        np.maximum.accumulate(cs, axis=1, out=tmp)
+        stats[:, j, _S_MIN_DD] = (cs - tmp).min(axis=1)
+        stats[:, j, _S_GAINS] = np.maximum(net, 0.0, out=tmp).sum(axis=1)
+        stats[:, j, _S_LOSSES] = -np.minimum(net, 0.0, out=tmp).sum(axis=1)
+        stats[:, j, _S_SUM] = net.sum(axis=1)
+        stats[:, j, _S_SUM2] = np.einsum("ij,ij->i", net, net)
+    return stats, n_trades, gross.shape[1]
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _path_stats_numba(proba, ret, pairs, costs):
+        k, m, n = len(pairs), len(costs), len(proba)
+        stats = np.zeros((k, m, 6))
+        n_trades = np.zeros(k, dtype=np.int64)
+        cs = np.zeros(m)
+        peak = np.empty(m)
+        cnt = 0
+        for i in range(k):
+            tl, ts = pairs[i, 0], pairs[i, 1]
+            cs[:] = 0.0
+            peak[:] = -np.inf
+            cnt = 0
+            prev = 0.0
+            for t in range(n):
+                p = proba[t]
+                pos = 0.0
+                if p > tl:
+                    pos = 1.0
+                if p < ts:
+                    pos = -1.0
+                tr = abs(pos - prev) if t > 0 else 0.0
+                if tr > 0:
+                    n_trades[i] += 1
+                r = ret[t]
+                if r == r:  # ret NaN -> barre ignorée (comme pandas)
+                    g = prev * r
+                    cnt += 1
+                    for j in range(m):
+                        net = g - costs[j] * tr
+                        cs[j] += net
+                        if cs[j] > peak[j]:
+                            peak[j] = cs[j]
+                        dd = cs[j] - peak[j]
+                        if dd < stats[i, j, 1]:
+                            stats[i, j, 1] = dd
+                        if net > 0:
+                            stats[i, j, 2] += net
+                        else:
+                            stats[i, j, 3] -= net
+                        stats[i, j, 4] += net
+                        stats[i, j, 5] += net * net
+                prev = pos
+            for j in range(m):
+                stats[i, j, 0] = cs[j]
+        return stats, n_trades, cnt
+
+
+def _sweep_chunk(args: tuple) -> np.ndarray:
+    proba, ret, pairs, costs, periods_per_year, use_numba = args
+    k, m = len(pairs), len(costs)
+    if use_numba:
+        stats, n_trades, cnt = _path_stats_numba(proba, ret, pairs, costs)
+    else:
+        stats, n_trades, cnt = _path_stats_numpy(proba, ret, pairs, costs)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        final_equity = np.exp(stats[..., _S_LOG_EQ]) if cnt else np.full((k, m), np.nan)
+        max_dd = np.expm1(stats[..., _S_MIN_DD]) if cnt else np.full((k, m), np.nan)
+        mean = stats[..., _S_SUM] / cnt
+        std = np.sqrt(np.maximum(stats[..., _S_SUM2] - cnt * mean * mean, 0.0) / (cnt - 1))
+        sharpe = np.where((cnt < 5) | (std == 0), 0.0, mean / std * np.sqrt(periods_per_year))
+        gains, losses = stats[..., _S_GAINS], stats[..., _S_LOSSES]
+        pf = np.where(losses == 0, np.where(gains > 0, np.inf, 0.0), gains / losses)
+
+    # lignes ordonnées (coût, couple)
+    return np.column_stack([
+        np.tile(pairs[:, 0], m),
+        np.tile(pairs[:, 1], m),
+        np.repeat(costs, k),
+        final_equity.T.ravel(),
+        max_dd.T.ravel(),
+        sharpe.T.ravel(),
+        pf.T.ravel(),
+        np.tile(n_trades, m),
+    ])
+
+
+def sweep_thresholds(
+    proba: np.ndarray | pd.Series,
+    price: np.ndarray | pd.Series,
+    thresholds_long,
+    thresholds_short,
+    transaction_costs=(0.00005,),
+    chunk_size: int = 64,
+    n_jobs: int | None = None,
+    periods_per_year: int = PERIODS_PER_YEAR,
+    use_numba: bool | None = None,
+) -> pd.DataFrame:
+    """
+    Une ligne par (seuil long, seuil short, coût) avec les colonnes de
+    summary_metrics. proba et price sont alignés et triés par timestamp.
+    table.attrs["backend"] : "numba" ou "numpy" (passe réellement exécutée).
+    """
+    proba = np.asarray(proba, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    if len(proba) != len(price):
+        raise ValueError(f"proba has {len(proba)} rows, price has {len(price)}")
+
+    ret = np.empty_like(price)
+    ret[:1] = np.nan
+    ret[1:] = np.diff(np.log(price))
+
+    tl, ts = np.meshgrid(np.asarray(thresholds_long, float), np.asarray(thresholds_short, float), indexing="ij")
+    pairs = np.column_stack([tl.ravel(), ts.ravel()])
+    costs = np.asarray(transaction_costs, dtype=np.float64)
+
+    use_numba = NUMBA_AVAILABLE if use_numba is None else (use_numba and NUMBA_AVAILABLE)
+    tasks = [
+        (proba, ret, pairs[i:i + chunk_size], costs, periods_per_year, use_numba)
+        for i in range(0, len(pairs), chunk_size)
+    ]
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(tasks) <= 1:
+        parts = [_sweep_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as ex:
+            parts = list(ex.map(_sweep_chunk, tasks))
+
+    table = pd.DataFrame(np.vstack(parts), columns=KEY_COLUMNS + METRIC_COLUMNS)
+    table["n_trades"] = table["n_trades"].astype(int)
+    table = table.sort_values(KEY_COLUMNS, ignore_index=True)
+    table.attrs["backend"] = "numba" if use_numba else "numpy"
+    return table
+
+
+def plot_sweep_heatmap(
+    table: pd.DataFrame,
+    metric: str = "sharpe",
+    transaction_cost: float | None = None,
+    path: str | Path | None = None,
+):
+    """Heatmap seuil long x seuil short d'une métrique, pour un coût donné."""
+    import matplotlib.pyplot as plt
+
+    if transaction_cost is None:
+        transaction_cost = float(table["transaction_cost"].min())
+    sub = table[np.isclose(table["transaction_cost"], transaction_cost)]
+    grid = sub.pivot(index="threshold_long", columns="threshold_short", values=metric)
+
+    fig, ax = plt.subplots(figsize=(7, 5.5))
+    im = ax.imshow(
+        grid.to_numpy(), origin="lower", aspect="auto", cmap="viridis",
+        extent=[grid.columns.min(), grid.columns.max(), grid.index.min(), grid.index.max()],
+    )
+    fig.colorbar(im, ax=ax, label=metric)
+    ax.set_xlabel("threshold_short")
+    ax.set_ylabel("threshold_long")
+    ax.set_title(f"ML threshold sweep — {metric} (cost={transaction_cost:g})")
+    fig.tight_layout()
+    if path is not None:
+        fig.savefig(path, dpi=150)
+        plt.close(fig)
+    return fig
@@ -0,0 +1,189 @@
+"""
+Walk-forward ML : une suite de folds (train -> val -> test) qui avancent dans
+le temps de `test_months` mois, c.-à-d. un réentraînement tous les
+`test_months` mois.
+
+    fenêtre rolling   : train = les `train_months` mois avant la validation
+    fenêtre expanding : train = tout l'historique avant la validation
+
+    [ train ][embargo][ val ][embargo][ test ]
+
+L'embargo retire les dernières barres du train et de la validation : leur
+cible regarde `horizon` barres en avant, donc dans le bloc suivant.
+
+Chaque fold réutilise train_compare_models (sélection sur la validation),
+predict_proba_up et la règle positions_from_proba. Les folds tournent dans un
+process pool ; les features sont écrites une fois en FeatureMatrix (float32)
+et ouvertes en mmap par chaque worker. Les prédictions hors échantillon sont
+recollées en une seule série, backtestée avec backtest_m15.
+"""
+from __future__ import annotations
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.feature_matrix import FeatureMatrix
+from src.strategies.backtest import backtest_m15
+from src.strategies.metrics import summary_metrics
+from src.strategies.ml_infer import positions_from_proba, predict_proba_up
+from src.strategies.ml_train import make_target, select_feature_cols, train_compare_models
+
+
+@dataclass
+class Fold:
+    index: int
+    train: tuple[int, int]   # [début, fin) en lignes
+    val: tuple[int, int]
+    test: tuple[int, int]
+    test_start: pd.Timestamp
+
+
+@dataclass
+class WalkForwardResult:
+    folds: pd.DataFrame        # une ligne par fold (périodes, modèle, métriques)
+    predictions: pd.DataFrame  # timestamp, close_15m, proba_up, position, fold
+    backtest: pd.DataFrame     # backtest_m15 sur la série recollée
+
+
+def make_folds(
+    timestamps: pd.Series | np.ndarray,
+    train_months: int = 12,
+    val_months: int = 3,
+    test_months: int = 1,
+    embargo_bars: int = 1,
+    window: str = "rolling",
+    first_test: str | pd.Timestamp | None = None,
+) -> list[Fold]:
+    """Folds en indices de lignes sur des timestamps triés."""
+    if window not in ("rolling", "expanding"):
+        raise ValueError(f"window must be 'rolling' or 'expanding', got {window!r}")
+    ts = pd.DatetimeIndex(timestamps)
+    if not ts.is_monotonic_increasing:
+        raise ValueError("timestamps must be sorted")
+    if len(ts) == 0:
+        return []
+
+    month0 = ts[0].to_period("M").to_timestamp()
+    if first_test is None:
+        first_test = month0 + pd.DateOffset(months=train_months + val_months)
+    test_start = pd.Timestamp(first_test).to_period("M").to_timestamp()
+
+    def row(t: pd.Timestamp) -> int:
+        return int(ts.searchsorted(t, side="left"))
+
+    folds = []
+    while test_start <= ts[-1]:
+        test_end = test_start + pd.DateOffset(months=test_months)
+        val_start = test_start - pd.DateOffset(months=val_months)
+        train_start = month0 if window == "expanding" else val_start - pd.DateOffset(months=train_months)
+
+        tr = (row(train_start), max(row(train_start), row(val_start) - embargo_bars))
+        va = (row(val_start), max(row(val_start), row(test_start) - embargo_bars))
+        te = (row(test_start), row(test_end))
+        if tr[1] > tr[0] and va[1] > va[0] and te[1] > te[0]:
+            folds.append(Fold(len(folds), tr, va, te, test_start))
+        test_start = test_end
+    return folds
+
+
+def _run_fold(args: tuple) -> dict:
+    fm_path, fold, threshold_long, threshold_short, n_jobs_model = args
+    fm = FeatureMatrix.open(fm_path)  # mmap : pages partagées entre workers
+
+    model, meta = train_compare_models(fm.rows(*fold.train), fm.rows(*fold.val), n_jobs=n_jobs_model)
+    test = fm.rows(*fold.test)
+    proba = predict_proba_up(test, model, meta["features"]).to_numpy()
+    y = np.asarray(test.y, dtype=int)
+    return {
+        "fold": fold.index,
+        "proba": proba,
+        "position": positions_from_proba(proba, threshold_long, threshold_short),
+        "model_name": meta["model_name"],
+        "val_f1": meta["val_f1"],
+        "test_accuracy": float(((proba > 0.5).astype(int) == y).mean()),
+    }
+
+
+def walk_forward(
+    df: pd.DataFrame,
+    train_months: int = 12,
+    val_months: int = 3,
+    test_months: int = 1,
+    embargo_bars: int | None = None,
+    window: str = "rolling",
+    first_test: str | pd.Timestamp | None = None,
+    horizon: int = 1,
+    threshold_long: float = 0.55,
+    threshold_short: float = 0.45,
+    transaction_cost: float = 0.00005,
+    n_jobs: int | None = None,
+    work_dir: str | Path | None = None,
+) -> WalkForwardResult:
+    """
+    df : features M15 sur tout l'historique (plusieurs années), sans cible.
+    embargo_bars : par défaut = horizon de la cible.
+    """
+    d = make_target(df, horizon=horizon)
+    feats = select_feature_cols(d)
+    folds = make_folds(
+        d["timestamp"], train_months, val_months, test_months,
+        horizon if embargo_bars is None else embargo_bars, window, first_test,
+    )
+    if not folds:
+        raise ValueError("No complete walk-forward fold in the data")
+
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(folds))
+    tmp = tempfile.TemporaryDirectory(dir=work_dir)
+    try:
+        fm_path = Path(tmp.name) / "features"
+        FeatureMatrix.from_frame(d, feats).save(fm_path)
+
+        # RF multi-thread seulement si les folds ne tournent pas déjà en parallèle
+        tasks = [(fm_path, f, threshold_long, threshold_short, -1 if n_jobs == 1 else 1) for f in folds]
+        if n_jobs == 1:
+            results = [_run_fold(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+                results = list(ex.map(_run_fold, tasks))
+    finally:
+        tmp.cleanup()
+
+    # série hors échantillon recollée (les tests se suivent sans recouvrement)
+    parts = []
+    for f, r in zip(folds, results):
+        sl = d.iloc[f.test[0]:f.test[1]]
+        parts.append(pd.DataFrame({
+            "timestamp": sl["timestamp"].to_numpy(),
+            "close_15m": sl["close_15m"].to_numpy(),
+            "proba_up": r["proba"],
+            "position": r["position"],
+            "fold": f.index,
+        }))
+    pred = pd.concat(parts, ignore_index=True)
+    bt = backtest_m15(pred, transaction_cost=transaction_cost)
+
+    rows = []
+    for f, r in zip(folds, results):
+        ts = d["timestamp"]
+        rows.append({
+            "fold": f.index,
+            "train_start": ts.iloc[f.train[0]],
+            "train_end": ts.iloc[f.train[1] - 1],
+            "val_start": ts.iloc[f.val[0]],
+            "val_end": ts.iloc[f.val[1] - 1],
+            "test_start": ts.iloc[f.test[0]],
+            "test_end": ts.iloc[f.test[1] - 1],
+            "n_train": f.train[1] - f.train[0],
+            "n_test": f.test[1] - f.test[0],
+            "model_name": r["model_name"],
+            "val_f1": r["val_f1"],
+            "test_accuracy": r["test_accuracy"],
+            # métriques du fold seul (equity repartant de 1.0)
+            **summary_metrics(backtest_m15(pred[pred["fold"] == f.index], transaction_cost=transaction_cost)),
+        })
+    return WalkForwardResult(folds=pd.DataFrame(rows), predictions=pred, backtest=bt)
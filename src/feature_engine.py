@@ -0,0 +1,349 @@
+from __future__ import annotations
+import json
+import math
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.features import FEATURE_COLS
+
+NAN = float("nan")
+
+
+class _Ewm:
+    """
+    EMA récursive identique à pandas `ewm(adjust=False, min_periods=...)`
+    (y = ((1-a)*y + a*x) / ((1-a) + a), démarrage à la première valeur non-NaN).
+    """
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = NAN
+        self.nobs = 0
+
+    def update(self, x: float) -> float:
+        if not math.isnan(x):
+            self.nobs += 1
+            if math.isnan(self.value):
+                self.value = x
+            else:
+                old = 1.0 - self.alpha
+                self.value = (old * self.value + self.alpha * x) / (old + self.alpha)
+        return self.value if self.nobs >= self.min_periods else NAN
+
+    def state(self) -> dict:
+        return {"value": self.value, "nobs": self.nobs}
+
+    def set_state(self, state: dict) -> None:
+        self.value = float(state["value"])
+        self.nobs = int(state["nobs"])
+
+
+def _span(window: int, min_periods: int | None = None) -> _Ewm:
+    return _Ewm(2.0 / (window + 1.0), window if min_periods is None else min_periods)
+
+
+class _RollingStd:
+    """
+    std échantillon (ddof=1) glissante en O(1) : sommes de x et x² mises à
+    jour à l'entrée / sortie de chaque valeur, NaN tant que la fenêtre n'est
+    pas pleine ou contient un NaN. Les sommes sont recalculées exactement
+    toutes les `window` mises à jour (coût amorti O(1)) pour que les erreurs
+    d'arrondi des soustractions ne s'accumulent pas sur un long flux.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: deque = deque(maxlen=window)
+        self.s1 = 0.0
+        self.s2 = 0.0
+        self.n_nan = 0
+        self.since_refresh = 0
+
+    def update(self, x: float) -> float:
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if math.isnan(old):
+                self.n_nan -= 1
+            else:
+                self.s1 -= old
+                self.s2 -= old * old
+        self.values.append(x)
+        if math.isnan(x):
+            self.n_nan += 1
+        else:
+            self.s1 += x
+            self.s2 += x * x
+
+        self.since_refresh += 1
+        if self.since_refresh >= self.window:
+            self._refresh()
+        if len(self.values) < self.window or self.n_nan:
+            return NAN
+        var = (self.s2 - self.s1 * self.s1 / self.window) / (self.window - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+    def _refresh(self) -> None:
+        finite = [v for v in self.values if not math.isnan(v)]
+        self.s1 = math.fsum(finite)
+        self.s2 = math.fsum(v * v for v in finite)
+        self.n_nan = len(self.values) - len(finite)
+        self.since_refresh = 0
+
+    def state(self) -> dict:
+        return {"values": list(self.values), "s1": self.s1, "s2": self.s2,
+                "n_nan": self.n_nan, "since_refresh": self.since_refresh}
+
+    def set_state(self, state: dict) -> None:
+        self.values.clear()
+        self.values.extend(float(v) for v in state["values"])
+        self.s1 = float(state["s1"])
+        self.s2 = float(state["s2"])
+        self.n_nan = int(state["n_nan"])
+        self.since_refresh = int(state["since_refresh"])
+
+
+class IncrementalFeatureEngine:
+    """
+    Version incrémentale de `src.features.add_features` : une bougie M15 à la
+    fois, en O(1), avec l'état des indicateurs (EMA, RSI/ATR/ADX de Wilder,
+    MACD, fenêtres glissantes) conservé entre deux appels.
+
+    update() renvoie un dict {timestamp, *FEATURE_COLS} ou None tant que le
+    warm-up n'est pas terminé (mêmes lignes que le dropna() de add_features).
+    L'état est sérialisable en JSON (to_state / from_state, save / load).
+    """
+
+    WINDOW = 14
+
+    def __init__(self):
+        n = self.WINDOW
+        self.t = 0  # nb de bougies vues
+        self.last_ts: pd.Timestamp | None = None
+        self.prev: dict | None = None  # open/high/low/close de la bougie précédente
+
+        self.ema_20 = _span(20)
+        self.ema_50 = _span(50)
+        self.ema_200 = _span(200)
+        self.ema_12 = _span(12)
+        self.ema_26 = _span(26)
+        self.macd_signal = _span(9)
+        self.rsi_up = _Ewm(1.0 / n, n)
+        self.rsi_dn = _Ewm(1.0 / n, n)
+
+        self.log_close = deque(maxlen=5)
+        self.ema50_hist = deque(maxlen=6)
+        self.std_20 = _RollingStd(20)
+        self.std_100 = _RollingStd(100)
+
+        # Wilder (ta) : ATR, et TR/+DM/-DM/DX pour l'ADX
+        self.tr_init: list[float] = []
+        self.atr = 0.0
+        self.trs = 0.0
+        self.dip = 0.0
+        self.din = 0.0
+        self.dx_init: list[float] = []
+        self.adx = 0.0
+
+    # -------------------------
+    # update
+    # -------------------------
+    def update(self, candle: dict | pd.Series) -> dict | None:
+        ts = pd.Timestamp(candle["timestamp"])
+        if self.last_ts is not None and ts <= self.last_ts:
+            raise ValueError(f"Candles must be strictly increasing: {ts} <= {self.last_ts}")
+
+        o = float(candle["open_15m"])
+        h = float(candle["high_15m"])
+        l = float(candle["low_15m"])
+        c = float(candle["close_15m"])
+        v = float(candle["volume_15m"])
+        n = self.WINDOW
+        t = self.t
+        prev = self.prev
+
+        out = {"timestamp": ts, "open_15m": o, "high_15m": h, "low_15m": l, "close_15m": c, "volume_15m": v}
+
+        # rendements
+        lc = math.log(c)
+        return_1 = lc - self.log_close[-1] if self.log_close else NAN
+        return_4 = lc - self.log_close[-4] if len(self.log_close) >= 4 else NAN
+        self.log_close.append(lc)
+        out["ret"] = return_1
+        out["return_1"] = return_1
+        out["return_4"] = return_4
+
+        # EMA / MACD
+        ema_20 = self.ema_20.update(c)
+        ema_50 = self.ema_50.update(c)
+        ema_200 = self.ema_200.update(c)
+        ema_12 = self.ema_12.update(c)
+        ema_26 = self.ema_26.update(c)
+        macd = ema_12 - ema_26
+        out["ema_20"] = ema_20
+        out["ema_50"] = ema_50
+        out["ema_diff"] = ema_20 - ema_50
+
+        # RSI (ewm alpha=1/n sur gains / pertes, diff NaN -> 0)
+        diff = c - prev["close"] if prev is not None else NAN
+        up = diff if diff > 0 else 0.0
+        dn = -diff if diff < 0 else 0.0
+        emaup = self.rsi_up.update(up)
+        emadn = self.rsi_dn.update(dn)
+        if emadn == 0:
+            out["rsi_14"] = 100.0
+        else:
+            out["rsi_14"] = 100.0 - 100.0 / (1.0 + emaup / emadn)
+
+        # volatilité
+        std_20 = self.std_20.update(return_1)
+        std_100 = self.std_100.update(return_1)
+        out["rolling_std_20"] = std_20
+        out["range_15m"] = h - l
+
+        out["body"] = abs(c - o)
+        out["upper_wick"] = h - max(o, c)
+        out["lower_wick"] = min(o, c) - l
+
+        out["ema_200"] = ema_200
+        out["distance_to_ema200"] = (c - ema_200) / (ema_200 + 1e-9)
+        self.ema50_hist.append(ema_50)
+        out["slope_ema50"] = ema_50 - self.ema50_hist[0] if len(self.ema50_hist) == 6 else NAN
+
+        # ATR (ta : 0 avant la fenêtre, moyenne simple puis lissage de Wilder)
+        if prev is None:
+            tr = h - l
+        else:
+            tr = max(h - l, abs(h - prev["close"]), abs(l - prev["close"]))
+        if t < n:
+            self.tr_init.append(tr)
+            if t == n - 1:
+                self.atr = float(np.mean(self.tr_init))
+                self.tr_init = []
+        else:
+            self.atr = (self.atr * (n - 1) + tr) / float(n)
+        out["atr_14"] = self.atr
+
+        out["rolling_std_100"] = std_100
+        out["volatility_ratio"] = std_20 / (std_100 + 1e-9)
+
+        out["adx_14"] = self._update_adx(h, l, prev)
+        out["macd"] = macd
+        out["macd_signal"] = self.macd_signal.update(macd)
+
+        self.prev = {"open": o, "high": h, "low": l, "close": c}
+        self.last_ts = ts
+        self.t += 1
+
+        if any(math.isnan(out[f]) for f in FEATURE_COLS):
+            return None
+        return out
+
+    def _update_adx(self, h: float, l: float, prev: dict | None) -> float:
+        # réplique ta.trend.ADXIndicator : sommes initiales sur les barres 1..n,
+        # lissage trs - trs/n + x, DX moyenné sur n puis lissé (0 pendant le warm-up)
+        n = self.WINDOW
+        t = self.t
+        if prev is None:
+            return 0.0
+
+        ddm = max(h, prev["close"]) - min(l, prev["close"])
+        diff_up = h - prev["high"]
+        diff_down = prev["low"] - l
+        pos = abs(diff_up) if (diff_up > diff_down and diff_up > 0) else 0.0
+        neg = abs(diff_down) if (diff_down > diff_up and diff_down > 0) else 0.0
+
+        if t <= n:
+            self.trs += ddm
+            self.dip += pos
+            self.din += neg
+            if t < n:
+                return 0.0
+        else:
+            self.trs = self.trs - self.trs / float(n) + ddm
+            self.dip = self.dip - self.dip / float(n) + pos
+            self.din = self.din - self.din / float(n) + neg
+
+        dip = 100.0 * (self.dip / self.trs) if self.trs != 0 else 0.0
+        din = 100.0 * (self.din / self.trs) if self.trs != 0 else 0.0
+        dx = 100.0 * abs((dip - din) / (dip + din)) if dip + din != 0 else 0.0
+
+        if t < 2 * n - 1:
+            self.dx_init.append(dx)
+            return 0.0
+        if t == 2 * n - 1:
+            self.dx_init.append(dx)
+            self.adx = float(np.mean(self.dx_init))
+            self.dx_init = []
+        else:
+            self.adx = (self.adx * (n - 1) + dx) / float(n)
+        return self.adx
+
+    def update_many(self, df: pd.DataFrame) -> pd.DataFrame:
+        # utile pour amorcer l'état à partir d'un historique M15 nettoyé
+        rows = []
+        for rec in df.sort_values("timestamp").to_dict("records"):
+            out = self.update(rec)
+            if out is not None:
+                rows.append(out)
+        return pd.DataFrame(rows, columns=["timestamp", *FEATURE_COLS])
+
+    @property
+    def ready(self) -> bool:
+        return self.t >= 200
+
+    # -------------------------
+    # état sérialisable
+    # -------------------------
+    _EWMS = ["ema_20", "ema_50", "ema_200", "ema_12", "ema_26", "macd_signal", "rsi_up", "rsi_dn"]
+    _BUFFERS = ["log_close", "ema50_hist"]
+    _ROLLING = {"std_20": "ret_20", "std_100": "ret_100"}  # nom -> ancien buffer (états antérieurs)
+    _SCALARS = ["atr", "trs", "dip", "din", "adx"]
+
+    def to_state(self) -> dict:
+        return {
+            "t": self.t,
+            "last_ts": None if self.last_ts is None else self.last_ts.isoformat(),
+            "prev": self.prev,
+            "ewm": {k: getattr(self, k).state() for k in self._EWMS},
+            "buffers": {k: list(getattr(self, k)) for k in self._BUFFERS},
+            "rolling": {k: getattr(self, k).state() for k in self._ROLLING},
+            "scalars": {k: getattr(self, k) for k in self._SCALARS},
+            "tr_init": self.tr_init,
+            "dx_init": self.dx_init,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "IncrementalFeatureEngine":
+        eng = cls()
+        eng.t = int(state["t"])
+        eng.last_ts = None if state["last_ts"] is None else pd.Timestamp(state["last_ts"])
+        eng.prev = state["prev"]
+        for k, s in state["ewm"].items():
+            getattr(eng, k).set_state(s)
+        for k, values in state["buffers"].items():
+            if k in cls._BUFFERS:
+                getattr(eng, k).extend(float(x) for x in values)
+        for k, old in cls._ROLLING.items():
+            roll = getattr(eng, k)
+            if k in state.get("rolling", {}):
+                roll.set_state(state["rolling"][k])
+            else:
+                # état sauvé avant les sommes glissantes : fenêtre seule, sommes recalculées
+                roll.values.extend(float(x) for x in state["buffers"][old])
+                roll._refresh()
+        for k, value in state["scalars"].items():
+            setattr(eng, k, float(value))
+        eng.tr_init = [float(x) for x in state["tr_init"]]
+        eng.dx_init = [float(x) for x in state["dx_init"]]
+        return eng
+
+    def save(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_state()), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> "IncrementalFeatureEngine":
+        return cls.from_state(json.loads(Path(path).read_text(encoding="utf-8")))
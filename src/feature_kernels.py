@@ -0,0 +1,195 @@
+"""
+Noyaux NumPy des indicateurs de `add_features` (backend="numpy").
+
+Les récurrences linéaires (EMA, lissages de Wilder) passent par
+scipy.signal.lfilter ; tout le reste est vectorisé. Les intermédiaires
+(log(close), true range, EMA) sont calculés une seule fois et partagés.
+Les formules reproduisent celles de `ta` (y compris les 0 de warm-up de
+l'ATR et de l'ADX) pour donner le même résultat que le backend "ta".
+"""
+from __future__ import annotations
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from src.profiling import stage
+
+
+def shift(x: np.ndarray, k: int) -> np.ndarray:
+    out = np.empty_like(x)
+    out[:k] = np.nan
+    out[k:] = x[:-k]
+    return out
+
+
+def diff(x: np.ndarray, k: int = 1) -> np.ndarray:
+    out = np.empty_like(x)
+    out[:k] = np.nan
+    np.subtract(x[k:], x[:-k], out=out[k:])
+    return out
+
+
+def _recursive_smooth(x: np.ndarray, decay: float, gain: float, y0: float) -> np.ndarray:
+    # y[0] = y0 ; y[i] = decay * y[i-1] + gain * x[i]
+    if len(x) == 0:
+        return x.copy()
+    y = np.empty_like(x)
+    y[0] = y0
+    if len(x) > 1:
+        y[1:] = lfilter([gain], [1.0, -decay], x[1:], zi=[decay * y0])[0]
+    return y
+
+
+def ewm_mean(x: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """pandas `ewm(alpha=..., adjust=False, min_periods=...).mean()` (NaN en tête tolérés)."""
+    out = np.full_like(x, np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) == 0:
+        return out
+    start = valid[0]
+    out[start:] = _recursive_smooth(x[start:], 1.0 - alpha, alpha, x[start])
+    out[start:start + min_periods - 1] = np.nan
+    return out
+
+
+def ema(x: np.ndarray, window: int) -> np.ndarray:
+    return ewm_mean(x, 2.0 / (window + 1.0), window)
+
+
+def rolling_std(x: np.ndarray, window: int, block_rows: int = 4_096) -> np.ndarray:
+    """
+    std échantillon glissante (ddof=1), NaN tant que la fenêtre contient un NaN.
+    Chaque fenêtre est calculée seule (deux passes) : la valeur ne dépend que
+    des `window` dernières barres, pas du début de la série, donc un calcul
+    par chunks (features_parallel) donne exactement le même résultat.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    win = sliding_window_view(x, window)
+    # par blocs : temporaires de block_rows x window au plus
+    for s in range(0, len(win), block_rows):
+        w = win[s:s + block_rows]
+        out[window - 1 + s:window - 1 + s + len(w)] = w.std(axis=1, ddof=1)
+    return out
+
+
+def true_range(high: np.ndarray, low: np.ndarray, prev_close: np.ndarray) -> np.ndarray:
+    # max(h, pc) - min(l, pc) == max(h-l, |h-pc|, |l-pc|) ; h-l sur la 1re barre
+    tr = np.fmax(high, prev_close) - np.fmin(low, prev_close)
+    return tr
+
+
+def rsi(close_diff: np.ndarray, window: int) -> np.ndarray:
+    up = np.where(close_diff > 0, close_diff, 0.0)
+    dn = np.where(close_diff < 0, -close_diff, 0.0)
+    emaup = ewm_mean(up, 1.0 / window, window)
+    emadn = ewm_mean(dn, 1.0 / window, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(emadn == 0, 100.0, 100.0 - 100.0 / (1.0 + emaup / emadn))
+
+
+def atr(tr: np.ndarray, window: int) -> np.ndarray:
+    out = np.zeros_like(tr)
+    if len(tr) < window:
+        return out
+    out[window - 1:] = _recursive_smooth(
+        tr[window - 1:], (window - 1) / window, 1.0 / window, tr[:window].mean()
+    )
+    return out
+
+
+def _wilder_sum(x: np.ndarray, window: int) -> np.ndarray:
+    # ta : somme initiale de x[1..n], puis s = s - s/n + x
+    out = np.zeros_like(x)
+    if len(x) <= window:
+        return out
+    out[window:] = _recursive_smooth(x[window:], 1.0 - 1.0 / window, 1.0, x[1:window + 1].sum())
+    return out
+
+
+def adx(high: np.ndarray, low: np.ndarray, tr: np.ndarray, window: int) -> np.ndarray:
+    n = len(high)
+    out = np.zeros(n)
+    if n < 2 * window:
+        return out
+
+    diff_up = diff(high)
+    diff_down = -diff(low)
+    pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+    neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+
+    trs = _wilder_sum(tr, window)
+    dip = _wilder_sum(pos, window)
+    din = _wilder_sum(neg, window)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        di_pos = np.where(trs != 0, 100.0 * dip / trs, 0.0)
+        di_neg = np.where(trs != 0, 100.0 * din / trs, 0.0)
+        tot = di_pos + di_neg
+        dx = np.where(tot != 0, 100.0 * np.abs((di_pos - di_neg) / tot), 0.0)
+
+    first = 2 * window - 1
+    out[first:] = _recursive_smooth(
+        dx[first:], (window - 1) / window, 1.0 / window, dx[window:first + 1].mean()
+    )
+    return out
+
+
+def compute_features(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """Toutes les colonnes calculées par add_features, en float64."""
+    log_close = np.log(close)
+    prev_close = shift(close, 1)
+    tr = true_range(high, low, prev_close)
+
+    f: dict[str, np.ndarray] = {}
+    n = len(close)
+    with stage("features.returns", n):
+        f["return_1"] = diff(log_close, 1)
+        f["return_4"] = diff(log_close, 4)
+
+    with stage("features.ema_20_50", n):
+        f["ema_20"] = ema(close, 20)
+        f["ema_50"] = ema(close, 50)
+        f["ema_diff"] = f["ema_20"] - f["ema_50"]
+
+    with stage("features.rsi_14", n):
+        f["rsi_14"] = rsi(close - prev_close, 14)
+
+    with stage("features.rolling_std_20", n):
+        f["rolling_std_20"] = rolling_std(f["return_1"], 20)
+
+    with stage("features.candle", n):
+        f["range_15m"] = high - low
+        f["body"] = np.abs(close - open_)
+        f["upper_wick"] = high - np.maximum(open_, close)
+        f["lower_wick"] = np.minimum(open_, close) - low
+
+    with stage("features.ema_200", n):
+        f["ema_200"] = ema(close, 200)
+        f["distance_to_ema200"] = (close - f["ema_200"]) / (f["ema_200"] + 1e-9)
+
+    with stage("features.slope_ema50", n):
+        f["slope_ema50"] = diff(f["ema_50"], 5)
+
+    with stage("features.atr_14", n):
+        f["atr_14"] = atr(tr, 14)
+
+    with stage("features.rolling_std_100", n):
+        f["rolling_std_100"] = rolling_std(f["return_1"], 100)
+        f["volatility_ratio"] = f["rolling_std_20"] / (f["rolling_std_100"] + 1e-9)
+
+    with stage("features.adx_14", n):
+        f["adx_14"] = adx(high, low, tr, 14)
+
+    with stage("features.macd", n):
+        macd = ema(close, 12) - ema(close, 26)
+        f["macd"] = macd
+        f["macd_signal"] = ewm_mean(macd, 2.0 / 10.0, 9)
+    return f
@@ -0,0 +1,96 @@
+"""
+Matrice de features compacte partagée par l'entraînement ML, l'inférence et
+l'environnement RL : un tableau float32 C-contigu + les noms de colonnes,
+avec en option la cible, le prix (float64, pour les rendements) et les
+timestamps.
+
+Sur disque c'est un dossier de .npy ouvert en mmap : plusieurs process
+(walk-forward, workers RL, ...) partagent les mêmes pages au lieu de garder
+chacun sa copie float64.
+"""
+from __future__ import annotations
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class FeatureMatrix:
+    X: np.ndarray                       # (n, k) float32, C-contigu
+    columns: list[str]
+    y: np.ndarray | None = None         # cible (int8)
+    price: np.ndarray | None = None     # prix de clôture float64
+    timestamp: np.ndarray | None = None # datetime64
+
+    def __len__(self) -> int:
+        return self.X.shape[0]
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        columns: list[str],
+        target_col: str | None = "target",
+        price_col: str | None = "close_15m",
+        dtype=np.float32,
+    ) -> "FeatureMatrix":
+        # une seule allocation (n, k) en float32, remplie colonne par colonne
+        X = np.empty((len(df), len(columns)), dtype=dtype)
+        for j, c in enumerate(columns):
+            X[:, j] = df[c].to_numpy()
+        return cls(
+            X=X,
+            columns=list(columns),
+            y=df[target_col].to_numpy(dtype=np.int8) if target_col and target_col in df.columns else None,
+            price=df[price_col].to_numpy(dtype=np.float64) if price_col and price_col in df.columns else None,
+            timestamp=df["timestamp"].to_numpy() if "timestamp" in df.columns else None,
+        )
+
+    def take(self, features: list[str]) -> np.ndarray:
+        """Sous-matrice dans l'ordre demandé ; sans copie si c'est déjà l'ordre stocké."""
+        if list(features) == self.columns:
+            return self.X
+        idx = [self.columns.index(f) for f in features]
+        return np.ascontiguousarray(self.X[:, idx])
+
+    def rows(self, start: int, stop: int) -> "FeatureMatrix":
+        # vue sur une plage de lignes (pas de copie, y compris en mmap)
+        sl = slice(start, stop)
+        return FeatureMatrix(
+            X=self.X[sl],
+            columns=self.columns,
+            y=None if self.y is None else self.y[sl],
+            price=None if self.price is None else self.price[sl],
+            timestamp=None if self.timestamp is None else self.timestamp[sl],
+        )
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "X.npy", np.ascontiguousarray(self.X))
+        for name in ("y", "price", "timestamp"):
+            arr = getattr(self, name)
+            if arr is not None:
+                np.save(path / f"{name}.npy", arr)
+        meta = {"columns": self.columns, "dtype": str(self.X.dtype), "n_rows": len(self)}
+        (path / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    @classmethod
+    def open(cls, path: str | Path, mmap_mode: str | None = "r") -> "FeatureMatrix":
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+
+        def _opt(name: str) -> np.ndarray | None:
+            p = path / f"{name}.npy"
+            return np.load(p, mmap_mode=mmap_mode) if p.exists() else None
+
+        return cls(
+            X=np.load(path / "X.npy", mmap_mode=mmap_mode),
+            columns=meta["columns"],
+            y=_opt("y"),
+            price=_opt("price"),
+            timestamp=_opt("timestamp"),
+        )
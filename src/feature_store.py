@@ -0,0 +1,247 @@
+"""
+Feature store M15 sur parquet, partitionné par année / mois :
+
+    data/processed/features/year=2024/month=03/part-0.parquet
+
+Un panel multi-symboles (colonne `symbol`) ajoute la paire comme premier
+niveau de partition :
+
+    data/processed/features/symbol=EURUSD/year=2024/month=03/part-0.parquet
+
+Chaque fichier est trié par timestamp et porte dans ses métadonnées parquet
+la version du feature set (hash) et le schéma des colonnes. La lecture
+projette les colonnes demandées, ne lit que les partitions du mois concerné
+et filtre sur timestamp au niveau des row groups ; le résultat est déjà trié.
+"""
+from __future__ import annotations
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_STORE = ROOT / "data" / "processed" / "features"
+
+VERSION_KEY = b"feature_set_version"
+SCHEMA_KEY = b"feature_schema"
+ROW_GROUP_SIZE = 1024  # ~10 jours de M15 par row group
+
+_CODE_FILES = [ROOT / "src" / "features.py", ROOT / "src" / "feature_kernels.py"]
+
+
+def feature_set_version(schema: dict[str, str]) -> str:
+    """Hash du schéma des colonnes + du code qui calcule les features."""
+    h = hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8"))
+    for p in _CODE_FILES:
+        if p.exists():
+            h.update(p.read_bytes().replace(b"\r\n", b"\n"))
+    return h.hexdigest()[:16]
+
+
+def _schema_of(table: pa.Table) -> dict[str, str]:
+    return {f.name: str(f.type) for f in table.schema}
+
+
+def _partition_dir(store: Path, year: int, month: int) -> Path:
+    return store / f"year={year:04d}" / f"month={month:02d}"
+
+
+def list_symbols(store: str | Path = DEFAULT_STORE) -> list[str]:
+    return sorted(p.name[7:] for p in Path(store).glob("symbol=*") if p.is_dir())
+
+
+def _symbol_roots(store: Path, symbols: list[str] | None) -> list[Path]:
+    # store mono-instrument (year=... à la racine) ou panel (symbol=.../year=...)
+    available = list_symbols(store)
+    if not available:
+        if symbols:
+            raise FileNotFoundError(f"No symbol partition under {store}")
+        return [store]
+    if symbols is None:
+        symbols = available
+    missing = sorted(set(symbols) - set(available))
+    if missing:
+        raise FileNotFoundError(f"Unknown symbol(s) {missing} under {store}")
+    return [store / f"symbol={sym}" for sym in sorted(symbols)]
+
+
+def _partitions(store: Path) -> list[tuple[int, int, Path]]:
+    out = []
+    for ydir in store.glob("year=*"):
+        for mdir in ydir.glob("month=*"):
+            f = mdir / "part-0.parquet"
+            if f.exists():
+                out.append((int(ydir.name[5:]), int(mdir.name[6:]), f))
+    return sorted(out)
+
+
+def write_features(
+    df: pd.DataFrame,
+    store: str | Path = DEFAULT_STORE,
+    append: bool = False,
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> list[Path]:
+    """
+    Écrit les features par partition (année, mois), précédées de symbol=...
+    si df a une colonne `symbol`.
+    append=False : les mois présents dans df sont remplacés.
+    append=True  : fusion avec la partition existante (dernier timestamp gagne).
+    """
+    store = Path(store)
+    if "symbol" in df.columns:
+        written = []
+        for sym, part in df.groupby("symbol", observed=True, sort=True):
+            # la colonne est conservée (en str) dans les fichiers
+            part = part.assign(symbol=part["symbol"].astype(str))
+            written += _write_months(part, store / f"symbol={sym}", append, row_group_size)
+        return written
+    return _write_months(df, store, append, row_group_size)
+
+
+def _write_months(
+    df: pd.DataFrame,
+    store: Path,
+    append: bool,
+    row_group_size: int,
+) -> list[Path]:
+    d = df if df["timestamp"].is_monotonic_increasing else df.sort_values("timestamp")
+    d = d.drop(columns=[c for c in ("year", "month") if c in d.columns])
+
+    ts = d["timestamp"]
+    keys = ts.dt.year * 100 + ts.dt.month
+    written = []
+    for key, part in d.groupby(keys.to_numpy(), sort=True):
+        year, month = divmod(int(key), 100)
+        path = _partition_dir(store, year, month) / "part-0.parquet"
+        if append and path.exists():
+            part = pd.concat([pd.read_parquet(path), part], ignore_index=True)
+            part = part.drop_duplicates(subset=["timestamp"], keep="last").sort_values("timestamp")
+
+        table = pa.Table.from_pandas(part.reset_index(drop=True), preserve_index=False)
+        schema = _schema_of(table)
+        meta = dict(table.schema.metadata or {})
+        meta[VERSION_KEY] = feature_set_version(schema).encode("utf-8")
+        meta[SCHEMA_KEY] = json.dumps(schema).encode("utf-8")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table.replace_schema_metadata(meta), path, row_group_size=row_group_size)
+        written.append(path)
+    return written
+
+
+def store_info(store: str | Path = DEFAULT_STORE, symbol: str | None = None) -> dict:
+    store = Path(store)
+    roots = _symbol_roots(store, None if symbol is None else [symbol])
+    parts = [p for root in roots for p in _partitions(root)]
+    if not parts:
+        raise FileNotFoundError(f"Feature store is empty: {store}")
+    meta = pq.read_schema(parts[-1][2]).metadata
+    info = {
+        "version": meta[VERSION_KEY].decode("utf-8"),
+        "schema": json.loads(meta[SCHEMA_KEY]),
+        "partitions": sorted({f"{y:04d}-{m:02d}" for y, m, _ in parts}),
+    }
+    symbols = list_symbols(store)
+    if symbols:
+        info["symbols"] = symbols if symbol is None else [symbol]
+    return info
+
+
+def read_features(
+    store: str | Path = DEFAULT_STORE,
+    columns: list[str] | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    version: str | None = None,
+    symbols: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Lit [start, end) avec projection de colonnes ; timestamp est toujours inclus.
+    Ex: read_features(columns=["rsi_14", "atr_14"], start="2023-03", end="2023-07")
+    version : si fournie, lève ValueError si une partition lue a une autre version.
+    symbols : sur un store panel, restreint aux paires données (toutes par défaut) ;
+    le résultat a alors une colonne `symbol` et est trié par (symbol, timestamp).
+    """
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+
+    store = Path(store)
+    roots = _symbol_roots(store, symbols)
+    panel = roots != [store]
+
+    files = []
+    for root in roots:
+        for year, month, path in _partitions(root):
+            month_start = pd.Timestamp(year=year, month=month, day=1)
+            if end is not None and month_start >= end:
+                continue
+            if start is not None and month_start + pd.offsets.MonthBegin(1) <= start:
+                continue
+            files.append(str(path))
+    if not files:
+        raise FileNotFoundError(f"No feature partition in [{start}, {end}) under {store}")
+
+    if version is not None:
+        for f in files:
+            found = pq.read_schema(f).metadata[VERSION_KEY].decode("utf-8")
+            if found != version:
+                raise ValueError(f"Feature set version mismatch in {f}: {found} != {version}")
+
+    dataset = ds.dataset(files, format="parquet")
+    if columns is not None:
+        keys = ["symbol", "timestamp"] if panel else ["timestamp"]
+        columns = [*keys, *[c for c in columns if c not in keys]]
+
+    filt = None
+    ts_type = dataset.schema.field("timestamp").type
+    if start is not None:
+        filt = ds.field("timestamp") >= pa.scalar(start, type=ts_type)
+    if end is not None:
+        cond = ds.field("timestamp") < pa.scalar(end, type=ts_type)
+        filt = cond if filt is None else filt & cond
+
+    df = dataset.to_table(columns=columns, filter=filt).to_pandas()
+    if panel:
+        # fichiers lus dans l'ordre (symbol, année, mois) : déjà trié
+        df["symbol"] = pd.Categorical(df["symbol"], categories=sorted(df["symbol"].unique()))
+        return df
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp").reset_index(drop=True)
+    return df
+
+
+def read_latest(
+    store: str | Path = DEFAULT_STORE,
+    columns: list[str] | None = None,
+    n: int = 1,
+    symbol: str | None = None,
+) -> pd.DataFrame:
+    """
+    Les n dernières lignes, en ne lisant que le dernier row group utile.
+    Sur un store panel, `symbol` est obligatoire.
+    """
+    store = Path(store)
+    roots = _symbol_roots(store, None if symbol is None else [symbol])
+    if len(roots) > 1:
+        raise ValueError(f"Panel feature store: pass symbol= (one of {list_symbols(store)})")
+    parts = _partitions(roots[0])
+    if not parts:
+        raise FileNotFoundError(f"Feature store is empty: {store}")
+    if columns is not None:
+        columns = ["timestamp", *[c for c in columns if c != "timestamp"]]
+
+    tables = []
+    rows = 0
+    for _, _, path in reversed(parts):
+        pf = pq.ParquetFile(path)
+        for rg in reversed(range(pf.num_row_groups)):
+            t = pf.read_row_group(rg, columns=columns)
+            tables.insert(0, t)
+            rows += t.num_rows
+            if rows >= n:
+                return pa.concat_tables(tables).to_pandas().iloc[-n:].reset_index(drop=True)
+    return pa.concat_tables(tables).to_pandas().reset_index(drop=True)
@@ -1,46 +1,265 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable
+
 import numpy as np
 import pandas as pd
 from ta.trend import EMAIndicator, MACD, ADXIndicator
 from ta.momentum import RSIIndicator
 from ta.volatility import AverageTrueRange
 
-def add_features(df: pd.DataFrame) -> pd.DataFrame:
+from src.feature_kernels import (
+    adx, atr, compute_features, diff, ema, ewm_mean, rolling_std, rsi, shift, true_range,
+)
+from src.profiling import profiled, stage
+
+# colonnes produites par add_features (ordre du parquet / des modèles)
+FEATURE_COLS = [
+    "open_15m", "high_15m", "low_15m", "close_15m", "volume_15m", "ret",
+    "return_1", "return_4", "ema_20", "ema_50", "ema_diff", "rsi_14",
+    "rolling_std_20", "range_15m", "body", "upper_wick", "lower_wick",
+    "ema_200", "distance_to_ema200", "slope_ema50", "atr_14",
+    "rolling_std_100", "volatility_ratio", "adx_14", "macd", "macd_signal",
+]
+
+
+# ---------------------------------------------------------------------------
+# Registre des features : graphe de dépendances calculé à la demande
+# ---------------------------------------------------------------------------
+
+# colonnes brutes lues dans le DataFrame d'entrée
+BASE_COLS = ("open_15m", "high_15m", "low_15m", "close_15m")
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    name: str
+    inputs: tuple[str, ...]   # colonnes de BASE_COLS ou autres features du registre
+    warmup: int               # lignes NaN en tête (dépendances comprises)
+    fn: Callable[..., np.ndarray]
+
+
+FEATURE_REGISTRY: dict[str, FeatureSpec] = {}
+
+
+def _register(name: str, inputs: tuple[str, ...], warmup: int, fn: Callable[..., np.ndarray]) -> None:
+    for i in inputs:
+        if i not in BASE_COLS and i not in FEATURE_REGISTRY:
+            raise ValueError(f"{name}: unknown input {i}")
+    FEATURE_REGISTRY[name] = FeatureSpec(name, inputs, warmup, fn)
+
+
+# intermédiaires partagés (préfixe "_" : jamais renvoyés)
+_register("_log_close", ("close_15m",), 0, np.log)
+_register("_prev_close", ("close_15m",), 1, lambda c: shift(c, 1))
+_register("_tr", ("high_15m", "low_15m", "_prev_close"), 0, true_range)
+
+_register("return_1", ("_log_close",), 1, lambda lc: diff(lc, 1))
+_register("return_4", ("_log_close",), 4, lambda lc: diff(lc, 4))
+_register("ema_20", ("close_15m",), 19, lambda c: ema(c, 20))
+_register("ema_50", ("close_15m",), 49, lambda c: ema(c, 50))
+_register("ema_diff", ("ema_20", "ema_50"), 49, np.subtract)
+# diff NaN de la 1re barre compté comme 0 (comme ta) : warm-up de l'EWM seul
+_register("rsi_14", ("close_15m", "_prev_close"), 13, lambda c, pc: rsi(c - pc, 14))
+_register("rolling_std_20", ("return_1",), 20, lambda r: rolling_std(r, 20))
+_register("range_15m", ("high_15m", "low_15m"), 0, np.subtract)
+_register("body", ("open_15m", "close_15m"), 0, lambda o, c: np.abs(c - o))
+_register("upper_wick", ("open_15m", "high_15m", "close_15m"), 0, lambda o, h, c: h - np.maximum(o, c))
+_register("lower_wick", ("open_15m", "low_15m", "close_15m"), 0, lambda o, lo, c: np.minimum(o, c) - lo)
+_register("ema_200", ("close_15m",), 199, lambda c: ema(c, 200))
+_register("distance_to_ema200", ("close_15m", "ema_200"), 199, lambda c, e: (c - e) / (e + 1e-9))
+_register("slope_ema50", ("ema_50",), 54, lambda e: diff(e, 5))
+# ATR / ADX : 0 (et non NaN) pendant le warm-up, comme ta
+_register("atr_14", ("_tr",), 0, lambda tr: atr(tr, 14))
+_register("rolling_std_100", ("return_1",), 100, lambda r: rolling_std(r, 100))
+_register("volatility_ratio", ("rolling_std_20", "rolling_std_100"), 100, lambda s20, s100: s20 / (s100 + 1e-9))
+_register("adx_14", ("high_15m", "low_15m", "_tr"), 0, lambda h, lo, tr: adx(h, lo, tr, 14))
+_register("macd", ("close_15m",), 25, lambda c: ema(c, 12) - ema(c, 26))
+_register("macd_signal", ("macd",), 33, lambda m: ewm_mean(m, 2.0 / 10.0, 9))
+
+
+def feature_dependencies(features: list[str]) -> list[str]:
+    """Features du registre à calculer pour `features`, dans l'ordre topologique."""
+    order: list[str] = []
+    seen: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in seen or name not in FEATURE_REGISTRY:
+            return
+        seen.add(name)
+        for i in FEATURE_REGISTRY[name].inputs:
+            visit(i)
+        order.append(name)
+
+    for f in features:
+        visit(f)
+    return order
+
+
+def required_warmup(features: list[str]) -> int:
+    """Lignes perdues en tête pour `features` (historique minimal avant la 1re ligne valide)."""
+    return max((FEATURE_REGISTRY[f].warmup for f in features if f in FEATURE_REGISTRY), default=0)
+
+
+def compute_feature_graph(df: pd.DataFrame, features: list[str]) -> dict[str, np.ndarray]:
+    """
+    Calcule uniquement `features` et leurs dépendances (noyaux NumPy, float64).
+    Les intermédiaires sont libérés dès que plus aucun nœud restant ne les lit.
+    """
+    order = feature_dependencies(features)
+    wanted = set(features)
+    last_use: dict[str, int] = {}
+    for k, name in enumerate(order):
+        for i in FEATURE_REGISTRY[name].inputs:
+            last_use[i] = k
+
+    n = len(df)
+    values: dict[str, np.ndarray] = {}
+    for k, name in enumerate(order):
+        spec = FEATURE_REGISTRY[name]
+        args = []
+        for i in spec.inputs:
+            if i not in values:
+                values[i] = df[i].to_numpy(dtype=np.float64)
+            args.append(values[i])
+        with stage(f"features.{name}", n):
+            values[name] = spec.fn(*args)
+        for i in spec.inputs:
+            if last_use[i] == k and i not in wanted:
+                del values[i]
+    return {f: values[f] for f in features if f in FEATURE_REGISTRY}
+
+
+def _add_selected_features(df: pd.DataFrame, features: list[str], dtype=None) -> pd.DataFrame:
+    unknown = [f for f in features if f not in FEATURE_REGISTRY and f not in df.columns]
+    if unknown:
+        raise KeyError(f"Unknown features (not in registry nor in input columns): {unknown}")
+
+    d = df if df["timestamp"].is_monotonic_increasing else df.sort_values("timestamp")
+    feats = compute_feature_graph(d, features)
+
+    # warm-up minimal : NaN des seules colonnes demandées
+    keep = np.ones(len(d), dtype=bool)
+    for f in features:
+        values = feats[f] if f in feats else d[f].to_numpy()
+        keep &= ~pd.isna(values)
+
+    out_dtype = np.float64 if dtype is None else dtype
+    out = d.drop(columns=[c for c in feats if c in d.columns]).loc[keep].reset_index(drop=True)
+    for k in list(feats):
+        out[k] = feats.pop(k)[keep].astype(out_dtype, copy=False)
+    if dtype is not None:
+        out = _cast_features(out, dtype)
+    return out
+
+@profiled()
+def add_features(
+    df: pd.DataFrame,
+    backend: str = "ta",
+    dtype=None,
+    features: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    backend="ta"    : indicateurs de la librairie ta (référence)
+    backend="numpy" : noyaux NumPy de src.feature_kernels (même résultat, plus rapide)
+    dtype=np.float32 : colonnes de features converties en float32 en sortie
+    features=[...]  : seulement ces colonnes (ex. meta["features"]) et leurs
+                      dépendances, via FEATURE_REGISTRY (noyaux NumPy quel que
+                      soit backend) ; seules les lignes de warm-up de ces
+                      colonnes sont retirées
+    """
+    if features is not None:
+        return _add_selected_features(df, list(features), dtype)
+    if backend == "numpy":
+        return _add_features_numpy(df, dtype)
+    if backend != "ta":
+        raise ValueError(f"Unknown feature backend: {backend}")
+
     d = df.sort_values("timestamp").copy()
 
     close = d["close_15m"]
     high  = d["high_15m"]
     low   = d["low_15m"]
     open_ = d["open_15m"]
+    n = len(d)
 
-    d["return_1"] = np.log(close).diff(1)
-    d["return_4"] = np.log(close).diff(4)
+    with stage("features.returns", n):
+        d["return_1"] = np.log(close).diff(1)
+        d["return_4"] = np.log(close).diff(4)
 
-    d["ema_20"] = EMAIndicator(close, window=20).ema_indicator()
-    d["ema_50"] = EMAIndicator(close, window=50).ema_indicator()
-    d["ema_diff"] = d["ema_20"] - d["ema_50"]
+    with stage("features.ema_20_50", n):
+        d["ema_20"] = EMAIndicator(close, window=20).ema_indicator()
+        d["ema_50"] = EMAIndicator(close, window=50).ema_indicator()
+        d["ema_diff"] = d["ema_20"] - d["ema_50"]
 
-    d["rsi_14"] = RSIIndicator(close, window=14).rsi()
+    with stage("features.rsi_14", n):
+        d["rsi_14"] = RSIIndicator(close, window=14).rsi()
 
-    d["rolling_std_20"] = d["return_1"].rolling(20).std()
-    d["range_15m"] = high - low
+    with stage("features.rolling_std_20", n):
+        d["rolling_std_20"] = d["return_1"].rolling(20).std()
 
-    d["body"] = (close - open_).abs()
-    d["upper_wick"] = high - np.maximum(open_, close)
-    d["lower_wick"] = np.minimum(open_, close) - low
+    with stage("features.candle", n):
+        d["range_15m"] = high - low
+        d["body"] = (close - open_).abs()
+        d["upper_wick"] = high - np.maximum(open_, close)
+        d["lower_wick"] = np.minimum(open_, close) - low
 
-    d["ema_200"] = EMAIndicator(close, window=200).ema_indicator()
-    d["distance_to_ema200"] = (close - d["ema_200"]) / (d["ema_200"] + 1e-9)
-    d["slope_ema50"] = d["ema_50"].diff(5)
+    with stage("features.ema_200", n):
+        d["ema_200"] = EMAIndicator(close, window=200).ema_indicator()
+        d["distance_to_ema200"] = (close - d["ema_200"]) / (d["ema_200"] + 1e-9)
 
-    d["atr_14"] = AverageTrueRange(high, low, close, window=14).average_true_range()
-    d["rolling_std_100"] = d["return_1"].rolling(100).std()
-    d["volatility_ratio"] = d["rolling_std_20"] / (d["rolling_std_100"] + 1e-9)
+    with stage("features.slope_ema50", n):
+        d["slope_ema50"] = d["ema_50"].diff(5)
 
-    d["adx_14"] = ADXIndicator(high, low, close, window=14).adx()
-    macd = MACD(close)
-    d["macd"] = macd.macd()
-    d["macd_signal"] = macd.macd_signal()
+    with stage("features.atr_14", n):
+        d["atr_14"] = AverageTrueRange(high, low, close, window=14).average_true_range()
+
+    with stage("features.rolling_std_100", n):
+        d["rolling_std_100"] = d["return_1"].rolling(100).std()
+        d["volatility_ratio"] = d["rolling_std_20"] / (d["rolling_std_100"] + 1e-9)
+
+    with stage("features.adx_14", n):
+        d["adx_14"] = ADXIndicator(high, low, close, window=14).adx()
+
+    with stage("features.macd", n):
+        macd = MACD(close)
+        d["macd"] = macd.macd()
+        d["macd_signal"] = macd.macd_signal()
 
     # warm-up (ema200 etc.)
-    d = d.dropna().reset_index(drop=True)
+    with stage("features.dropna", n):
+        d = d.dropna().reset_index(drop=True)
+    if dtype is not None:
+        d = _cast_features(d, dtype)
     return d
+
+
+def _cast_features(d: pd.DataFrame, dtype) -> pd.DataFrame:
+    cols = [c for c in FEATURE_COLS if c in d.columns]
+    return d.astype({c: dtype for c in cols})
+
+
+def _add_features_numpy(df: pd.DataFrame, dtype=None) -> pd.DataFrame:
+    d = df if df["timestamp"].is_monotonic_increasing else df.sort_values("timestamp")
+
+    feats = compute_features(
+        d["open_15m"].to_numpy(dtype=np.float64),
+        d["high_15m"].to_numpy(dtype=np.float64),
+        d["low_15m"].to_numpy(dtype=np.float64),
+        d["close_15m"].to_numpy(dtype=np.float64),
+    )
+
+    # warm-up : mêmes lignes que le dropna() du backend ta
+    d = d.drop(columns=[c for c in feats if c in d.columns])
+    keep = ~d.isna().any(axis=1).to_numpy()
+    for values in feats.values():
+        keep &= ~np.isnan(values)
+
+    out_dtype = np.float64 if dtype is None else dtype
+    out = d.loc[keep].reset_index(drop=True)
+    for k in list(feats):
+        # pop : chaque tableau pleine longueur est libéré dès qu'il est filtré
+        out[k] = feats.pop(k)[keep].astype(out_dtype, copy=False)
+    if dtype is not None:
+        out = _cast_features(out, dtype)
+    return out
@@ -0,0 +1,73 @@
+"""
+Calcul des features par chunks en parallèle (process pool).
+
+Chaque chunk est calculé avec un "halo" : les `halo` bougies qui le précèdent
+servent de warm-up puis sont retirées. Les indicateurs récursifs (EMA, Wilder)
+ont une mémoire qui décroît en (1 - alpha)^halo ; avec le halo par défaut
+(EMA200 : (1 - 2/201)^6000 ~ 1e-26, bien sous l'ulp) la récurrence retombe
+sur les mêmes flottants que la passe séquentielle, et les fenêtres
+glissantes ne dépendent que de leurs propres barres (feature_kernels).
+Résultat, pour halo >= DEFAULT_HALO :
+- backend="numpy" ou features=[...] : identique bit à bit à add_features ;
+- backend="ta" : rolling_std_* / volatility_ratio viennent de pandas
+  rolling().std(), dont l'algorithme en ligne accumule les arrondis depuis
+  le début de la série : écart relatif ~1e-11 (mesuré 7e-12), le reste est
+  identique.
+Seul le tout premier chunk perd son warm-up, comme add_features sur
+l'historique complet : plus de trous aux frontières d'années.
+"""
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.features import add_features
+
+DEFAULT_HALO = 6000
+MIN_HALO = 200  # warm-up de l'EMA200 (dropna de add_features)
+
+
+def _run_chunk(args: tuple[pd.DataFrame, pd.Timestamp | None, str, object, list[str] | None]) -> pd.DataFrame:
+    sub, first_ts, backend, dtype, features = args
+    out = add_features(sub, backend=backend, dtype=dtype, features=features)
+    if first_ts is not None:
+        out = out[out["timestamp"] >= first_ts]
+    return out
+
+
+def add_features_chunked(
+    df: pd.DataFrame,
+    chunk_rows: int = 50_000,
+    halo: int = DEFAULT_HALO,
+    n_jobs: int | None = None,
+    backend: str = "ta",
+    dtype=None,
+    features: list[str] | None = None,
+) -> pd.DataFrame:
+    """Équivalent de add_features(df) sur tout l'historique, calculé par chunks."""
+    if halo < MIN_HALO:
+        raise ValueError(f"halo must be >= {MIN_HALO} (EMA200 warm-up), got {halo}")
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be > 0")
+
+    d = df if df["timestamp"].is_monotonic_increasing else df.sort_values("timestamp")
+    d = d.reset_index(drop=True)
+
+    tasks = []
+    for start in range(0, len(d), chunk_rows):
+        end = min(start + chunk_rows, len(d))
+        lo = max(0, start - halo)
+        first_ts = None if start == 0 else d["timestamp"].iloc[start]
+        tasks.append((d.iloc[lo:end], first_ts, backend, dtype, features))
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(tasks) <= 1:
+        parts = [_run_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as ex:
+            parts = list(ex.map(_run_chunk, tasks))
+
+    if not parts:
+        return add_features(d, backend=backend, dtype=dtype, features=features)
+    return pd.concat(parts, ignore_index=True)
@@ -1,24 +1,203 @@
-import pandas as pd
-
-def aggregate_m15(df_m1: pd.DataFrame) -> pd.DataFrame:
-    df = df_m1.copy()
-
-    # supprimer doublons timestamp
-    df = df.drop_duplicates(subset=["timestamp"], keep="last")
-
-    # mettre index temporel
-    df = df.sort_values("timestamp").set_index("timestamp")
-
-    # agrégation 15 minutes
-    m15 = df.resample("15min").agg(
-        open_15m=("open", "first"),
-        high_15m=("high", "max"),
-        low_15m=("low", "min"),
-        close_15m=("close", "last"),
-        volume_15m=("volume", "sum"),
-    )
-
-    # supprimer bougies incomplètes
-    m15 = m15.dropna().reset_index()
-
-    return m15
+from __future__ import annotations
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data_import import sort_panel, symbol_codes
+from src.profiling import profiled
+
+M15_FREQ = "15min"
+M15_COLUMNS = ["timestamp", "open_15m", "high_15m", "low_15m", "close_15m", "volume_15m"]
+_M1_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+_STATE_KEY = b"m15_agg_state"
+
+
+_AGG_SPEC = dict(
+    open_15m=("open", "first"),
+    high_15m=("high", "max"),
+    low_15m=("low", "min"),
+    close_15m=("close", "last"),
+    volume_15m=("volume", "sum"),
+)
+
+
+@profiled()
+def aggregate_m15(df_m1: pd.DataFrame) -> pd.DataFrame:
+    if "symbol" in df_m1.columns:
+        return _aggregate_m15_panel(df_m1)
+
+    df = df_m1.copy()
+
+    # supprimer doublons timestamp
+    df = df.drop_duplicates(subset=["timestamp"], keep="last")
+
+    # mettre index temporel
+    df = df.sort_values("timestamp").set_index("timestamp")
+
+    # agrégation 15 minutes
+    m15 = df.resample(M15_FREQ).agg(**_AGG_SPEC)
+
+    # supprimer bougies incomplètes
+    m15 = m15.dropna().reset_index()
+
+    return m15
+
+
+def _aggregate_m15_panel(df_m1: pd.DataFrame) -> pd.DataFrame:
+    """
+    Panel multi-symboles : un seul groupby (symbol, bucket 15 min) pour toutes
+    les paires, au lieu d'un resample par paire. Même résultat que
+    aggregate_m15() appliqué symbole par symbole (les buckets vides, que
+    resample supprime via dropna, n'existent simplement pas ici).
+    """
+    cols = ["open", "high", "low", "close", "volume"]
+    if len(df_m1) == 0 or df_m1[cols].isna().to_numpy().any():
+        # les agrégats pandas ignorent les NaN : on garde leur sémantique
+        df = sort_panel(df_m1.drop_duplicates(subset=["symbol", "timestamp"], keep="last"))
+        bucket = df["timestamp"].dt.floor(M15_FREQ)
+        m15 = df.groupby([df["symbol"], bucket], observed=True, sort=True).agg(**_AGG_SPEC)
+        return m15.dropna().reset_index()
+
+    # tri stable par (symbol, timestamp) : les doublons deviennent adjacents
+    # (on garde le dernier, comme drop_duplicates) et chaque bougie est un
+    # segment contigu -> réductions numpy par segment
+    df = sort_panel(df_m1)
+    ts = df["timestamp"].to_numpy()
+    unit = np.datetime_data(ts.dtype)[0]
+    t = ts.view(np.int64)
+    codes = symbol_codes(df).astype(np.int64)
+    keep = np.r_[(t[1:] != t[:-1]) | (codes[1:] != codes[:-1]), True]
+
+    t, codes = t[keep], codes[keep]
+    step = pd.Timedelta(M15_FREQ) // pd.Timedelta(1, unit=unit)
+    bucket = t - t % step
+    starts = np.flatnonzero(np.r_[True, (bucket[1:] != bucket[:-1]) | (codes[1:] != codes[:-1])])
+    ends = np.r_[starts[1:], len(t)] - 1
+
+    o, h, l, c, v = (df[col].to_numpy()[keep] for col in cols)
+    sym = df["symbol"].iloc[np.flatnonzero(keep)[starts]].reset_index(drop=True)
+    if not isinstance(sym.dtype, pd.CategoricalDtype):
+        sym = sym.astype("category")
+    return pd.DataFrame({
+        "symbol": sym,
+        "timestamp": bucket[starts].view(ts.dtype),
+        "open_15m": o[starts],
+        "high_15m": np.maximum.reduceat(h, starts),
+        "low_15m": np.minimum.reduceat(l, starts),
+        "close_15m": c[ends],
+        "volume_15m": np.add.reduceat(v, starts),
+    })
+
+
+def checkpoint_path(parquet_path: str | Path) -> Path:
+    # checkpoint rangé à côté du parquet M15 (ex: m15_2024.parquet -> m15_2024.agg_state.parquet)
+    parquet_path = Path(parquet_path)
+    return parquet_path.with_name(f"{parquet_path.stem}.agg_state.parquet")
+
+
+class IncrementalM15Aggregator:
+    """
+    Agrégation M1 -> M15 incrémentale.
+
+    L'état ne contient que les barres M1 du bucket 15 min en cours et celles
+    de la fenêtre `allowed_lateness` : le coût d'un update dépend du nombre
+    de nouvelles barres, pas de la longueur de l'historique.
+
+    update() renvoie les bougies complétées. Une barre en retard (ou un doublon)
+    qui tombe dans un bucket déjà émis mais encore dans la fenêtre produit une
+    révision de cette bougie (même timestamp, à appliquer en keep="last").
+    Les barres plus anciennes que la fenêtre sont ignorées et comptées dans
+    `n_late_dropped`. Sous cette contrainte, concaténer les sorties de update()
+    puis flush() donne exactement aggregate_m15() sur toutes les barres.
+    """
+
+    def __init__(self, allowed_lateness: str | pd.Timedelta = "1h"):
+        self.allowed_lateness = pd.Timedelta(allowed_lateness)
+        self.bars: pd.DataFrame | None = None
+        self.open_bucket: pd.Timestamp | None = None
+        self.n_late_dropped = 0
+
+    def _retention_floor(self) -> pd.Timestamp | None:
+        if self.open_bucket is None:
+            return None
+        return (self.open_bucket - self.allowed_lateness).floor(M15_FREQ)
+
+    def update(self, df_m1: pd.DataFrame) -> pd.DataFrame:
+        new = df_m1[_M1_COLUMNS]
+        if self.bars is None:
+            self.bars = new.iloc[:0]
+        if len(new) == 0:
+            return self._empty()
+
+        floor = self._retention_floor()
+        if floor is not None:
+            too_late = new["timestamp"] < floor
+            self.n_late_dropped += int(too_late.sum())
+            new = new[~too_late]
+            if len(new) == 0:
+                return self._empty()
+
+        prev_open = self.open_bucket
+        touched = new["timestamp"].dt.floor(M15_FREQ).unique()
+
+        bars = pd.concat([self.bars, new], ignore_index=True)
+        bars = bars.drop_duplicates(subset=["timestamp"], keep="last")
+        bars = bars.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+        self.open_bucket = bars["timestamp"].iloc[-1].floor(M15_FREQ)
+        bucket = bars["timestamp"].dt.floor(M15_FREQ)
+
+        emit = bucket < self.open_bucket
+        if prev_open is not None:
+            emit &= (bucket >= prev_open) | bucket.isin(touched)
+        out = self._aggregate(bars[emit.values])
+
+        keep_from = self._retention_floor()
+        self.bars = bars[(bucket >= keep_from).values].reset_index(drop=True)
+        return out
+
+    def flush(self) -> pd.DataFrame:
+        # bougie du bucket en cours (incomplète), comme la dernière ligne du batch
+        if self.bars is None:
+            return pd.DataFrame(columns=M15_COLUMNS)
+        bucket = self.bars["timestamp"].dt.floor(M15_FREQ)
+        return self._aggregate(self.bars[(bucket == self.open_bucket).values])
+
+    def _aggregate(self, bars: pd.DataFrame) -> pd.DataFrame:
+        # même spec que aggregate_m15 : les deux chemins ne peuvent pas diverger
+        bucket = bars["timestamp"].dt.floor(M15_FREQ).rename("timestamp")
+        m15 = bars.groupby(bucket, sort=True).agg(**_AGG_SPEC)
+        return m15.dropna().reset_index()
+
+    def _empty(self) -> pd.DataFrame:
+        return self._aggregate(self.bars.iloc[:0])
+
+    # -------------------------
+    # checkpoint
+    # -------------------------
+    def save(self, path: str | Path) -> None:
+        if self.bars is None:
+            raise ValueError("Nothing to checkpoint: no M1 bars seen yet.")
+        state = {
+            "allowed_lateness": str(self.allowed_lateness),
+            "open_bucket": None if self.open_bucket is None else self.open_bucket.isoformat(),
+            "n_late_dropped": self.n_late_dropped,
+        }
+        table = pa.Table.from_pandas(self.bars, preserve_index=False)
+        meta = dict(table.schema.metadata or {})
+        meta[_STATE_KEY] = json.dumps(state).encode("utf-8")
+        pq.write_table(table.replace_schema_metadata(meta), path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "IncrementalM15Aggregator":
+        table = pq.read_table(path)
+        state = json.loads(table.schema.metadata[_STATE_KEY])
+        agg = cls(allowed_lateness=state["allowed_lateness"])
+        agg.bars = table.to_pandas()
+        agg.open_bucket = None if state["open_bucket"] is None else pd.Timestamp(state["open_bucket"])
+        agg.n_late_dropped = int(state["n_late_dropped"])
+        return agg
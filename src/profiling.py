@@ -0,0 +1,255 @@
+"""
+Instrumentation optionnelle des étapes du pipeline (chargement, agrégation,
+nettoyage, features et chaque indicateur, entraînement ML / RL).
+
+Désactivée par défaut : `stage()` renvoie alors un contexte vide partagé et
+`@profiled` appelle directement la fonction, le coût se limite à un test
+de booléen. Activée, chaque étape produit un événement :
+
+    name, pid, tid, depth, parent, ts_us, wall_s, cpu_s,
+    rss_peak_mb (plus haut RSS du process en fin d'étape), rss_peak_delta_mb,
+    rows_in, rows_out, alloc_peak_mb / alloc_net_mb (si trace_memory=True)
+
+Sorties : JSON lines (un événement par ligne) et trace Chrome
+(chrome://tracing ou https://ui.perfetto.dev).
+
+    from src import profiling
+    with profiling.session("reports/profile", trace_memory=True):
+        m15 = aggregate_m15(load_m1_csv(paths))
+
+Ou sans toucher au code : FX_PROFILE_DIR=reports/profile python -m scripts...
+(chaque process, workers compris, écrit trace-<pid>.jsonl / .json à la sortie).
+"""
+from __future__ import annotations
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENV_VAR = "FX_PROFILE_DIR"
+
+_enabled = False
+_trace_memory = False
+_events: list[dict] = []
+_local = threading.local()
+
+
+def _rss_peak_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss : Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rows(obj) -> int | None:
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    shape = getattr(obj, "shape", None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+class _NullStage:
+    # contexte partagé quand le profilage est coupé : aucune mesure, aucune allocation
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "rows_in", "rows_out", "_start", "_cpu", "_rss", "_mem", "_peak", "_parent")
+
+    def __init__(self, name: str, rows_in: int | None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self._parent = stack[-1] if stack else None
+        if _trace_memory and tracemalloc.is_tracing():
+            cur, peak = tracemalloc.get_traced_memory()
+            if self._parent is not None:
+                # le pic du parent ne doit pas être perdu par reset_peak()
+                self._parent._peak = max(self._parent._peak, peak)
+            tracemalloc.reset_peak()
+            self._mem, self._peak = cur, cur
+        else:
+            self._mem = None
+        stack.append(self)
+        self._rss = _rss_peak_mb()
+        self._cpu = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._start
+        cpu = time.process_time() - self._cpu
+        _local.stack.pop()
+        rss = _rss_peak_mb()
+        ev = {
+            "name": self.name,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "depth": len(_local.stack),
+            "parent": self._parent.name if self._parent is not None else None,
+            "ts_us": int((time.time() - wall) * 1e6),
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "rss_peak_mb": rss,
+            "rss_peak_delta_mb": None if rss is None else rss - self._rss,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+        }
+        if self._mem is not None and tracemalloc.is_tracing():
+            cur, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._peak)
+            ev["alloc_peak_mb"] = (peak - self._mem) / 1e6
+            ev["alloc_net_mb"] = (cur - self._mem) / 1e6
+            if self._parent is not None:
+                self._parent._peak = max(self._parent._peak, peak)
+        _events.append(ev)
+        return False
+
+
+def stage(name: str, rows_in: int | None = None):
+    """Contexte mesurant un bloc ; `rows_out` peut être renseigné dans le bloc."""
+    if not _enabled:
+        return _NULL
+    return _Stage(name, rows_in)
+
+
+def profiled(name: str | None = None):
+    """
+    Décorateur : mesure chaque appel, rows_in = lignes du 1er argument,
+    rows_out = lignes du résultat (ou de son 1er élément si tuple).
+    """
+    def deco(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Stage(label, _rows(args[0]) if args else None) as st:
+                out = fn(*args, **kwargs)
+                st.rows_out = _rows(out)
+            return out
+        return wrapper
+    return deco
+
+
+def enable(trace_memory: bool = False) -> None:
+    """trace_memory=True démarre tracemalloc (mesure des allocations, coûteux)."""
+    global _enabled, _trace_memory
+    _enabled = True
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    global _enabled, _trace_memory
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _enabled = False
+    _trace_memory = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def events() -> list[dict]:
+    return list(_events)
+
+
+def reset() -> None:
+    _events.clear()
+
+
+def write_jsonl(path: str | Path, evs: list[dict] | None = None) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for ev in _events if evs is None else evs:
+            f.write(json.dumps(ev) + "\n")
+
+
+def write_chrome_trace(path: str | Path, evs: list[dict] | None = None) -> None:
+    """Événements "complets" (ph = X) du format Trace Event de Chrome."""
+    trace = []
+    for ev in _events if evs is None else evs:
+        args = {k: v for k, v in ev.items() if k not in ("name", "pid", "tid", "ts_us", "wall_s") and v is not None}
+        trace.append({
+            "name": ev["name"],
+            "cat": ev["name"].split(".", 1)[0],
+            "ph": "X",
+            "ts": ev["ts_us"],
+            "dur": int(ev["wall_s"] * 1e6),
+            "pid": ev["pid"],
+            "tid": ev["tid"],
+            "args": args,
+        })
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"traceEvents": trace, "displayTimeUnit": "ms"}), encoding="utf-8")
+
+
+def read_jsonl(paths) -> list[dict]:
+    """Relit une ou plusieurs traces JSONL (ex. une par worker) pour les fusionner."""
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    evs = []
+    for p in paths:
+        with open(p, encoding="utf-8") as f:
+            evs.extend(json.loads(line) for line in f if line.strip())
+    return sorted(evs, key=lambda e: e["ts_us"])
+
+
+@contextmanager
+def session(out_dir: str | Path, trace_memory: bool = False, prefix: str = "trace"):
+    """Active le profilage le temps du bloc, puis écrit <prefix>.jsonl et <prefix>.json."""
+    out_dir = Path(out_dir)
+    reset()
+    enable(trace_memory)
+    try:
+        yield
+    finally:
+        disable()
+        write_jsonl(out_dir / f"{prefix}.jsonl")
+        write_chrome_trace(out_dir / f"{prefix}.json")
+
+
+def _dump_at_exit(out_dir: Path) -> None:
+    if _events:
+        write_jsonl(out_dir / f"trace-{os.getpid()}.jsonl")
+        write_chrome_trace(out_dir / f"trace-{os.getpid()}.json")
+
+
+if os.environ.get(ENV_VAR):
+    enable(trace_memory=os.environ.get("FX_PROFILE_MEMORY", "0") == "1")
+    atexit.register(_dump_at_exit, Path(os.environ[ENV_VAR]))
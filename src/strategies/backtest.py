@@ -1,3 +1,6 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
 import numpy as np
 import pandas as pd
 
@@ -35,3 +38,84 @@ def backtest_m15(
     # equity curve (base 1.0)
     d["equity"] = np.exp(d["strat_ret_net"].cumsum())
     return d
+
+
+@dataclass
+class BatchBacktest:
+    """
+    Résultat de backtest_batch : une ligne par stratégie, une colonne par barre.
+    Mêmes valeurs que les colonnes de backtest_m15 (NaN compris).
+    """
+    names: list[str]
+    ret: np.ndarray         # (n,)   log-return du prix
+    gross: np.ndarray       # (k, n) strat_ret_gross
+    cost: np.ndarray        # (k, n)
+    net: np.ndarray         # (k, n) strat_ret_net
+    trade: np.ndarray       # (k, n) |Δposition| (0, 1, 2)
+    equity: np.ndarray      # (k, n)
+
+    @property
+    def n_trades(self) -> np.ndarray:
+        return (self.trade > 0).sum(axis=1)
+
+    def row(self, name: str) -> pd.DataFrame:
+        # une stratégie au format de backtest_m15 (colonnes de résultat seulement)
+        i = self.names.index(name)
+        return pd.DataFrame({
+            "ret": self.ret,
+            "strat_ret_gross": self.gross[i],
+            "trade": self.trade[i],
+            "cost": self.cost[i],
+            "strat_ret_net": self.net[i],
+            "equity": self.equity[i],
+        })
+
+
+def backtest_batch(
+    price: np.ndarray,
+    positions: np.ndarray | dict[str, np.ndarray],
+    transaction_cost: float = 0.00005,
+) -> BatchBacktest:
+    """
+    Backtest vectorisé de k stratégies sur la même série de prix (déjà triée
+    par timestamp) : positions est une matrice (k, n) ou un dict nom -> (n,).
+    Le rendement du prix est calculé une fois, puis chaque étape est une
+    opération numpy sur toute la matrice.
+    """
+    if isinstance(positions, dict):
+        names = list(positions)
+        pos = np.vstack([np.asarray(p, dtype=np.float64) for p in positions.values()]) if names \
+            else np.empty((0, len(price)))
+    else:
+        pos = np.atleast_2d(np.asarray(positions, dtype=np.float64))
+        names = [str(i) for i in range(pos.shape[0])]
+    price = np.asarray(price, dtype=np.float64)
+    if pos.shape[1] != len(price):
+        raise ValueError(f"positions have {pos.shape[1]} bars, price has {len(price)}")
+
+    pos = np.clip(np.nan_to_num(pos, nan=0.0), -1, 1)
+    k, n = pos.shape
+
+    ret = np.empty_like(price)
+    ret[:1] = np.nan
+    ret[1:] = np.diff(np.log(price))
+
+    # on agit à t sur le rendement t -> t+1 (position initiale = flat)
+    gross = np.empty((k, n))
+    gross[:, :1] = 0.0 * ret[:1]
+    np.multiply(pos[:, :-1], ret[1:], out=gross[:, 1:])
+
+    trade = np.zeros((k, n))
+    np.subtract(pos[:, 1:], pos[:, :-1], out=trade[:, 1:])
+    np.abs(trade, out=trade)
+    cost = trade * transaction_cost
+    net = gross - cost
+
+    # cumsum qui ignore les NaN (comme pandas), NaN conservés en sortie
+    nan = np.isnan(net)
+    equity = np.where(nan, 0.0, net)
+    np.cumsum(equity, axis=1, out=equity)
+    np.exp(equity, out=equity)
+    equity[nan] = np.nan
+
+    return BatchBacktest(names=names, ret=ret, gross=gross, cost=cost, net=net, trade=trade, equity=equity)
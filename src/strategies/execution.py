@@ -0,0 +1,272 @@
+"""
+Simulation d'exécution intrabar : décisions M15, exécution rejouée sur les
+barres M1 (load_m1_csv) de chaque intervalle de décision.
+
+    décision de la bougie M15 T (connue à sa clôture, T + 15 min)
+    -> appliquée aux barres M1 de [T + 15 min, décision suivante)
+
+À la première barre M1 d'un intervalle, la position est alignée sur la cible
+au prix d'ouverture (ordre au marché : demi-spread + slippage). Ensuite, à
+chaque barre M1, stop-loss / take-profit sont testés sur le bid (long) ou
+l'ask (short) :
+
+    - ouverture au-delà du niveau (gap)  -> exécution à l'ouverture
+    - stop et take-profit touchés dans la même barre -> stop d'abord (prudent)
+    - stop : ordre au marché (slippage), take-profit : ordre limite (sans slippage)
+
+Après une sortie sur stop / take-profit, la position reste flat jusqu'à la
+décision suivante. Spread et slippage en unités de prix (0.0001 = 1 pip sur
+GBPUSD) ; stop_loss / take_profit en fraction du prix d'entrée (0.002 = 0.2 %),
+un par stratégie possible, NaN = désactivé.
+
+Cotations : les barres HistData (load_m1_csv) sont des bids. Avec
+quote="bid" (défaut), l'ask est bid + spread : un achat paie le spread entier,
+un short est stoppé quand high_bid + spread atteint le stop. Avec quote="mid",
+bid / ask = mid -/+ spread / 2. La boucle travaille sur le mid (bid + spread / 2)
+et mesure les coûts par rapport à lui : un aller-retour coûte un spread.
+
+La boucle est compilée avec numba (prange sur les stratégies, numba est dans
+requirements.txt) ; sans numba, la même boucle tourne en Python (correcte
+mais lente) et simulate_execution émet un RuntimeWarning.
+"""
+from __future__ import annotations
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.backtest import BatchBacktest
+from src.strategies.metrics import StreamingMetrics
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+PERIODS_PER_YEAR_M1 = 252 * 24 * 60
+DECISION_LAG = pd.Timedelta("15min")
+
+
+def _simulate(o, h, l, c, hs, slip, dec, new, target, sl, tp, commission):
+    k, n = target.shape[0], len(o)
+    net = np.zeros((k, n))
+    cost = np.zeros((k, n))
+    trade = np.zeros((k, n), dtype=np.int8)
+    position = np.zeros((k, n), dtype=np.int8)
+    counts = np.zeros((k, 2), dtype=np.int64)   # sorties stop-loss, take-profit
+
+    for s in prange(k):
+        pos = 0
+        last = 0.0            # dernier prix de valorisation (fill ou clôture mid)
+        stop = np.nan
+        take = np.nan
+        for i in range(n):
+            half = hs[i]
+            r = 0.0
+            cst = 0.0
+            if new[i]:
+                tgt = 0
+                if dec[i] >= 0:
+                    tgt = int(target[s, dec[i]])
+                if tgt != pos:
+                    # ordre(s) au marché à l'ouverture ; un retournement = 2 unités
+                    if pos != 0:
+                        fill = o[i] - pos * (half + slip)
+                        r += pos * np.log(fill / last)
+                        cst += abs(np.log(fill / o[i]))
+                    if tgt != 0:
+                        fill = o[i] + tgt * (half + slip)
+                        cst += abs(np.log(fill / o[i]))
+                        last = fill
+                        stop = fill * (1.0 - tgt * sl[s])
+                        take = fill * (1.0 + tgt * tp[s])
+                    trade[s, i] = abs(tgt - pos)
+                    r -= commission * abs(tgt - pos)
+                    cst += commission * abs(tgt - pos)
+                    pos = tgt
+
+            if pos != 0:
+                # niveaux touchés côté sortie : bid pour un long, ask pour un short
+                eo = o[i] - pos * half
+                if pos > 0:
+                    ex = l[i] - half
+                    fav = h[i] - half
+                else:
+                    ex = h[i] + half
+                    fav = l[i] + half
+                kind = -1
+                fill = 0.0
+                ref = 0.0
+                if stop == stop and pos * (eo - stop) <= 0:
+                    kind, fill, ref = 0, eo - pos * slip, o[i]
+                elif take == take and pos * (eo - take) >= 0:
+                    kind, fill, ref = 1, eo, o[i]
+                elif stop == stop and pos * (ex - stop) <= 0:
+                    kind, fill, ref = 0, stop - pos * slip, stop + pos * half
+                elif take == take and pos * (fav - take) >= 0:
+                    kind, fill, ref = 1, take, take + pos * half
+
+                if kind >= 0:
+                    r += pos * np.log(fill / last)
+                    cst += abs(np.log(fill / ref))
+                    counts[s, kind] += 1
+                    trade[s, i] += 1
+                    pos = 0
+                else:
+                    r += pos * np.log(c[i] / last)
+                    last = c[i]
+
+            net[s, i] = r
+            cost[s, i] = cst
+            position[s, i] = pos
+    return net, cost, trade, position, counts
+
+
+if NUMBA_AVAILABLE:
+    _simulate_kernel = njit(cache=True, parallel=True)(_simulate)
+else:
+    _simulate_kernel = _simulate
+
+
+@dataclass
+class ExecutionResult:
+    """
+    Résultat de simulate_execution : une ligne par stratégie, une colonne par
+    barre M1 (rendement net en log, comme strat_ret_net).
+    """
+    names: list[str]
+    timestamp: np.ndarray     # (n,) barres M1
+    decision: np.ndarray      # (n,) index de la décision M15 appliquée (-1 : aucune)
+    n_decisions: int
+    log_ret: np.ndarray       # (n,) log-return du mid (clôture à clôture)
+    net: np.ndarray           # (k, n)
+    cost: np.ndarray          # (k, n) spread + slippage + commission, en log
+    trade: np.ndarray         # (k, n) unités de position échangées dans la barre
+    position: np.ndarray      # (k, n) position en fin de barre
+    n_stop_loss: np.ndarray   # (k,)
+    n_take_profit: np.ndarray  # (k,)
+
+    @property
+    def equity(self) -> np.ndarray:
+        return np.exp(np.cumsum(self.net, axis=1))
+
+    @property
+    def n_trades(self) -> np.ndarray:
+        return (self.trade > 0).sum(axis=1)
+
+    def summary(self, periods_per_year: int = PERIODS_PER_YEAR_M1) -> pd.DataFrame:
+        """Métriques de summary_metrics à la résolution M1, une ligne par stratégie."""
+        rows = {}
+        for i, name in enumerate(self.names):
+            row = StreamingMetrics.from_arrays(self.net[i], self.trade[i], periods_per_year).summary()
+            row["n_stop_loss"] = int(self.n_stop_loss[i])
+            row["n_take_profit"] = int(self.n_take_profit[i])
+            rows[name] = row
+        return pd.DataFrame.from_dict(rows, orient="index").rename_axis("strategy")
+
+    def to_m15(self) -> BatchBacktest:
+        """
+        Rendements sommés par intervalle de décision, rangés comme dans
+        backtest_m15 (la décision j produit la ligne j + 1), pour
+        summary_metrics_batch à l'échelle M15. Seule différence de rangement :
+        le coût d'un changement de position est sur la ligne j + 1 (exécution
+        à l'ouverture suivante) et non sur la ligne j.
+        """
+        n_decisions = self.n_decisions
+        col = self.decision + 1
+        keep = (self.decision >= 0) & (col < n_decisions)
+
+        def per_decision(x: np.ndarray) -> np.ndarray:
+            out = np.zeros((x.shape[0], n_decisions))
+            for i in range(x.shape[0]):
+                out[i] = np.bincount(col[keep], weights=x[i, keep], minlength=n_decisions)
+            out[:, 0] = np.nan
+            return out
+
+        ret = per_decision(self.log_ret[None, :])[0]
+        net = per_decision(self.net)
+        cost = per_decision(self.cost)
+        trade = per_decision(self.trade.astype(np.float64))
+        equity = np.exp(np.nancumsum(net, axis=1))
+        equity[:, 0] = np.nan
+        return BatchBacktest(
+            names=self.names, ret=ret, gross=net + cost, cost=cost,
+            net=net, trade=trade, equity=equity,
+        )
+
+
+def simulate_execution(
+    m1: pd.DataFrame,
+    decision_timestamps: np.ndarray | pd.Series,
+    positions: np.ndarray | dict[str, np.ndarray],
+    stop_loss: float | np.ndarray | None = None,
+    take_profit: float | np.ndarray | None = None,
+    spread: float | np.ndarray = 0.0001,
+    slippage: float = 0.0,
+    commission: float = 0.0,
+    decision_lag: str | pd.Timedelta = DECISION_LAG,
+    quote: str = "bid",
+) -> ExecutionResult:
+    """
+    m1 : barres M1 d'un symbole (timestamp, open, high, low, close), ex. load_m1_csv.
+    decision_timestamps : timestamps des bougies M15 (début de bougie, comme
+    aggregate_m15), triés ; positions : matrice (k, n_m15) ou dict nom -> (n_m15,)
+    dans {-1, 0, 1}. spread : scalaire ou une valeur par barre M1.
+    commission : coût en log par unité de position échangée (transaction_cost
+    de backtest_m15). quote : "bid" (barres HistData) ou "mid".
+    """
+    if quote not in ("bid", "mid"):
+        raise ValueError(f"quote must be 'bid' or 'mid', got {quote!r}")
+    if isinstance(positions, dict):
+        names = list(positions)
+        pos = np.vstack([np.asarray(p, dtype=np.float64) for p in positions.values()])
+    else:
+        pos = np.atleast_2d(np.asarray(positions, dtype=np.float64))
+        names = [str(i) for i in range(pos.shape[0])]
+    ts15 = pd.DatetimeIndex(decision_timestamps)
+    if pos.shape[1] != len(ts15):
+        raise ValueError(f"positions have {pos.shape[1]} bars, decision_timestamps has {len(ts15)}")
+    if not ts15.is_monotonic_increasing:
+        raise ValueError("decision_timestamps must be sorted")
+    target = np.clip(np.nan_to_num(pos, nan=0.0), -1, 1).round().astype(np.int8)
+    k = target.shape[0]
+
+    d = m1.sort_values("timestamp") if not m1["timestamp"].is_monotonic_increasing else m1
+    ts1 = pd.DatetimeIndex(d["timestamp"])
+    o, h, l, c = (d[col].to_numpy(dtype=np.float64) for col in ("open", "high", "low", "close"))
+
+    # décision la plus récente disponible à l'ouverture de chaque barre M1
+    avail = ts15 + pd.Timedelta(decision_lag)
+    dec = np.searchsorted(avail.as_unit("ns").asi8, ts1.as_unit("ns").asi8, side="right").astype(np.int64) - 1
+    new = np.empty(len(dec), dtype=np.bool_)
+    new[:1] = True
+    new[1:] = dec[1:] != dec[:-1]
+
+    def per_strategy(x) -> np.ndarray:
+        x = np.full(k, np.nan) if x is None else np.broadcast_to(np.asarray(x, dtype=np.float64), (k,))
+        return np.ascontiguousarray(x)
+
+    hs = np.ascontiguousarray(np.broadcast_to(np.asarray(spread, dtype=np.float64) / 2.0, (len(o),)))
+    if quote == "bid":
+        # bid -> mid : le noyau reconstruit bid = mid - hs et ask = mid + hs
+        o, h, l, c = (x + hs for x in (o, h, l, c))
+    if not NUMBA_AVAILABLE:
+        warnings.warn(
+            "numba is not installed: simulate_execution runs the pure-Python loop (slow). "
+            "Install the pinned requirements (numba) for the compiled kernel.",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+    net, cost, trade, position, counts = _simulate_kernel(
+        o, h, l, c, hs, float(slippage), dec, new, target,
+        per_strategy(stop_loss), per_strategy(take_profit), float(commission),
+    )
+    log_ret = np.zeros(len(c))
+    log_ret[1:] = np.diff(np.log(c))
+    return ExecutionResult(
+        names=names, timestamp=ts1.to_numpy(), decision=dec, n_decisions=len(ts15), log_ret=log_ret, net=net, cost=cost,
+        trade=trade, position=position, n_stop_loss=counts[:, 0], n_take_profit=counts[:, 1],
+    )
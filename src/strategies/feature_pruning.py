@@ -0,0 +1,195 @@
+"""
+Élagage des features après train_compare_models.
+
+Les décisions se prennent sur une tranche de sélection : la fin de la
+fenêtre d'entraînement (`select_frac`, après un embargo), le modèle étant
+réentraîné sur le début. La validation ne sert qu'au rapport final : ses
+métriques ne sont pas biaisées par les choix de l'élagage.
+
+1. importance par permutation sur la tranche de sélection (sklearn, un job
+   par feature, modèle sur un seul thread) ;
+2. des moins importantes aux plus importantes, on retire une feature, on
+   réentraîne le modèle (clone, mêmes hyperparamètres) et on garde le retrait
+   si le F1 et le Sharpe du backtest sur la sélection restent dans la
+   tolérance du modèle complet (tolérance mesurée contre le modèle de
+   départ, pas contre l'étape précédente : pas de dérive cumulée) ;
+3. modèles complet et élagué réentraînés sur toute la fenêtre
+   d'entraînement, évalués sur la validation ; le rapport donne aussi les
+   temps de fit / predict avant et après.
+
+Les quasi-doublons (ret / return_1, EMA, OHLC bruts) ont une importance par
+permutation faible puisque leur jumeau porte la même information : ils sont
+testés en premier.
+"""
+from __future__ import annotations
+import time
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.inspection import permutation_importance
+from sklearn.metrics import accuracy_score, f1_score
+
+from src.profiling import profiled
+from src.strategies.backtest import backtest_batch
+from src.strategies.metrics import summary_metrics_batch
+from src.strategies.ml_infer import positions_from_proba
+from src.strategies.ml_train import _xy
+
+
+@dataclass
+class FitEval:
+    """Métriques d'un fit sur le jeu d'évaluation (sélection ou validation)."""
+    n_features: int
+    fit_s: float
+    predict_s: float
+    f1: float
+    accuracy: float
+    sharpe: float
+
+
+def _single_thread(model):
+    # predict sur un thread : permutation_importance parallélise déjà par feature
+    return model.set_params(**{k: 1 for k in model.get_params() if k.endswith("n_jobs")})
+
+
+def _fit_eval(model, X_tr, y_tr, X_val, y_val, price, predict_repeat: int = 3) -> FitEval:
+    t0 = time.perf_counter()
+    model.fit(X_tr, y_tr)
+    fit_s = time.perf_counter() - t0
+
+    predict_s = np.inf
+    for _ in range(predict_repeat):
+        t0 = time.perf_counter()
+        proba = model.predict_proba(X_val)[:, 1]
+        predict_s = min(predict_s, time.perf_counter() - t0)
+
+    # même décision que model.predict pour un binaire 0/1 (argmax, égalité -> 0)
+    pred = (proba > 0.5).astype(int)
+    bt = backtest_batch(price, positions_from_proba(proba)[None, :])
+    return FitEval(
+        n_features=X_tr.shape[1],
+        fit_s=fit_s,
+        predict_s=predict_s,
+        f1=float(f1_score(y_val, pred)),
+        accuracy=float(accuracy_score(y_val, pred)),
+        sharpe=float(summary_metrics_batch(bt)["sharpe"].iloc[0]),
+    )
+
+
+def permutation_ranking(
+    model,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+    features: list[str],
+    scoring: str = "roc_auc",
+    n_repeats: int = 5,
+    n_jobs: int = -1,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """
+    Importance par permutation (baisse du score), triée de la moins à la plus
+    importante. `model` doit prédire sur un seul thread (voir _single_thread).
+    """
+    res = permutation_importance(
+        model, X_val, y_val, scoring=scoring, n_repeats=n_repeats, n_jobs=n_jobs, random_state=seed,
+    )
+    return pd.DataFrame({
+        "feature": features,
+        "importance_mean": res.importances_mean,
+        "importance_std": res.importances_std,
+    }).sort_values("importance_mean", kind="stable").reset_index(drop=True)
+
+
+@profiled()
+def prune_features(
+    model,
+    train_df: pd.DataFrame,
+    val_df: pd.DataFrame,
+    features: list[str],
+    f1_tol: float = 0.005,
+    sharpe_tol: float = 0.1,
+    scoring: str = "roc_auc",
+    n_repeats: int = 5,
+    min_features: int = 1,
+    n_jobs: int = -1,
+    seed: int = 42,
+    price_col: str = "close_15m",
+    select_frac: float = 0.25,
+    embargo: int = 1,
+    verbose: bool = False,
+) -> tuple[object, dict, dict]:
+    """
+    model : modèle de train_compare_models (seuls ses hyperparamètres servent,
+    il est cloné). train_df / val_df triés par timestamp, avec `price_col`
+    (backtest). Sélection = `select_frac` dernières lignes de train_df, le
+    fit des essais s'arrêtant `embargo` lignes avant (cible à horizon 1).
+    Renvoie (modèle élagué entraîné sur tout train_df, meta pour save_model
+    avec les métriques de validation, rapport).
+    verbose=True : affiche chaque essai de retrait (aussi dans rapport["steps"]).
+    """
+    X_tr, y_tr = _xy(train_df, features)
+    X_val, y_val = _xy(val_df, features)
+    price_tr = train_df[price_col].to_numpy(dtype=np.float64)
+    price_val = val_df[price_col].to_numpy(dtype=np.float64)
+
+    n_sel = int(len(X_tr) * select_frac)
+    fit_end = len(X_tr) - n_sel - embargo
+    if n_sel < 100 or fit_end < 100:
+        raise ValueError(f"Training window too small to hold out a selection slice: {len(X_tr)} rows")
+    X_fit, y_fit = X_tr[:fit_end], y_tr[:fit_end]
+    X_sel, y_sel, price_sel = X_tr[-n_sel:], y_tr[-n_sel:], price_tr[-n_sel:]
+
+    def on_selection(cols: list[str]) -> tuple[object, FitEval]:
+        idx = [features.index(c) for c in cols]
+        m = clone(model)
+        return m, _fit_eval(m, X_fit[:, idx], y_fit, X_sel[:, idx], y_sel, price_sel)
+
+    # référence sur la sélection : toutes les features ; son modèle sert au classement
+    ref_model, ref = on_selection(features)
+    ranking = permutation_ranking(_single_thread(ref_model), X_sel, y_sel, features, scoring, n_repeats, n_jobs, seed)
+
+    kept = list(features)
+    steps = []
+    for f in ranking["feature"]:
+        if len(kept) <= min_features:
+            break
+        trial = [c for c in kept if c != f]
+        _, res = on_selection(trial)
+        ok = res.f1 >= ref.f1 - f1_tol and res.sharpe >= ref.sharpe - sharpe_tol
+        steps.append({"drop": f, "accepted": ok, **asdict(res)})
+        if verbose:
+            print(f"- drop {f:<20} f1={res.f1:.4f} sharpe={res.sharpe:.3f} -> {'ok' if ok else 'keep'}")
+        if ok:
+            kept = trial
+
+    # modèles complet et élagué sur toute la fenêtre, évalués sur la validation seulement
+    base = _fit_eval(clone(model), X_tr, y_tr, X_val, y_val, price_val)
+    idx = [features.index(c) for c in kept]
+    best_model = clone(model)
+    best = _fit_eval(best_model, X_tr[:, idx], y_tr, X_val[:, idx], y_val, price_val)
+
+    report = {
+        "scoring": scoring,
+        "f1_tol": f1_tol,
+        "sharpe_tol": sharpe_tol,
+        "selection_rows": n_sel,
+        "selection_baseline": asdict(ref),
+        "importance": ranking.to_dict("records"),
+        "steps": steps,
+        "features": kept,
+        "dropped": [f for f in features if f not in kept],
+        "baseline": asdict(base),
+        "final": asdict(best),
+        "fit_speedup": base.fit_s / best.fit_s if best.fit_s > 0 else None,
+        "predict_speedup": base.predict_s / best.predict_s if best.predict_s > 0 else None,
+    }
+    meta = {
+        "features": kept,
+        "val_accuracy": best.accuracy,
+        "val_f1": best.f1,
+        "val_sharpe": best.sharpe,
+        "pruned_from": len(features),
+    }
+    return best_model, meta, report
@@ -1,3 +1,9 @@
+from __future__ import annotations
+import json
+import math
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 
@@ -36,3 +42,197 @@ def summary_metrics(bt: pd.DataFrame) -> dict:
         "profit_factor": profit_factor(r),
         "n_trades": int((bt["trade"] > 0).sum()),
     }
+
+
+def summary_metrics_batch(bt, periods_per_year: int = 252 * 24 * 4) -> pd.DataFrame:
+    """
+    summary_metrics pour toutes les stratégies d'un BatchBacktest (une ligne
+    par stratégie), calculé sur les matrices sans repasser par pandas.
+    """
+    eq, r = bt.equity, bt.net
+    k = eq.shape[0]
+
+    # drawdown : cummax qui ignore les NaN (fmax), min hors NaN
+    roll_max = np.fmax.accumulate(eq, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dd = eq / roll_max - 1.0
+    valid_dd = ~np.isnan(dd)
+    mdd = np.where(valid_dd.any(axis=1), np.min(np.where(valid_dd, dd, np.inf), axis=1), np.nan)
+
+    valid = ~np.isnan(r)
+    cnt = valid.sum(axis=1)
+    rz = np.where(valid, r, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = rz.sum(axis=1) / cnt
+        var = (np.where(valid, r - mean[:, None], 0.0) ** 2).sum(axis=1) / (cnt - 1)
+        std = np.sqrt(var)
+        sharpe = np.where((cnt < 5) | (std == 0), 0.0, mean / std * np.sqrt(periods_per_year))
+
+    gains = np.where(rz > 0, rz, 0.0).sum(axis=1)
+    losses = -np.where(rz < 0, rz, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pf = np.where(losses == 0, np.where(gains > 0, np.inf, 0.0), gains / losses)
+
+    return pd.DataFrame({
+        "final_equity": eq[:, -1] if eq.shape[1] else np.full(k, np.nan),
+        "max_drawdown": mdd,
+        "sharpe": sharpe,
+        "profit_factor": pf,
+        "n_trades": bt.n_trades.astype(int),
+    }, index=pd.Index(bt.names, name="strategy"))
+
+
+@dataclass
+class StreamingMetrics:
+    """
+    Version en ligne de summary_metrics : update() est O(1) par barre.
+
+    On suit la log-equity (cumsum des rendements nets), son plus haut et son
+    plus bas, le drawdown minimal en espace log, moyenne / variance de Welford
+    et les sommes de gains / pertes. Les barres à rendement NaN sont ignorées
+    comme dans summary_metrics (le trade compte quand même).
+
+    merge() combine deux segments consécutifs (self puis other) : le résultat
+    est celui d'un accumulateur qui aurait vu les deux segments à la suite,
+    ex. folds de walk-forward ou tranches traitées par des workers.
+    """
+    periods_per_year: int = 252 * 24 * 4
+    n_bars: int = 0
+    n: int = 0                      # rendements non NaN
+    mean: float = 0.0
+    m2: float = 0.0
+    gains: float = 0.0
+    losses: float = 0.0
+    n_trades: int = 0
+    log_equity: float = 0.0
+    peak: float = -math.inf         # max de la log-equity (depuis la 1re barre valide)
+    trough: float = math.inf        # min de la log-equity
+    min_dd: float = 0.0             # min de log_equity - peak
+    last_nan: bool = True           # dernière barre à rendement NaN -> final_equity NaN
+
+    def update(self, ret: float, trade: float = 0.0) -> None:
+        self.n_bars += 1
+        if trade > 0:
+            self.n_trades += 1
+        if ret != ret:  # NaN
+            self.last_nan = True
+            return
+        self.last_nan = False
+
+        self.n += 1
+        delta = ret - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (ret - self.mean)
+        if ret > 0:
+            self.gains += ret
+        elif ret < 0:
+            self.losses -= ret
+
+        self.log_equity += ret
+        if self.log_equity > self.peak:
+            self.peak = self.log_equity
+        if self.log_equity < self.trough:
+            self.trough = self.log_equity
+        dd = self.log_equity - self.peak
+        if dd < self.min_dd:
+            self.min_dd = dd
+
+    @classmethod
+    def from_arrays(
+        cls,
+        returns: np.ndarray | pd.Series,
+        trades: np.ndarray | pd.Series | None = None,
+        periods_per_year: int = 252 * 24 * 4,
+    ) -> "StreamingMetrics":
+        """Accumulateur d'un segment entier, calculé en numpy (même état que des update())."""
+        r = np.asarray(returns, dtype=np.float64)
+        m = cls(periods_per_year=periods_per_year, n_bars=len(r))
+        if trades is not None:
+            m.n_trades = int((np.asarray(trades, dtype=np.float64) > 0).sum())
+        if len(r) == 0:
+            return m
+        m.last_nan = bool(np.isnan(r[-1]))
+        v = r[~np.isnan(r)]
+        if len(v) == 0:
+            return m
+
+        m.n = len(v)
+        m.mean = float(v.mean())
+        m.m2 = float(((v - m.mean) ** 2).sum())
+        m.gains = float(v[v > 0].sum())
+        m.losses = float(-v[v < 0].sum())
+        cs = np.cumsum(v)
+        run_max = np.maximum.accumulate(cs)
+        m.log_equity = float(cs[-1])
+        m.peak = float(run_max[-1])
+        m.trough = float(cs.min())
+        m.min_dd = float(min(0.0, (cs - run_max).min()))
+        return m
+
+    @classmethod
+    def from_backtest(cls, bt: pd.DataFrame, periods_per_year: int = 252 * 24 * 4) -> "StreamingMetrics":
+        return cls.from_arrays(bt["strat_ret_net"], bt["trade"], periods_per_year)
+
+    def update_many(self, returns, trades=None) -> None:
+        self.merge(StreamingMetrics.from_arrays(returns, trades, self.periods_per_year), inplace=True)
+
+    def merge(self, other: "StreamingMetrics", inplace: bool = False) -> "StreamingMetrics":
+        out = self if inplace else StreamingMetrics(**asdict(self))
+        a, b = StreamingMetrics(**asdict(self)), other
+
+        # Welford / Chan : moyenne et M2 de l'union
+        n = a.n + b.n
+        if n:
+            delta = b.mean - a.mean
+            out.mean = a.mean + delta * b.n / n
+            out.m2 = a.m2 + b.m2 + delta * delta * a.n * b.n / n
+        out.n = n
+        out.n_bars = a.n_bars + b.n_bars
+        out.n_trades = a.n_trades + b.n_trades
+        out.gains = a.gains + b.gains
+        out.losses = a.losses + b.losses
+
+        # le chemin de b est décalé de la log-equity finale de a ; un drawdown
+        # de b se mesure contre max(pic de a, pic courant de b décalé) :
+        # min_t (cs_t - max(A, B_t)) = min(min_t cs_t - A, min_t (cs_t - B_t))
+        if b.n:
+            out.min_dd = min(a.min_dd, b.min_dd, a.log_equity + b.trough - a.peak)
+            out.peak = max(a.peak, a.log_equity + b.peak)
+            out.trough = min(a.trough, a.log_equity + b.trough)
+        out.log_equity = a.log_equity + b.log_equity
+        if b.n_bars:
+            out.last_nan = b.last_nan
+        return out
+
+    def summary(self) -> dict:
+        """Mêmes clés et conventions que summary_metrics."""
+        std = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+        if self.n < 5 or std == 0:
+            sharpe = 0.0
+        else:
+            sharpe = float(self.mean / std * np.sqrt(self.periods_per_year))
+        if self.losses == 0:
+            pf = float("inf") if self.gains > 0 else 0.0
+        else:
+            pf = float(self.gains / self.losses)
+        return {
+            "final_equity": math.nan if self.last_nan else math.exp(self.log_equity),
+            "max_drawdown": math.expm1(self.min_dd) if self.n else math.nan,
+            "sharpe": sharpe,
+            "profit_factor": pf,
+            "n_trades": self.n_trades,
+        }
+
+    def to_state(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingMetrics":
+        return cls(**state)
+
+    def save(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_state()), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> "StreamingMetrics":
+        return cls.from_state(json.loads(Path(path).read_text(encoding="utf-8")))
@@ -2,15 +2,41 @@ from __future__ import annotations
 import json
 from pathlib import Path
 import joblib
+import numpy as np
 import pandas as pd
 
+from src.feature_matrix import FeatureMatrix
+from src.strategies.tree_export import FOREST_FILE, FlatForest
+
 def load_model(model_dir: str | Path):
     model_dir = Path(model_dir)
     model = joblib.load(model_dir / "model.joblib")
     meta = json.loads((model_dir / "metadata.json").read_text(encoding="utf-8"))
     return model, meta
 
-def predict_proba_up(df: pd.DataFrame, model, features: list[str]) -> pd.Series:
-    X = df[features].values
+def load_flat_forest(model_dir: str | Path) -> FlatForest | None:
+    # forêt aplatie exportée par save_model (None pour logreg / XGBoost)
+    path = Path(model_dir) / FOREST_FILE
+    return FlatForest.load(path) if path.exists() else None
+
+def predict_proba_up(df: pd.DataFrame | FeatureMatrix, model, features: list[str]) -> pd.Series:
+    if isinstance(df, FeatureMatrix):
+        X = df.take(features)
+        index = pd.RangeIndex(len(df))
+    else:
+        X = df[features].values
+        index = df.index
     proba_up = model.predict_proba(X)[:, 1]
-    return pd.Series(proba_up, index=df.index, name="proba_up")
+    return pd.Series(proba_up, index=index, name="proba_up")
+
+def positions_from_proba(
+    proba: np.ndarray | pd.Series,
+    threshold_long: float = 0.55,
+    threshold_short: float = 0.45,
+) -> np.ndarray:
+    # bande morte : long au-dessus de threshold_long, short sous threshold_short
+    proba = np.asarray(proba)
+    pos = np.zeros(len(proba), dtype=int)
+    pos[proba > threshold_long] = 1
+    pos[proba < threshold_short] = -1
+    return pos
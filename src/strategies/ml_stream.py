@@ -0,0 +1,285 @@
+"""
+Entraînement hors mémoire (out-of-core) par mini-batchs.
+
+Sources de batchs (X float32, y int8), mémoire bornée par `batch_rows` :
+- MatrixBatches : FeatureMatrix ouverte en mmap (FeatureMatrix.open) ;
+- ParquetBatches : fichiers parquet lus par lots de lignes (pyarrow), la
+  cible étant lue (`target`) ou reconstruite à la volée comme make_target
+  (return_1 futur > 0) avec report des dernières lignes d'un lot au suivant.
+
+Apprenants :
+- "sgd" : StandardScaler.partial_fit (1 passe) puis SGDClassifier(log_loss)
+  .partial_fit sur `epochs` passes (ordre des lots mélangé à chaque passe
+  pour le mmap, lignes mélangées dans chaque lot) -> Pipeline sklearn ;
+  régularisation alpha=1e-3 et moyenne des poids (average) par défaut :
+  avec alpha=1e-5 et le pas "optimal", 3 passes ne convergent pas (poids
+  x100 par rapport à LogisticRegression, probas biaisées) ;
+- "xgb" : XGBoost en mémoire externe (DataIter + ExtMemQuantileDMatrix, pages
+  en cache disque), `epochs` = nombre de rounds de boosting -> XGBClassifier.
+
+Le modèle obtenu a predict_proba et se sauve avec save_model : il se relit
+avec ml_infer.load_model comme les autres.
+"""
+from __future__ import annotations
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.feature_matrix import FeatureMatrix
+from src.profiling import profiled, stage
+from src.strategies.ml_train import DROP_COLS
+
+try:
+    import xgboost as xgb
+    from xgboost import XGBClassifier
+    XGB_AVAILABLE = True
+except Exception:
+    XGB_AVAILABLE = False
+
+STREAM_MODELS = ("sgd", "xgb")
+
+
+@dataclass
+class MatrixBatches:
+    """Lots de lignes consécutives d'une FeatureMatrix (mmap : seul le lot est lu)."""
+    fm: FeatureMatrix
+    features: list[str] | None = None
+    batch_rows: int = 65_536
+
+    def __post_init__(self):
+        if self.fm.y is None:
+            raise ValueError("FeatureMatrix has no target (y)")
+        self.features = list(self.fm.columns) if self.features is None else list(self.features)
+        self._idx = None if self.features == self.fm.columns else [self.fm.columns.index(f) for f in self.features]
+
+    def batches(self, seed: int | None = None) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        starts = np.arange(0, len(self.fm), self.batch_rows)
+        if seed is not None:
+            np.random.default_rng(seed).shuffle(starts)
+        for s in starts:
+            X = self.fm.X[s:s + self.batch_rows]
+            X = np.array(X if self._idx is None else X[:, self._idx], dtype=np.float32)
+            yield X, np.asarray(self.fm.y[s:s + self.batch_rows], dtype=np.int8)
+
+
+def _numeric_columns(schema: pa.Schema) -> list[str]:
+    # équivalent de select_feature_cols sur le schéma (sans lire les données)
+    return [
+        f.name for f in schema
+        if f.name not in DROP_COLS and (pa.types.is_integer(f.type) or pa.types.is_floating(f.type))
+    ]
+
+
+@dataclass
+class ParquetBatches:
+    """
+    Lots lus dans l'ordre des fichiers (triés par temps, ex. une année par
+    fichier). Sans colonne `target_col`, la cible est return_1 dans `horizon`
+    barres > 0 ; les `horizon` dernières lignes du dernier fichier, sans
+    futur connu, sont écartées.
+    """
+    paths: list[str | Path]
+    features: list[str] | None = None
+    batch_rows: int = 65_536
+    target_col: str = "target"
+    horizon: int = 1
+    _has_target: bool = field(init=False, default=False)
+
+    def __post_init__(self):
+        self.paths = [Path(p) for p in self.paths]
+        schema = pq.read_schema(self.paths[0])
+        if self.features is None:
+            self.features = _numeric_columns(schema)
+        self._has_target = self.target_col in schema.names
+        if not self._has_target and "return_1" not in schema.names:
+            raise ValueError(f"{self.paths[0]}: no '{self.target_col}' nor 'return_1' column")
+
+    def _record_batches(self, columns: list[str]) -> Iterator[pa.RecordBatch]:
+        for p in self.paths:
+            yield from pq.ParquetFile(p).iter_batches(batch_size=self.batch_rows, columns=columns)
+
+    def batches(self, seed: int | None = None) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        # seed ignoré : l'ordre des lots est imposé par le report de la cible
+        if self._has_target:
+            for rb in self._record_batches([*self.features, self.target_col]):
+                yield self._x(rb), rb.column(self.target_col).to_numpy(zero_copy_only=False).astype(np.int8)
+            return
+
+        extra = [] if "return_1" in self.features else ["return_1"]
+        h = self.horizon
+        carry_X = np.empty((0, len(self.features)), dtype=np.float32)
+        carry_r = np.empty(0)
+        for rb in self._record_batches([*self.features, *extra]):
+            X = np.concatenate([carry_X, self._x(rb)])
+            r = np.concatenate([carry_r, rb.column("return_1").to_numpy(zero_copy_only=False)])
+            if len(X) <= h:
+                carry_X, carry_r = X, r
+                continue
+            y = (r[h:] > 0).astype(np.int8)
+            yield X[:-h], y
+            carry_X, carry_r = X[-h:], r[-h:]
+
+    def _x(self, rb: pa.RecordBatch) -> np.ndarray:
+        X = np.empty((rb.num_rows, len(self.features)), dtype=np.float32)
+        for j, c in enumerate(self.features):
+            X[:, j] = rb.column(c).to_numpy(zero_copy_only=False)
+        return X
+
+
+def _finite(X: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    ok = np.isfinite(X).all(axis=1)
+    return (X, y) if ok.all() else (X[ok], y[ok])
+
+
+def _fit_sgd(source, epochs: int, seed: int, params: dict) -> tuple[Pipeline, int]:
+    scaler = StandardScaler()
+    n_rows = 0
+    with stage("ml_stream.scaler"):
+        for X, y in source.batches():
+            X, y = _finite(X, y)
+            if len(X):
+                scaler.partial_fit(X)
+                n_rows += len(X)
+
+    clf = SGDClassifier(**{"loss": "log_loss", "alpha": 1e-3, "average": True, "random_state": seed, **params})
+    classes = np.array([0, 1])
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        with stage("ml_stream.epoch"):
+            for X, y in source.batches(seed=seed + epoch):
+                X, y = _finite(X, y)
+                if not len(X):
+                    continue
+                perm = rng.permutation(len(X))
+                clf.partial_fit(scaler.transform(X[perm]), y[perm], classes=classes)
+    return Pipeline([("standardscaler", scaler), ("sgdclassifier", clf)]), n_rows
+
+
+if XGB_AVAILABLE:
+    class _XgbBatchIter(xgb.DataIter):
+        def __init__(self, source, cache_prefix: str):
+            self._source = source
+            self._it = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data) -> bool:
+            if self._it is None:
+                self._it = self._source.batches()
+            try:
+                X, y = next(self._it)
+            except StopIteration:
+                return False
+            # NaN : valeurs manquantes pour XGBoost, pas besoin de filtrer
+            input_data(data=X, label=y)
+            return True
+
+        def reset(self) -> None:
+            self._it = None
+
+
+def _fit_xgb(source, rounds: int, seed: int, params: dict, cache_dir: str | Path | None) -> tuple[object, int]:
+    if not XGB_AVAILABLE:
+        raise RuntimeError("model='xgb' requires xgboost")
+    params = {
+        "objective": "binary:logistic", "tree_method": "hist", "max_depth": 6, "eta": 0.1,
+        "subsample": 0.8, "max_bin": 256, "seed": seed, **params,
+    }
+    if cache_dir is not None:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        it = _XgbBatchIter(source, cache_prefix=str(Path(tmp) / "cache"))
+        with stage("ml_stream.xgb_quantiles"):
+            dtrain = xgb.ExtMemQuantileDMatrix(it, max_bin=params["max_bin"])
+        with stage("ml_stream.xgb_train"):
+            booster = xgb.train(params, dtrain, num_boost_round=rounds)
+        n_rows = dtrain.num_row()
+        del dtrain
+
+    # booster -> XGBClassifier (predict_proba, joblib, load_model)
+    clf = XGBClassifier()
+    clf.load_model(bytearray(booster.save_raw("json")))
+    return clf, n_rows
+
+
+def evaluate_stream(model, source) -> dict:
+    """
+    accuracy / F1 (classe 1) / log-loss par lots, sans matérialiser la
+    validation. La log-loss révèle un modèle mal calibré (fit non convergé)
+    que l'accuracy masque ; val_pos_rate / val_mean_proba à comparer.
+    """
+    tp = fp = fn = correct = total = pos = 0
+    nll = proba_sum = 0.0
+    for X, y in source.batches():
+        X, y = _finite(X, y)
+        if not len(X):
+            continue
+        proba = np.clip(model.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+        nll -= float(np.where(y == 1, np.log(proba), np.log1p(-proba)).sum())
+        proba_sum += float(proba.sum())
+        pos += int(y.sum())
+        pred = (proba > 0.5).astype(np.int8)
+        tp += int(((pred == 1) & (y == 1)).sum())
+        fp += int(((pred == 1) & (y == 0)).sum())
+        fn += int(((pred == 0) & (y == 1)).sum())
+        correct += int((pred == y).sum())
+        total += len(y)
+    f1 = 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0
+    n = total or float("nan")
+    return {
+        "val_accuracy": correct / n,
+        "val_f1": float(f1),
+        "val_log_loss": nll / n,
+        "val_pos_rate": pos / n,
+        "val_mean_proba": proba_sum / n,
+        "val_rows": total,
+    }
+
+
+@profiled()
+def fit_incremental(
+    train,
+    val=None,
+    model: str = "sgd",
+    epochs: int = 3,
+    seed: int = 42,
+    cache_dir: str | Path | None = None,
+    **params,
+) -> tuple[object, dict]:
+    """
+    train / val : MatrixBatches ou ParquetBatches (mêmes features).
+    epochs : passes SGD, ou rounds de boosting pour "xgb".
+    params : hyperparamètres de SGDClassifier ou de xgb.train.
+    Renvoie (model, meta) au format de fit_and_eval, prêt pour save_model.
+    """
+    if model not in STREAM_MODELS:
+        raise ValueError(f"Unknown streaming model: {model} (expected one of {STREAM_MODELS})")
+    if val is not None and list(val.features) != list(train.features):
+        raise ValueError("train and val sources must use the same features")
+
+    t0 = time.perf_counter()
+    if model == "sgd":
+        fitted, n_rows = _fit_sgd(train, epochs, seed, params)
+    else:
+        fitted, n_rows = _fit_xgb(train, epochs, seed, params, cache_dir)
+    fit_s = time.perf_counter() - t0
+
+    meta = {
+        "features": list(train.features),
+        "model_name": f"{model}_stream",
+        "train_rows": n_rows,
+        "epochs": epochs,
+        "batch_rows": train.batch_rows,
+        "fit_seconds": fit_s,
+    }
+    if val is not None:
+        meta.update(evaluate_stream(fitted, val))
+    return fitted, meta
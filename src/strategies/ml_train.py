@@ -9,27 +9,85 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, f1_score
 
+from src.feature_matrix import FeatureMatrix
+from src.profiling import profiled
+from src.strategies.tree_export import FOREST_FILE, export_forest
+
 DROP_COLS = {"timestamp", "year", "target"}
+TARGET_PREFIX = "target_h"  # cibles multi-horizons de make_targets
 
+@profiled()
 def make_target(df: pd.DataFrame, horizon: int = 1) -> pd.DataFrame:
-    d = df.sort_values("timestamp").copy()
+    # tri seulement si nécessaire ; assign ne recopie pas les colonnes existantes
+    d = df if df["timestamp"].is_monotonic_increasing else df.sort_values("timestamp")
     # target: 1 si return futur > 0, sinon 0
-    d["target"] = (d["return_1"].shift(-horizon) > 0).astype(int)
+    d = d.assign(target=(d["return_1"].shift(-horizon) > 0).astype(int))
     return d.dropna(subset=["target"]).reset_index(drop=True)
 
+def target_col(horizon: int) -> str:
+    return f"{TARGET_PREFIX}{horizon}"
+
+def forward_returns(return_1: np.ndarray, horizons: list[int]) -> np.ndarray:
+    """
+    (n, len(horizons)) : somme des log-returns des h barres suivantes,
+    fwd[t, k] = r[t+1] + ... + r[t+h] = cs[t+h+1] - cs[t+1] ; NaN au-delà de la fin.
+    """
+    r = np.nan_to_num(np.asarray(return_1, dtype=np.float64), nan=0.0)
+    n = len(r)
+    cs = np.concatenate(([0.0], np.cumsum(r)))
+    out = np.full((n, len(horizons)), np.nan)
+    for k, h in enumerate(horizons):
+        m = n - h
+        if m > 0:
+            out[:m, k] = cs[h + 1:] - cs[1:m + 1]
+    return out
+
+@profiled()
+def make_targets(
+    df: pd.DataFrame,
+    horizons: tuple[int, ...] = (1, 4, 8, 16),
+    threshold: float | None = None,
+) -> pd.DataFrame:
+    """
+    Une colonne target_h{h} (int8) par horizon, en une passe sur return_1.
+    threshold=None : 1 si le rendement cumulé futur > 0, sinon 0 (h=1 : même
+    cible que make_target) ; threshold=x : 3 classes, 1 si > x, -1 si < -x,
+    0 sinon. Les max(horizons) dernières lignes (futur incomplet) sont retirées.
+    """
+    horizons = [int(h) for h in horizons]
+    d = df if df["timestamp"].is_monotonic_increasing else df.sort_values("timestamp")
+    fwd = forward_returns(d["return_1"].to_numpy(), horizons)
+    if threshold is None:
+        labels = (fwd > 0).astype(np.int8)
+    else:
+        labels = np.where(fwd > threshold, 1, np.where(fwd < -threshold, -1, 0)).astype(np.int8)
+    d = d.assign(**{target_col(h): labels[:, k] for k, h in enumerate(horizons)})
+    return d.iloc[:max(0, len(d) - max(horizons))].reset_index(drop=True)
+
 def select_feature_cols(df: pd.DataFrame) -> list[str]:
-    cols = [c for c in df.columns if c not in DROP_COLS]
+    cols = [c for c in df.columns if c not in DROP_COLS and not c.startswith(TARGET_PREFIX)]
     cols = [c for c in cols if pd.api.types.is_numeric_dtype(df[c])]
     return cols
 
-def fit_and_eval(model, train_df: pd.DataFrame, val_df: pd.DataFrame) -> dict:
-    feats = select_feature_cols(train_df)
+def _xy(data: pd.DataFrame | FeatureMatrix, feats: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    if isinstance(data, FeatureMatrix):
+        # float32 contigu : pas de copie pour le RF (qui travaille en float32)
+        return data.take(feats), np.asarray(data.y, dtype=int)
+    return data[feats].values, data["target"].values.astype(int)
 
-    X_train = train_df[feats].values
-    y_train = train_df["target"].values.astype(int)
+@profiled()
+def fit_and_eval(
+    model,
+    train_df: pd.DataFrame | FeatureMatrix,
+    val_df: pd.DataFrame | FeatureMatrix,
+) -> dict:
+    if isinstance(train_df, FeatureMatrix):
+        feats = list(train_df.columns)
+    else:
+        feats = select_feature_cols(train_df)
 
-    X_val = val_df[feats].values
-    y_val = val_df["target"].values.astype(int)
+    X_train, y_train = _xy(train_df, feats)
+    X_val, y_val = _xy(val_df, feats)
 
     model.fit(X_train, y_train)
     pred = model.predict(X_val)
@@ -43,9 +101,30 @@ def fit_and_eval(model, train_df: pd.DataFrame, val_df: pd.DataFrame) -> dict:
 def save_model(model, meta: dict, out_dir: Path) -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
     joblib.dump(model, out_dir / "model.joblib")
+    # forêt aplatie (forest.npz) pour l'inférence ligne à ligne de l'API ;
+    # supprimée si le nouveau modèle n'est pas une forêt (pas de fichier périmé)
+    stale = out_dir / FOREST_FILE
+    if stale.exists():
+        stale.unlink()
+    if export_forest(model, out_dir) is not None:
+        meta = {**meta, "flat_forest": FOREST_FILE}
     (out_dir / "metadata.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
 
-def train_compare_models(train_df: pd.DataFrame, val_df: pd.DataFrame) -> tuple[object, dict]:
+@profiled()
+def train_compare_models(
+    train_df: pd.DataFrame | FeatureMatrix,
+    val_df: pd.DataFrame | FeatureMatrix,
+    n_jobs: int = -1,
+    search: bool = False,
+    **search_kwargs,
+) -> tuple[object, dict]:
+    # n_jobs : threads du RF (1 quand l'appelant parallélise déjà, ex. walk-forward)
+    # search=True : recherche logreg / RF / XGBoost par successive halving
+    # (src.strategies.model_search, options dans search_kwargs)
+    if search:
+        from src.strategies.model_search import search_models
+        return search_models(train_df, val_df, n_jobs=n_jobs, **search_kwargs)
+
     candidates = {
         "logreg": LogisticRegression(max_iter=600),
         "rf": RandomForestClassifier(
@@ -53,7 +132,7 @@ def train_compare_models(train_df: pd.DataFrame, val_df: pd.DataFrame) -> tuple[
             max_depth=None,
             min_samples_leaf=10,
             random_state=42,
-            n_jobs=-1,
+            n_jobs=n_jobs,
         ),
     }
 
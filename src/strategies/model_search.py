@@ -0,0 +1,324 @@
+"""
+Recherche de modèles (logreg, RF, XGBoost hist) par successive halving sur
+une validation croisée temporelle.
+
+    rung 0 : toutes les configs, budget min_budget (ex. 1/9)
+    rung k : le meilleur 1/eta des configs du rung k-1, budget x eta
+    dernier rung : budget 1
+
+Le budget est la fraction des lignes d'entraînement de chaque fold (les plus
+récentes) et, pour les forêts / le boosting, la fraction du nombre d'arbres :
+les configs médiocres sont écartées après quelques fits bon marché.
+XGBoost s'arrête aussi tout seul (early stopping sur la fin de la fenêtre
+d'entraînement du fold, après un embargo) : la validation du fold ne sert
+qu'au score.
+
+Les essais (config, budget, fold) d'un rung tournent en parallèle (joblib,
+un cœur par essai) ; chaque résultat est écrit dans `cache_dir`, donc une
+recherche interrompue reprend là où elle s'était arrêtée.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, log_loss, roc_auc_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.feature_matrix import FeatureMatrix
+from src.strategies.ml_train import _xy, select_feature_cols
+
+try:
+    from xgboost import XGBClassifier
+    XGB_AVAILABLE = True
+except Exception:
+    XGB_AVAILABLE = False
+
+MODELS = ("logreg", "rf", "xgb")
+METRICS = ("roc_auc", "neg_log_loss", "f1", "accuracy")
+MIN_TRAIN_ROWS = 500
+EARLY_STOP_FRAC = 0.15  # part de la fenêtre d'entraînement réservée à l'early stopping (xgb)
+
+
+def sample_configs(
+    n_configs: int = 100,
+    models: tuple[str, ...] = MODELS,
+    seed: int = 42,
+) -> list[dict]:
+    """Configs tirées au hasard, réparties à parts égales entre les familles."""
+    models = tuple(m for m in models if m != "xgb" or XGB_AVAILABLE)
+    rng = np.random.default_rng(seed)
+    configs = []
+    for i in range(n_configs):
+        model = models[i % len(models)]
+        if model == "logreg":
+            params = {"C": float(10 ** rng.uniform(-4, 1))}
+        elif model == "rf":
+            params = {
+                "n_estimators": int(rng.choice([100, 200, 300])),
+                "max_depth": [None, 6, 10, 16][rng.integers(4)],
+                "min_samples_leaf": int(rng.choice([5, 10, 20, 50, 100])),
+                "max_features": str(rng.choice(["sqrt", "log2"])),
+                "max_samples": float(rng.choice([0.3, 0.6, 1.0])),
+            }
+        else:
+            params = {
+                "n_estimators": int(rng.choice([200, 400, 800])),
+                "max_depth": int(rng.integers(2, 8)),
+                "learning_rate": float(10 ** rng.uniform(-2.3, -0.7)),
+                "subsample": float(rng.uniform(0.5, 1.0)),
+                "colsample_bytree": float(rng.uniform(0.4, 1.0)),
+                "min_child_weight": float(10 ** rng.uniform(0, 2)),
+                "reg_lambda": float(10 ** rng.uniform(-1, 1)),
+            }
+        configs.append({"model": model, "params": params})
+    # doublons possibles pour logreg / rf : on ne garde que la 1re occurrence
+    return list({config_id(c): c for c in configs}.values())
+
+
+def config_id(config: dict) -> str:
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def make_model(config: dict, budget: float = 1.0, n_jobs: int = 1, seed: int = 42):
+    """Estimateur d'une config ; budget < 1 réduit le nombre d'arbres."""
+    p = dict(config["params"])
+    model = config["model"]
+    if model == "logreg":
+        return make_pipeline(StandardScaler(), LogisticRegression(C=p["C"], max_iter=600))
+    n_trees = max(20, int(round(p.pop("n_estimators") * budget)))
+    if model == "rf":
+        if p.get("max_samples") == 1.0:
+            p["max_samples"] = None
+        return RandomForestClassifier(n_estimators=n_trees, random_state=seed, n_jobs=n_jobs, **p)
+    if model == "xgb":
+        if not XGB_AVAILABLE:
+            raise RuntimeError("xgboost is not installed")
+        return XGBClassifier(
+            n_estimators=n_trees, tree_method="hist", early_stopping_rounds=30,
+            eval_metric="logloss", random_state=seed, n_jobs=n_jobs, **p,
+        )
+    raise ValueError(f"Unknown model: {model!r}")
+
+
+def time_series_folds(n: int, n_folds: int = 3, embargo: int = 1, min_train_frac: float = 0.4):
+    """Folds à fenêtre croissante : [0, train_end) -> [train_end + embargo, val_end)."""
+    start = int(n * min_train_frac)
+    edges = np.linspace(start, n, n_folds + 1).astype(int)
+    return [(int(edges[i]), int(edges[i]) + embargo, int(edges[i + 1])) for i in range(n_folds)]
+
+
+def _score(metric: str, y: np.ndarray, proba: np.ndarray) -> float:
+    if metric == "roc_auc":
+        return float(roc_auc_score(y, proba)) if len(np.unique(y)) > 1 else 0.5
+    if metric == "neg_log_loss":
+        return -float(log_loss(y, np.clip(proba, 1e-7, 1 - 1e-7), labels=[0, 1]))
+    pred = (proba > 0.5).astype(int)
+    if metric == "f1":
+        return float(f1_score(y, pred))
+    return float(accuracy_score(y, pred))
+
+
+def _run_trial(X, y, config, budget, fold, metric, seed) -> dict:
+    train_end, val_start, val_end = fold
+    # budget : les lignes les plus récentes du train du fold
+    n_train = max(MIN_TRAIN_ROWS, int(train_end * budget))
+    lo = max(0, train_end - n_train)
+    fit_end = train_end
+    Xv, yv = X[val_start:val_end], y[val_start:val_end]
+
+    model = make_model(config, budget, n_jobs=1, seed=seed)
+    t0 = time.perf_counter()
+    if config["model"] == "xgb":
+        # arrêt sur [es_start, train_end), séparé du train par le même embargo
+        # que le fold ; la validation du fold ne sert qu'au score
+        es_start = train_end - max(1, int((train_end - lo) * EARLY_STOP_FRAC))
+        fit_end = es_start - (val_start - train_end)
+        Xes, yes = X[es_start:train_end], y[es_start:train_end]
+        model.fit(X[lo:fit_end], y[lo:fit_end], eval_set=[(Xes, yes)], verbose=False)
+    else:
+        model.fit(X[lo:train_end], y[lo:train_end])
+    fit_s = time.perf_counter() - t0
+    proba = model.predict_proba(Xv)[:, 1]
+    n_trees = getattr(model, "n_estimators", None)
+    if config["model"] == "xgb" and getattr(model, "best_iteration", None) is not None:
+        n_trees = model.best_iteration + 1
+    return {
+        "score": _score(metric, yv, proba),
+        "fit_s": fit_s,
+        "n_train": int(fit_end - lo),
+        "n_trees": None if n_trees is None else int(n_trees),
+    }
+
+
+class TrialCache:
+    """Un fichier JSON par essai, écrit de façon atomique."""
+
+    def __init__(self, path: str | Path | None):
+        self.path = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        if self.path is None or not self._file(key).exists():
+            return None
+        return json.loads(self._file(key).read_text(encoding="utf-8"))
+
+    def put(self, key: str, result: dict) -> None:
+        if self.path is None:
+            return
+        tmp = self._file(key).with_suffix(".tmp")
+        tmp.write_text(json.dumps(result), encoding="utf-8")
+        os.replace(tmp, self._file(key))
+
+
+def _data_key(X: np.ndarray, y: np.ndarray) -> str:
+    h = hashlib.sha1()
+    h.update(str(X.shape).encode("utf-8"))
+    h.update(np.ascontiguousarray(X).view(np.uint8).data)
+    h.update(np.ascontiguousarray(y).view(np.uint8).data)
+    return h.hexdigest()[:16]
+
+
+@dataclass
+class SearchResult:
+    trials: pd.DataFrame    # un essai (config, budget, fold) par ligne
+    rungs: pd.DataFrame     # score moyen par (rung, config)
+    best: dict              # config retenue
+    best_score: float
+
+
+def successive_halving(
+    X: np.ndarray,
+    y: np.ndarray,
+    configs: list[dict],
+    n_folds: int = 3,
+    eta: int = 3,
+    min_budget: float = 1 / 9,
+    metric: str = "roc_auc",
+    embargo: int = 1,
+    n_jobs: int = -1,
+    cache_dir: str | Path | None = None,
+    seed: int = 42,
+    verbose: bool = True,
+) -> SearchResult:
+    """X, y triés dans le temps ; le score d'une config est la moyenne sur les folds."""
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {METRICS}, got {metric!r}")
+    if not configs:
+        raise ValueError("No configuration to search")
+    folds = time_series_folds(len(X), n_folds, embargo)
+    cache = TrialCache(cache_dir)
+    data_key = _data_key(X, y)
+
+    n_rungs = max(1, int(round(np.log(1 / min_budget) / np.log(eta))) + 1)
+    budgets = [min(1.0, min_budget * eta ** k) for k in range(n_rungs)]
+    budgets[-1] = 1.0
+
+    alive = list(configs)
+    trials, rungs = [], []
+    for rung, budget in enumerate(budgets):
+        tasks, keys = [], []
+        for c in alive:
+            for f, fold in enumerate(folds):
+                parts = [data_key, c, budget, fold, metric, seed]
+                if c["model"] == "xgb":
+                    parts.append(EARLY_STOP_FRAC)  # invalide les essais arrêtés sur la validation
+                key = hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+                keys.append((config_id(c), f, key))
+                tasks.append((c, fold, key))
+
+        results = {key: cache.get(key) for _, _, key in tasks}
+        todo = [(c, fold, key) for c, fold, key in tasks if results[key] is None]
+        t0 = time.perf_counter()
+        # résultats écrits au fil de l'eau : une interruption ne perd que les essais en cours
+        done = Parallel(n_jobs=n_jobs, return_as="generator")(
+            delayed(_run_trial)(X, y, c, budget, fold, metric, seed) for c, fold, _ in todo
+        )
+        for (_, _, key), res in zip(todo, done):
+            cache.put(key, res)
+            results[key] = res
+
+        for (cid, f, key), (c, _, _) in zip(keys, tasks):
+            trials.append({"rung": rung, "budget": budget, "config_id": cid, "model": c["model"], "fold": f, **results[key]})
+
+        table = pd.DataFrame([t for t in trials if t["rung"] == rung])
+        scores = table.groupby("config_id", sort=False)["score"].mean().sort_values(ascending=False)
+        rungs.extend({"rung": rung, "budget": budget, "config_id": cid, "score": s} for cid, s in scores.items())
+        if verbose:
+            print(f"rung {rung}: {len(alive)} configs x {len(folds)} folds at budget {budget:.3f} "
+                  f"({len(todo)} fits, {time.perf_counter() - t0:.1f}s), best {scores.iloc[0]:.4f}")
+
+        if rung < len(budgets) - 1:
+            keep = set(scores.index[:max(1, len(alive) // eta)])
+            alive = [c for c in alive if config_id(c) in keep]
+
+    by_id = {config_id(c): c for c in configs}
+    best_id = scores.index[0]
+    return SearchResult(
+        trials=pd.DataFrame(trials),
+        rungs=pd.DataFrame(rungs),
+        best=by_id[best_id],
+        best_score=float(scores.iloc[0]),
+    )
+
+
+def search_models(
+    train_df: pd.DataFrame | FeatureMatrix,
+    val_df: pd.DataFrame | FeatureMatrix,
+    n_configs: int = 100,
+    models: tuple[str, ...] = MODELS,
+    metric: str = "roc_auc",
+    n_folds: int = 3,
+    eta: int = 3,
+    min_budget: float = 1 / 9,
+    n_jobs: int = -1,
+    cache_dir: str | Path | None = None,
+    seed: int = 42,
+) -> tuple[object, dict]:
+    """
+    Même contrat que train_compare_models : la config gagnante de la CV
+    temporelle sur train_df est réentraînée sur tout train_df puis évaluée
+    sur val_df.
+    """
+    feats = list(train_df.columns) if isinstance(train_df, FeatureMatrix) else select_feature_cols(train_df)
+    X, y = _xy(train_df, feats)
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    Xv, yv = _xy(val_df, feats)
+
+    res = successive_halving(
+        X, y, sample_configs(n_configs, models, seed), n_folds=n_folds, eta=eta,
+        min_budget=min_budget, metric=metric, n_jobs=n_jobs, cache_dir=cache_dir, seed=seed,
+    )
+
+    model = make_model(res.best, 1.0, n_jobs=n_jobs, seed=seed)
+    if res.best["model"] == "xgb":
+        # pas de jeu d'arrêt pour le refit : nombre d'arbres retenu par l'early stopping en CV
+        last = res.trials[(res.trials["config_id"] == config_id(res.best)) & (res.trials["budget"] == 1.0)]
+        model.set_params(early_stopping_rounds=None, n_estimators=int(last["n_trees"].median()))
+    model.fit(X, y)
+    pred = model.predict(Xv)
+    meta = {
+        "features": feats,
+        "val_accuracy": float(accuracy_score(yv, pred)),
+        "val_f1": float(f1_score(yv, pred)),
+        "model_name": res.best["model"],
+        "params": res.best["params"],
+        "selected_by": f"cv_{metric}",
+        "cv_score": res.best_score,
+        "n_configs": len(res.rungs[res.rungs["rung"] == 0]),
+        "n_fits": int(len(res.trials)),
+    }
+    return model, meta
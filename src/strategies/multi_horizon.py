@@ -0,0 +1,126 @@
+"""
+Entraînement sur plusieurs horizons de cible en un seul run.
+
+Les cibles viennent de make_targets (colonnes target_h{h}, binaires ou 3
+classes). Deux modes :
+- "per_horizon"  : un modèle par horizon, fits en parallèle (joblib, un
+  cœur par horizon) ;
+- "multi_output" : un seul modèle pour toutes les colonnes (RandomForest
+  multi-sorties natif, sinon MultiOutputClassifier).
+
+Métriques de validation par horizon : accuracy, F1 (macro en 3 classes),
+ROC AUC (binaire), Sharpe du backtest des positions (bande morte 0.55 / 0.45
+en binaire, classe prédite -1 / 0 / 1 en 3 classes).
+"""
+from __future__ import annotations
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.multioutput import MultiOutputClassifier
+
+from src.profiling import profiled
+from src.strategies.backtest import backtest_batch
+from src.strategies.metrics import summary_metrics_batch
+from src.strategies.ml_infer import positions_from_proba
+from src.strategies.ml_train import select_feature_cols, target_col
+
+MODES = ("per_horizon", "multi_output")
+
+
+def make_base_model(name: str = "rf", n_jobs: int = 1):
+    # mêmes hyperparamètres que les candidats de train_compare_models
+    if name == "logreg":
+        return LogisticRegression(max_iter=600)
+    if name == "rf":
+        return RandomForestClassifier(
+            n_estimators=300, max_depth=None, min_samples_leaf=10, random_state=42, n_jobs=n_jobs,
+        )
+    raise ValueError(f"Unknown model: {name}")
+
+
+def _positions(classes: np.ndarray, proba: np.ndarray) -> np.ndarray:
+    if len(classes) == 2:
+        return positions_from_proba(proba[:, 1])
+    return classes[np.argmax(proba, axis=1)].astype(int)
+
+
+def _horizon_metrics(classes, proba, y_val, price) -> dict:
+    pred = classes[np.argmax(proba, axis=1)]
+    binary = len(classes) == 2
+    out = {
+        "val_accuracy": float(accuracy_score(y_val, pred)),
+        "val_f1": float(f1_score(y_val, pred, average="binary" if binary else "macro")),
+        "val_auc": float(roc_auc_score(y_val, proba[:, 1])) if binary and len(np.unique(y_val)) == 2 else np.nan,
+    }
+    bt = backtest_batch(price, _positions(classes, proba)[None, :])
+    out["val_sharpe"] = float(summary_metrics_batch(bt)["sharpe"].iloc[0])
+    return out
+
+
+def _fit_one(model, X_tr, y_tr, X_val, y_val, price) -> tuple[object, dict]:
+    t0 = time.perf_counter()
+    model.fit(X_tr, y_tr)
+    fit_s = time.perf_counter() - t0
+    res = _horizon_metrics(model.classes_, model.predict_proba(X_val), y_val, price)
+    return model, {**res, "fit_seconds": fit_s}
+
+
+@profiled()
+def train_multi_horizon(
+    train_df: pd.DataFrame,
+    val_df: pd.DataFrame,
+    horizons: tuple[int, ...] = (1, 4, 8, 16),
+    model: str = "rf",
+    mode: str = "per_horizon",
+    n_jobs: int = -1,
+    price_col: str = "close_15m",
+) -> tuple[dict[int, object] | object, pd.DataFrame]:
+    """
+    train_df / val_df : sorties de make_targets (mêmes horizons).
+    Renvoie ({horizon: modèle} en per_horizon, ou le modèle multi-sorties)
+    et un rapport (une ligne par horizon) trié par Sharpe de validation.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode} (expected one of {MODES})")
+    feats = select_feature_cols(train_df)
+    cols = [target_col(h) for h in horizons]
+    X_tr, X_val = train_df[feats].values, val_df[feats].values
+    Y_tr, Y_val = train_df[cols].to_numpy(), val_df[cols].to_numpy()
+    price = val_df[price_col].to_numpy(dtype=np.float64)
+
+    if mode == "per_horizon":
+        # parallélisme sur les horizons : chaque modèle sur un seul cœur
+        base = make_base_model(model, n_jobs=1)
+        done = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_one)(clone(base), X_tr, Y_tr[:, k], X_val, Y_val[:, k], price)
+            for k in range(len(horizons))
+        )
+        models = {h: m for h, (m, _) in zip(horizons, done)}
+        rows = [{"horizon": h, **res} for h, (_, res) in zip(horizons, done)]
+    else:
+        base = make_base_model(model, n_jobs=n_jobs)
+        if not isinstance(base, RandomForestClassifier):
+            base = MultiOutputClassifier(base, n_jobs=n_jobs)
+        t0 = time.perf_counter()
+        base.fit(X_tr, Y_tr)
+        fit_s = time.perf_counter() - t0
+        # RF multi-sorties : classes_ et predict_proba sont des listes (une par sortie)
+        probas = base.predict_proba(X_val)
+        classes = base.classes_ if isinstance(base, RandomForestClassifier) else \
+            [e.classes_ for e in base.estimators_]
+        models = base
+        rows = [
+            {"horizon": h, **_horizon_metrics(classes[k], probas[k], Y_val[:, k], price), "fit_seconds": fit_s}
+            for k, h in enumerate(horizons)
+        ]
+
+    report = pd.DataFrame(rows)
+    report["pos_rate"] = (Y_val == 1).mean(axis=0)
+    report["n_features"] = len(feats)
+    return models, report.sort_values("val_sharpe", ascending=False).reset_index(drop=True)
@@ -6,6 +6,8 @@ import pandas as pd
 import gymnasium as gym
 from gymnasium import spaces
 
+from src.feature_matrix import FeatureMatrix
+
 
 @dataclass
 class NormStats:
@@ -13,45 +15,79 @@ class NormStats:
     std: np.ndarray
 
 
-def compute_norm_stats(df: pd.DataFrame, feature_cols: list[str]) -> NormStats:
-    X = df[feature_cols].astype(float).values
-    mean = np.nanmean(X, axis=0)
-    std = np.nanstd(X, axis=0)
+def compute_norm_stats(df: pd.DataFrame | FeatureMatrix, feature_cols: list[str]) -> NormStats:
+    if isinstance(df, FeatureMatrix):
+        X = df.take(feature_cols)
+    else:
+        X = df[feature_cols].astype(float).values
+    # accumulation en float64 même si X est en float32
+    mean = np.nanmean(X, axis=0, dtype=np.float64)
+    std = np.nanstd(X, axis=0, dtype=np.float64)
     std = np.where(std == 0, 1.0, std)
     return NormStats(mean=mean, std=std)
 
 
+def _prepare(
+    df: pd.DataFrame | FeatureMatrix,
+    feature_cols: list[str],
+    price_col: str,
+    norm: NormStats | None,
+) -> tuple[pd.DataFrame | None, np.ndarray, np.ndarray, NormStats]:
+    """
+    (df trié ou None, observations normalisées float32, log-returns, norm)
+    partagés par les envs. Les observations sont en lecture seule : reset /
+    step renvoient des vues de ces lignes (sans copie), à copier avant de
+    les modifier.
+    """
+    if isinstance(df, FeatureMatrix):
+        # lignes supposées triées (construites depuis un parquet trié)
+        d = None
+        X = df.take(feature_cols)
+        price = df.price if df.price is not None else df.take([price_col])[:, 0]
+    else:
+        d = df if df["timestamp"].is_monotonic_increasing else df.sort_values("timestamp")
+        d = d.reset_index(drop=True)
+        X = d[feature_cols].to_numpy(dtype=np.float64)
+        price = d[price_col].to_numpy(dtype=np.float64)
+
+    # precompute returns (log returns)
+    ret = np.log(np.asarray(price, dtype=np.float64))
+    ret = np.diff(ret, prepend=np.nan)  # ret[t] = log(p[t]) - log(p[t-1])
+
+    if norm is None:
+        norm = compute_norm_stats(df, feature_cols)
+    # observations normalisées stockées directement en float32
+    mean = norm.mean.astype(X.dtype)
+    std = norm.std.astype(X.dtype)
+    obs = ((X - mean) / std).astype(np.float32, copy=False)
+    np.nan_to_num(obs, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    obs.flags.writeable = False
+    return d, obs, ret, norm
+
+
 class TradingEnv(gym.Env):
     """
     Discrete actions: 0=SHORT(-1), 1=FLAT(0), 2=LONG(+1)
     Reward = pos_{t} * ret_{t+1} - cost * |pos_t - pos_{t-1}|
+    Observations : vues en lecture seule de self.X (voir _prepare).
     """
     metadata = {"render_modes": []}
 
     def __init__(
         self,
-        df: pd.DataFrame,
+        df: pd.DataFrame | FeatureMatrix,
         feature_cols: list[str],
         price_col: str = "close_15m",
         transaction_cost: float = 0.00005,
         norm: NormStats | None = None,
     ):
         super().__init__()
-        self.df = df.sort_values("timestamp").reset_index(drop=True).copy()
         self.feature_cols = feature_cols
         self.price_col = price_col
         self.tc = float(transaction_cost)
 
-        # precompute returns (log returns)
-        self.ret = np.log(self.df[price_col].astype(float).values)
-        self.ret = np.diff(self.ret, prepend=np.nan)  # ret[t] = log(p[t]) - log(p[t-1])
-
-        X = self.df[feature_cols].astype(float).values
-        if norm is None:
-            norm = compute_norm_stats(self.df, feature_cols)
-        self.norm = norm
-        self.X = (X - self.norm.mean) / self.norm.std
-        self.X = np.nan_to_num(self.X, nan=0.0, posinf=0.0, neginf=0.0)
+        self.df, self.X, self.ret, self.norm = _prepare(df, feature_cols, price_col, norm)
+        self.n = len(self.X)
 
         self.action_space = spaces.Discrete(3)
         self.observation_space = spaces.Box(
@@ -67,7 +103,7 @@ class TradingEnv(gym.Env):
         self.t = 1  # start at 1 because ret[0] is nan
         self.pos_prev = 0
         self.pos = 0
-        obs = self.X[self.t].astype(np.float32)
+        obs = self.X[self.t]
         info = {}
         return obs, info
 
@@ -85,9 +121,9 @@ class TradingEnv(gym.Env):
         done = False
         truncated = False
 
-        if self.t + 1 >= len(self.df):
+        if self.t + 1 >= self.n:
             done = True
-            obs = self.X[self.t].astype(np.float32)
+            obs = self.X[self.t]
             return obs, 0.0, done, truncated, {"pos": self.pos}
 
         r_next = float(self.ret[self.t + 1])
@@ -97,6 +133,6 @@ class TradingEnv(gym.Env):
         self.pos_prev = self.pos
         self.t += 1
 
-        obs = self.X[self.t].astype(np.float32)
+        obs = self.X[self.t]
         info = {"pos": self.pos, "cost": cost, "ret_next": r_next}
         return obs, float(reward), done, truncated, info
@@ -4,9 +4,12 @@ import json
 import pandas as pd
 
 from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecMonitor
 
 from src.strategies.ml_train import make_target  # juste pour drop la dernière ligne future si besoin
+from src.profiling import profiled, stage
 from src.strategies.rl_env import TradingEnv, compute_norm_stats
+from src.strategies.rl_vec_env import BatchTradingEnv
 
 
 def select_feature_cols(df: pd.DataFrame) -> list[str]:
@@ -17,13 +20,20 @@ def select_feature_cols(df: pd.DataFrame) -> list[str]:
     return cols
 
 
+@profiled()
 def train_ppo(
     train_df: pd.DataFrame,
     transaction_cost: float,
     out_dir: Path,
     total_timesteps: int = 200_000,
     seed: int = 42,
+    n_envs: int = 1,
+    episode_len: int | None = None,
+    n_steps: int = 512,
+    batch_size: int = 32,
 ) -> None:
+    # n_envs > 1 : BatchTradingEnv (N épisodes vectorisés, départs aléatoires,
+    # fenêtres de episode_len pas) ; rollout PPO = n_steps * n_envs transitions
     out_dir.mkdir(parents=True, exist_ok=True)
 
     # safety: align like ML (avoid last-row target shift issues)
@@ -32,12 +42,23 @@ def train_ppo(
     feats = select_feature_cols(train_df)
     norm = compute_norm_stats(train_df, feats)
 
-    env = TradingEnv(
-        df=train_df,
-        feature_cols=feats,
-        transaction_cost=transaction_cost,
-        norm=norm,
-    )
+    if n_envs > 1:
+        env = VecMonitor(BatchTradingEnv(
+            df=train_df,
+            feature_cols=feats,
+            n_envs=n_envs,
+            transaction_cost=transaction_cost,
+            norm=norm,
+            episode_len=episode_len,
+            seed=seed,
+        ))
+    else:
+        env = TradingEnv(
+            df=train_df,
+            feature_cols=feats,
+            transaction_cost=transaction_cost,
+            norm=norm,
+        )
 
     policy_kwargs = dict(net_arch=[32, 32])  # au lieu de plus gros
 
@@ -47,13 +68,15 @@ def train_ppo(
         verbose=1,
         seed=seed,
         learning_rate=3e-4,
-        n_steps=512,
-        batch_size=32,
+        n_steps=n_steps,
+        batch_size=batch_size,
         gamma=0.99,
         policy_kwargs=policy_kwargs,
     )
 
-    model.learn(total_timesteps=total_timesteps)
+    with stage("rl_train.learn") as st:
+        model.learn(total_timesteps=total_timesteps)
+        st.rows_out = total_timesteps
 
     model.save(out_dir / "ppo_model")
     meta = {
@@ -61,6 +84,8 @@ def train_ppo(
         "transaction_cost": transaction_cost,
         "total_timesteps": total_timesteps,
         "seed": seed,
+        "n_envs": n_envs,
+        "episode_len": episode_len,
         "features": feats,
         "norm_mean": norm.mean.tolist(),
         "norm_std": norm.std.tolist(),
@@ -0,0 +1,168 @@
+"""
+Version vectorisée de TradingEnv : N épisodes avancés ensemble, implémentant
+directement l'interface VecEnv de stable-baselines3 (pas de DummyVecEnv).
+
+Même dynamique que TradingEnv pour chaque env :
+    action 0/1/2 -> position -1/0/+1
+    reward = pos_t * ret_{t+1} - cost * |pos_t - pos_{t-1}|
+    fin de l'historique : reward 0 et terminated (comme TradingEnv)
+
+Chaque épisode commence à un offset aléatoire (random_start=True) et peut
+être limité à `episode_len` pas (fin = troncature, TimeLimit.truncated pour
+que PPO bootstrape la valeur). Un pas = quelques opérations numpy sur les N
+envs ; les envs terminés sont réinitialisés automatiquement (convention
+VecEnv, observation finale dans info["terminal_observation"]).
+"""
+from __future__ import annotations
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from src.feature_matrix import FeatureMatrix
+from src.strategies.rl_env import NormStats, _prepare
+
+
+class BatchTradingEnv(VecEnv):
+    def __init__(
+        self,
+        df: pd.DataFrame | FeatureMatrix,
+        feature_cols: list[str],
+        n_envs: int = 16,
+        price_col: str = "close_15m",
+        transaction_cost: float = 0.00005,
+        norm: NormStats | None = None,
+        episode_len: int | None = None,
+        random_start: bool = True,
+        seed: int | None = None,
+    ):
+        self.feature_cols = feature_cols
+        self.price_col = price_col
+        self.tc = float(transaction_cost)
+        self.df, self.X, self.ret, self.norm = _prepare(df, feature_cols, price_col, norm)
+        self.n = len(self.X)
+        if episode_len is not None and not 0 < episode_len <= self.n - 2:
+            raise ValueError(f"episode_len must be in [1, {self.n - 2}], got {episode_len}")
+        self.episode_len = episode_len
+        self.random_start = random_start
+        self.render_mode = None
+        self._rng = np.random.default_rng(seed)
+
+        self.t = np.ones(n_envs, dtype=np.int64)
+        self.start = np.ones(n_envs, dtype=np.int64)
+        self.pos = np.zeros(n_envs, dtype=np.int8)
+        self.pos_prev = np.zeros(n_envs, dtype=np.int8)
+        self.last_cost = np.zeros(n_envs)
+        self._actions = np.ones(n_envs, dtype=np.int64)
+        # infos partagés (vides) des envs non terminés : VecMonitor / PPO ne
+        # modifient que ceux des envs terminés, recréés à chaque fin d'épisode
+        self._empty_infos = [{} for _ in range(n_envs)]
+
+        super().__init__(
+            n_envs,
+            spaces.Box(low=-np.inf, high=np.inf, shape=(len(feature_cols),), dtype=np.float32),
+            spaces.Discrete(3),
+        )
+
+    # -------------------------
+    # dynamique
+    # -------------------------
+    def _reset_envs(self, idx: np.ndarray) -> None:
+        if self.random_start:
+            # ret[0] est NaN : départ >= 1 ; au moins un pas récompensé (ou episode_len)
+            last = self.n - 1 - (self.episode_len or 1)
+            self.start[idx] = self._rng.integers(1, max(last, 1) + 1, size=len(idx))
+        else:
+            self.start[idx] = 1
+        self.t[idx] = self.start[idx]
+        self.pos[idx] = 0
+        self.pos_prev[idx] = 0
+
+    def reset(self) -> np.ndarray:
+        seeds = [s for s in self._seeds if s is not None]
+        if seeds:
+            self._rng = np.random.default_rng(seeds[0])
+        self._reset_seeds()
+        self._reset_options()
+        self._reset_envs(np.arange(self.num_envs))
+        return self.X[self.t]
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._actions = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self):
+        pos = (self._actions - 1).astype(np.int8)
+        self.pos = pos
+        nxt = self.t + 1
+        terminated = nxt >= self.n
+        active = ~terminated
+
+        r_next = self.ret[np.minimum(nxt, self.n - 1)]
+        cost = self.tc * np.abs(pos - self.pos_prev)
+        rewards = np.where(active, pos * r_next - cost, 0.0).astype(np.float32)
+        self.last_cost = np.where(active, cost, 0.0)
+
+        self.pos_prev = np.where(active, pos, self.pos_prev)
+        self.t = np.where(active, nxt, self.t)
+        if self.episode_len is not None:
+            truncated = active & (self.t - self.start >= self.episode_len)
+        else:
+            truncated = np.zeros(self.num_envs, dtype=bool)
+        dones = terminated | truncated
+
+        obs = self.X[self.t]
+        infos = self._empty_infos
+        if dones.any():
+            infos = list(infos)
+            done_idx = np.flatnonzero(dones)
+            for i in done_idx:
+                infos[i] = {"terminal_observation": obs[i].copy(), "TimeLimit.truncated": bool(truncated[i])}
+            self._reset_envs(done_idx)
+            obs[done_idx] = self.X[self.t[done_idx]]
+        return obs, rewards, dones, infos
+
+    def close(self) -> None:
+        pass
+
+    # -------------------------
+    # interface VecEnv
+    # -------------------------
+    # Un seul objet porte les N envs : les tableaux d'état par env sont
+    # indexables, le reste (attributs, méthodes) est commun à tous les envs et
+    # ne peut pas être modifié/appelé pour un sous-ensemble seulement.
+    _PER_ENV_ATTRS = ("t", "start", "pos", "pos_prev", "last_cost")
+
+    def _covers_all(self, indices) -> bool:
+        return sorted(self._get_indices(indices)) == list(range(self.num_envs))
+
+    def get_attr(self, attr_name: str, indices=None) -> list[Any]:
+        value = getattr(self, attr_name)
+        idx = list(self._get_indices(indices))
+        if attr_name in self._PER_ENV_ATTRS:
+            return [value[i].item() for i in idx]
+        return [value for _ in idx]
+
+    def set_attr(self, attr_name: str, value: Any, indices=None) -> None:
+        if attr_name in self._PER_ENV_ATTRS:
+            getattr(self, attr_name)[list(self._get_indices(indices))] = value
+        elif self._covers_all(indices):
+            setattr(self, attr_name, value)
+        else:
+            raise NotImplementedError(
+                f"BatchTradingEnv: '{attr_name}' is shared by all envs, cannot set it for indices={indices}"
+            )
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> list[Any]:
+        # la méthode agit sur les N envs à la fois : un seul appel, résultat
+        # répété pour chaque index (sinon reset() réinitialiserait N fois)
+        if not self._covers_all(indices):
+            raise NotImplementedError(
+                f"BatchTradingEnv: '{method_name}' acts on all envs, cannot call it for indices={indices}"
+            )
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result for _ in range(self.num_envs)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> list[bool]:
+        return [False for _ in self._get_indices(indices)]
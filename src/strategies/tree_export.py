@@ -0,0 +1,150 @@
+"""
+Export d'une forêt sklearn (RandomForestClassifier) en tableaux de nœuds
+contigus, et évaluation NumPy / numba sans passer par pandas ni joblib.
+
+Tous les arbres sont concaténés : un nœud = (feature, seuil, fils gauche,
+fils droit, NaN à gauche ?, proba "up"). Les feuilles bouclent sur
+elles-mêmes (fils = elles-mêmes), ce qui permet de descendre tous les arbres
+d'un même pas pendant `max_depth` itérations, sans test de feuille.
+
+Mêmes comparaisons que sklearn : X converti en float32 puis comparé au seuil
+float64 (x <= seuil -> gauche), NaN envoyés du côté appris à l'entraînement,
+proba = moyenne des proportions de classes des feuilles.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble._forest import ForestClassifier
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
+FOREST_FILE = "forest.npz"
+
+
+@dataclass
+class FlatForest:
+    feature: np.ndarray     # (n_nodes,) int32, 0 pour les feuilles
+    threshold: np.ndarray   # (n_nodes,) float64
+    left: np.ndarray        # (n_nodes,) int32, index global ; feuille -> elle-même
+    right: np.ndarray       # (n_nodes,) int32
+    nan_left: np.ndarray    # (n_nodes,) bool, côté des valeurs manquantes
+    value: np.ndarray       # (n_nodes,) float64, proba de la classe 1 (feuilles)
+    roots: np.ndarray       # (n_trees,) int32
+    max_depth: int
+    n_features: int
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatForest":
+        if not isinstance(model, ForestClassifier) or hasattr(model, "estimators_features_"):
+            raise TypeError(f"Only sklearn forest classifiers can be flattened, got {type(model).__name__}")
+        classes = list(model.classes_)
+        if 1 not in classes:
+            raise ValueError(f"Model has no class 1: {classes}")
+        k = classes.index(1)
+
+        parts, roots, offset, depth = [], [], 0, 0
+        for est in model.estimators_:
+            t = est.tree_
+            n = t.node_count
+            leaf = t.children_left == -1
+            own = np.arange(n) + offset
+            value = t.value[:, 0, :]
+            mgl = getattr(t, "missing_go_to_left", None)
+            parts.append((
+                np.where(leaf, 0, t.feature),
+                t.threshold,
+                np.where(leaf, own, t.children_left + offset),
+                np.where(leaf, own, t.children_right + offset),
+                np.zeros(n, dtype=bool) if mgl is None else mgl.astype(bool),
+                value[:, k] / value.sum(axis=1),
+            ))
+            roots.append(offset)
+            offset += n
+            depth = max(depth, t.max_depth)
+
+        cols = list(zip(*parts))
+        return cls(
+            feature=np.concatenate(cols[0]).astype(np.int32),
+            threshold=np.concatenate(cols[1]).astype(np.float64),
+            left=np.concatenate(cols[2]).astype(np.int32),
+            right=np.concatenate(cols[3]).astype(np.int32),
+            nan_left=np.concatenate(cols[4]),
+            value=np.concatenate(cols[5]).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=int(depth),
+            n_features=int(model.n_features_in_),
+        )
+
+    def save(self, path: str | Path) -> None:
+        np.savez(path, **{f.name: getattr(self, f.name) for f in fields(self)})
+
+    @classmethod
+    def load(cls, path: str | Path) -> "FlatForest":
+        with np.load(path) as z:
+            d = {f.name: z[f.name] for f in fields(cls)}
+        d["max_depth"] = int(d["max_depth"])
+        d["n_features"] = int(d["n_features"])
+        return cls(**d)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Proba de la classe 1 pour chaque ligne de X (n, n_features)."""
+        X = np.atleast_2d(np.asarray(X)).astype(np.float32).astype(np.float64)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, forest expects {self.n_features}")
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = (x <= self.threshold[node]) | (np.isnan(x) & self.nan_left[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].mean(axis=1)
+
+    def predict_one(self, x: np.ndarray) -> float:
+        """Une seule ligne (n_features,) : la latence de l'API."""
+        x = np.asarray(x).astype(np.float32).astype(np.float64)
+        if NUMBA_AVAILABLE:
+            return _predict_one_numba(
+                x, self.feature, self.threshold, self.left, self.right, self.nan_left, self.value, self.roots,
+            )
+        node = self.roots
+        for _ in range(self.max_depth):
+            v = x[self.feature[node]]
+            go_left = (v <= self.threshold[node]) | (np.isnan(v) & self.nan_left[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return float(self.value[node].mean())
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _predict_one_numba(x, feature, threshold, left, right, nan_left, value, roots):
+        total = 0.0
+        for t in range(len(roots)):
+            node = roots[t]
+            while left[node] != node:
+                v = x[feature[node]]
+                if v <= threshold[node] or (v != v and nan_left[node]):
+                    node = left[node]
+                else:
+                    node = right[node]
+            total += value[node]
+        return total / len(roots)
+
+
+def export_forest(model, model_dir: str | Path) -> Path | None:
+    """
+    Écrit forest.npz si le modèle est une forêt sklearn (RandomForest /
+    ExtraTrees), sinon ne fait rien. Les autres ensembles d'arbres (ex.
+    BaggingClassifier avec max_features < 1, qui ne voit qu'un sous-ensemble
+    de colonnes par arbre) restent servis par le modèle joblib.
+    """
+    if not isinstance(model, ForestClassifier) or hasattr(model, "estimators_features_"):
+        return None
+    path = Path(model_dir) / FOREST_FILE
+    FlatForest.from_sklearn(model).save(path)
+    return path
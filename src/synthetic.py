@@ -0,0 +1,166 @@
+"""
+Générateur déterministe de barres M1 OHLCV façon GBPUSD (format HistData),
+pour les benchmarks et les essais sans data/.
+
+    - heures EST sans DST comme HistData : marché ouvert du dimanche 17:00 au
+      vendredi 16:59, fermé le 25/12 et le 1/1 (gaps de week-end)
+    - volatilité intraday (Asie calme, Londres / New York plus agités), régime
+      de volatilité lent (AR(1) journalier), rendements Student-t
+    - quelques minutes manquantes et de rares barres invalides (high < low,
+      prix nul, clôture hors du range, prix manquant, timestamp dupliqué)
+
+La même graine donne les mêmes barres ; chaque année a son propre flux
+aléatoire, donc générer 1 an ou les 20 premiers donne la même première année.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from src.cleaning import clean_m15
+from src.data_import import M1_COLUMNS
+from src.m15_agg import aggregate_m15
+
+START_PRICE = 1.25
+BASE_VOL = 1.1e-4        # écart-type d'un rendement M1 en séance "normale"
+MISSING_RATE = 0.003     # minutes sans cotation
+INVALID_RATE = 1e-4      # barres invalides injectées
+
+# multiplicateur de volatilité par heure EST (0h..23h)
+_HOURLY_VOL = np.array([
+    0.6, 0.6, 0.8, 1.2, 1.3, 1.3, 1.2, 1.1, 1.5, 1.6, 1.5, 1.2,
+    1.0, 0.9, 0.8, 0.7, 0.6, 0.5, 0.5, 0.5, 0.5, 0.6, 0.6, 0.6,
+])
+
+
+def trading_minutes(year: int) -> pd.DatetimeIndex:
+    """Minutes ouvertes d'une année (horloge HistData)."""
+    idx = pd.date_range(f"{year}-01-01", f"{year}-12-31 23:59", freq="1min")
+    dow, hour = idx.dayofweek, idx.hour
+    closed = (dow == 5) | ((dow == 4) & (hour >= 17)) | ((dow == 6) & (hour < 17))
+    closed |= ((idx.month == 12) & (idx.day == 25)) | ((idx.month == 1) & (idx.day == 1))
+    return idx[~closed]
+
+
+def _year_bars(year: int, seed: int, start_price: float, invalid_rate: float) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, year])
+    idx = trading_minutes(year)
+    idx = idx[rng.random(len(idx)) >= MISSING_RATE]
+    n = len(idx)
+
+    # régime de volatilité : AR(1) sur le log-vol, un pas par jour
+    day = (idx.normalize() - idx[0].normalize()).days.to_numpy()
+    n_days = int(day[-1]) + 1
+    shocks = rng.normal(0.0, 0.15, n_days)
+    log_vol = np.empty(n_days)
+    log_vol[0] = shocks[0]
+    for i in range(1, n_days):
+        log_vol[i] = 0.97 * log_vol[i - 1] + shocks[i]
+
+    # temps écoulé depuis la barre précédente (gaps de week-end plafonnés à 1h)
+    gap = np.ones(n)
+    gap[1:] = np.diff(idx.as_unit("s").asi8) / 60.0
+    sd = BASE_VOL * _HOURLY_VOL[idx.hour] * np.exp(log_vol[day]) * np.sqrt(np.minimum(gap, 60.0))
+    ret = sd * rng.standard_t(4, n) / np.sqrt(2.0)   # variance unitaire pour t(4)
+
+    close = start_price * np.exp(np.cumsum(ret))
+    open_ = np.r_[start_price, close[:-1]]
+    wick = np.abs(rng.normal(0.0, 0.5, (2, n))) * sd * close
+    d = pd.DataFrame({
+        "timestamp": idx.as_unit("us"),
+        "open": open_.round(5),
+        "high": (np.maximum(open_, close) + wick[0]).round(5),
+        "low": (np.minimum(open_, close) - wick[1]).round(5),
+        "close": close.round(5),
+        "volume": np.zeros(n, dtype=np.int64),
+    })
+
+    bad = np.flatnonzero(rng.random(n) < invalid_rate)
+    kind = rng.integers(0, 5, len(bad))
+    o, h, l, c = (d[col].to_numpy(copy=True) for col in ("open", "high", "low", "close"))
+    for i, k in zip(bad, kind):
+        if k == 0:
+            h[i], l[i] = l[i], h[i]
+        elif k == 1:
+            o[i] = h[i] = l[i] = c[i] = 0.0
+        elif k == 2:
+            c[i] = round(h[i] * 1.01, 5)
+        elif k == 3:
+            c[i] = np.nan
+    d["open"], d["high"], d["low"], d["close"] = o, h, l, c
+    dup = bad[(kind == 4) & (bad > 0)]
+    if len(dup):
+        # une ligne répétée avec le timestamp de la barre précédente
+        extra = d.iloc[dup].assign(timestamp=d["timestamp"].to_numpy()[dup - 1])
+        d = pd.concat([d, extra]).sort_values("timestamp", kind="stable", ignore_index=True)
+    return d
+
+
+def iter_synthetic_m1(
+    years: int = 1,
+    start_year: int = 2020,
+    seed: int = 42,
+    invalid_rate: float = INVALID_RATE,
+) -> Iterator[pd.DataFrame]:
+    """Une DataFrame (colonnes de load_m1_csv) par année, prix continus d'une année à l'autre."""
+    price = START_PRICE
+    for year in range(start_year, start_year + years):
+        d = _year_bars(year, seed, price, invalid_rate)
+        price = float(d["close"].dropna().iloc[-1]) or price
+        yield d[M1_COLUMNS]
+
+
+def synthetic_m1(
+    years: int = 1,
+    start_year: int = 2020,
+    seed: int = 42,
+    invalid_rate: float = INVALID_RATE,
+) -> pd.DataFrame:
+    return pd.concat(list(iter_synthetic_m1(years, start_year, seed, invalid_rate)), ignore_index=True)
+
+
+def synthetic_m15(years: int = 1, start_year: int = 2020, seed: int = 42) -> pd.DataFrame:
+    """Bougies M15 nettoyées (aggregate_m15 + clean_m15, avec ret) des barres synthétiques."""
+    m15 = aggregate_m15(synthetic_m1(years, start_year, seed))
+    return clean_m15(m15, assume_sorted=True)[0]
+
+
+def write_m1_csv(df: pd.DataFrame, path: str | Path) -> None:
+    """CSV HistData (date, heure, OHLCV, sans en-tête), relisible par load_m1_csv."""
+    ts = pd.DatetimeIndex(df["timestamp"])
+    # strftime sur les jours / minutes distincts seulement (beaucoup plus rapide)
+    days, day_code = np.unique(ts.normalize().asi8, return_inverse=True)
+    day_str = pd.DatetimeIndex(days.astype(f"datetime64[{ts.unit}]")).strftime("%Y.%m.%d").to_numpy()
+    minute = (ts.hour * 60 + ts.minute).to_numpy()
+    time_str = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)])
+    table = pa.table({
+        "date": day_str[day_code],
+        "time": time_str[minute],
+        # valeurs déjà arrondies à 5 décimales : écriture la plus courte, NaN -> champ vide
+        **{c: pa.array(df[c].to_numpy(), from_pandas=True) for c in ("open", "high", "low", "close", "volume")},
+    })
+    pacsv.write_csv(table, str(path), pacsv.WriteOptions(include_header=False, quoting_style="none"))
+
+
+def write_synthetic_m1_csvs(
+    out_dir: str | Path,
+    years: int = 1,
+    start_year: int = 2020,
+    seed: int = 42,
+    symbol: str = "SYNTH",
+    invalid_rate: float = INVALID_RATE,
+) -> list[Path]:
+    """Un fichier DAT_MT_<symbol>_M1_<année>.csv par année, comme les exports HistData."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for d in iter_synthetic_m1(years, start_year, seed, invalid_rate):
+        year = int(d["timestamp"].iloc[0].year)
+        path = out_dir / f"DAT_MT_{symbol}_M1_{year}.csv"
+        write_m1_csv(d, path)
+        paths.append(path)
+    return paths
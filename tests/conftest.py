@@ -0,0 +1,10 @@
+import pandas as pd
+import pytest
+
+from src.synthetic import synthetic_m15
+
+
+@pytest.fixture(scope="session")
+def m15() -> pd.DataFrame:
+    # ~1 mois de bougies M15 synthétiques nettoyées : assez pour le warm-up (ema_200)
+    return synthetic_m15(1).iloc[:3000].reset_index(drop=True)
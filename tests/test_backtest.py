@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.backtest import backtest_batch, backtest_m15
+
+COLS = ["ret", "strat_ret_gross", "trade", "cost", "strat_ret_net", "equity"]
+
+
+@pytest.fixture(scope="module")
+def bars(m15) -> pd.DataFrame:
+    return m15[["timestamp", "close_15m"]].iloc[:2000].reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def positions(bars) -> dict[str, np.ndarray]:
+    n = len(bars)
+    rng = np.random.default_rng(0)
+    with_nan = rng.integers(-1, 2, n).astype(float)
+    with_nan[rng.random(n) < 0.05] = np.nan
+    return {
+        "long": np.ones(n),
+        "flat": np.zeros(n),
+        "random": rng.integers(-1, 2, n).astype(float),
+        "sparse": np.where(rng.random(n) < 0.02, 1.0, 0.0),
+        "nan_and_out_of_range": np.where(rng.random(n) < 0.1, 2.0, with_nan),
+    }
+
+
+@pytest.mark.parametrize("cost", [0.0, 0.00005, 0.001])
+def test_batch_matches_backtest_m15_exactly(bars, positions, cost):
+    bt = backtest_batch(bars["close_15m"].to_numpy(), positions, transaction_cost=cost)
+    assert bt.names == list(positions)
+    for name, pos in positions.items():
+        ref = backtest_m15(bars.assign(position=pos), transaction_cost=cost)
+        for col in COLS:
+            np.testing.assert_array_equal(bt.row(name)[col].to_numpy(), ref[col].to_numpy(), err_msg=f"{name}.{col}")
+        assert bt.n_trades[bt.names.index(name)] == int((ref["trade"] > 0).sum())
+
+
+def test_matrix_positions_and_length_check(bars, positions):
+    price = bars["close_15m"].to_numpy()
+    mat = np.vstack(list(positions.values()))
+    by_dict = backtest_batch(price, positions)
+    by_mat = backtest_batch(price, mat)
+    np.testing.assert_array_equal(by_mat.equity, by_dict.equity)
+    with pytest.raises(ValueError):
+        backtest_batch(price[:-1], mat)
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cleaning import clean_m15, rejection_mask
+from src.m15_agg import aggregate_m15
+from src.synthetic import synthetic_m1
+
+
+@pytest.fixture(scope="module")
+def raw_m15() -> pd.DataFrame:
+    return aggregate_m15(synthetic_m1(1)).iloc[:6000].reset_index(drop=True)
+
+
+def test_report_is_json_and_mask_optional(raw_m15):
+    out, report = clean_m15(raw_m15)
+    out2, report2, mask = clean_m15(raw_m15, keep_mask=True)
+    assert report == report2
+    pd.testing.assert_frame_equal(out, out2)
+    assert len(mask) == len(raw_m15)
+    assert int((mask != 0).sum()) == report["rows_in"] - report["rows_out"] > 0
+
+
+def test_mask_follows_caller_row_order(raw_m15):
+    shuffled = raw_m15.sample(frac=1.0, random_state=0)
+    shuffled.index = np.arange(len(shuffled))[::-1]  # index non positionnel
+    out, report, mask = clean_m15(shuffled, keep_mask=True)
+
+    np.testing.assert_array_equal(mask, rejection_mask(shuffled))
+    rejected = shuffled[mask != 0]
+    assert len(rejected) == report["rows_in"] - report["rows_out"]
+    assert not rejected["timestamp"].isin(out["timestamp"]).any()
+    pd.testing.assert_frame_equal(out, clean_m15(raw_m15)[0])
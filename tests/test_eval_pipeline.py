@@ -0,0 +1,30 @@
+import pytest
+
+from src.evaluation.eval_pipeline import _code_files, build_trading_pipeline
+
+
+@pytest.fixture
+def pipe(tmp_path):
+    return build_trading_pipeline([], include_rl=False, cache_dir=tmp_path)
+
+
+def test_stage_code_includes_transitive_src_imports(pipe):
+    assert {"src.cleaning", "src.data_import"} <= set(_code_files(pipe.stages["clean"].code))
+    for name in ("ml_train", "ml_predict"):
+        files = set(_code_files(pipe.stages[name].code))
+        assert {"src.feature_matrix", "src.strategies.tree_export"} <= files, name
+
+
+def test_set_params_rejects_unknown_stage(pipe):
+    with pytest.raises(ValueError, match="ml_predcit"):
+        pipe.set_params({"ml_predcit": {"threshold_long": 0.6}})
+
+
+def test_set_params_changes_only_downstream_keys(pipe):
+    before = {n: pipe.key(n) for n in ("features", "ml_predict", "ml_backtest", "baselines_backtest")}
+    pipe.set_params({"ml_predict": {"threshold_long": 0.6}})
+    after = {n: pipe.key(n) for n in before}
+    assert after["features"] == before["features"]
+    assert after["baselines_backtest"] == before["baselines_backtest"]
+    assert after["ml_predict"] != before["ml_predict"]
+    assert after["ml_backtest"] != before["ml_backtest"]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.execution import simulate_execution
+
+T0 = pd.Timestamp("2024-01-02 00:00")
+DECISIONS = pd.date_range(T0, periods=3, freq="15min")
+
+
+def flat_bid_bars(price: float = 1.0, n: int = 30) -> pd.DataFrame:
+    # barres M1 couvrant les décisions 0 et 1 (disponibles à T + 15 min)
+    return pd.DataFrame({
+        "timestamp": pd.date_range(T0 + pd.Timedelta("15min"), periods=n, freq="1min"),
+        "open": price, "high": price, "low": price, "close": price,
+    })
+
+
+def test_bid_quotes_buy_at_bid_plus_full_spread():
+    m1 = flat_bid_bars()
+    spread = 0.0002
+    res = simulate_execution(m1, DECISIONS, np.array([[1, 0, 0]]), spread=spread, quote="bid")
+    # achat à l'ask (bid + spread), revente au bid coté
+    assert res.net.sum() == pytest.approx(np.log(1.0 / (1.0 + spread)), abs=1e-12)
+    assert res.cost.sum() == pytest.approx(-np.log(1.0 / (1.0 + spread)), rel=1e-6)
+
+    mid = simulate_execution(m1, DECISIONS, np.array([[1, 0, 0]]), spread=spread, quote="mid")
+    assert mid.net.sum() == pytest.approx(np.log((1.0 - spread / 2) / (1.0 + spread / 2)), abs=1e-12)
+
+
+def test_short_stop_triggers_on_bid_plus_spread():
+    m1 = flat_bid_bars()
+    m1.loc[5, "high"] = 1.00015   # high bid sous le stop, high ask au-dessus
+    short = np.array([[-1, -1, 0]])
+    res = simulate_execution(m1, DECISIONS, short, stop_loss=0.0003, spread=0.0002, quote="bid")
+    assert res.n_stop_loss[0] == 1
+    assert res.position[0, 5] == 0 and res.position[0, 4] == -1
+
+    no_spread = simulate_execution(m1, DECISIONS, short, stop_loss=0.0003, spread=0.0, quote="bid")
+    assert no_spread.n_stop_loss[0] == 0
+
+
+def test_unknown_quote_raises():
+    with pytest.raises(ValueError, match="quote"):
+        simulate_execution(flat_bid_bars(), DECISIONS, np.array([[1, 0, 0]]), quote="ask")
@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from src.feature_engine import IncrementalFeatureEngine
+from src.features import FEATURE_COLS, add_features
+
+COLS = ["timestamp", *FEATURE_COLS]
+
+
+def _reference(m15: pd.DataFrame) -> pd.DataFrame:
+    return add_features(m15)[COLS].reset_index(drop=True)
+
+
+def _assert_close(out: pd.DataFrame, ref: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(out, ref, check_exact=False, rtol=1e-9, atol=1e-12, check_dtype=False)
+
+
+def test_stream_matches_add_features(m15):
+    eng = IncrementalFeatureEngine()
+    rows = [r for r in map(eng.update, m15.to_dict("records")) if r is not None]
+    _assert_close(pd.DataFrame(rows, columns=COLS), _reference(m15))
+    assert eng.ready
+
+
+def test_update_many_matches_add_features(m15):
+    _assert_close(IncrementalFeatureEngine().update_many(m15), _reference(m15))
+
+
+def test_state_roundtrip_mid_stream(m15, tmp_path):
+    # coupure pendant le warm-up (ADX / EMA 200 pas encore prêts) et après
+    ref = _reference(m15)
+    for cut in (20, 150, len(m15) // 2):
+        eng = IncrementalFeatureEngine()
+        first = eng.update_many(m15.iloc[:cut])
+        path = tmp_path / f"engine_{cut}.json"
+        eng.save(path)
+        second = IncrementalFeatureEngine.load(path).update_many(m15.iloc[cut:])
+        _assert_close(pd.concat([first, second], ignore_index=True), ref)
+
+
+def test_rejects_out_of_order_candle(m15):
+    eng = IncrementalFeatureEngine()
+    eng.update(m15.iloc[1].to_dict())
+    with pytest.raises(ValueError):
+        eng.update(m15.iloc[0].to_dict())
+
+
+def test_loads_state_saved_before_rolling_sums(m15):
+    # anciens états : fenêtres des std en simples buffers ret_20 / ret_100
+    cut = 500
+    eng = IncrementalFeatureEngine()
+    first = eng.update_many(m15.iloc[:cut])
+    state = eng.to_state()
+    rolling = state.pop("rolling")
+    state["buffers"]["ret_20"] = rolling["std_20"]["values"]
+    state["buffers"]["ret_100"] = rolling["std_100"]["values"]
+    second = IncrementalFeatureEngine.from_state(state).update_many(m15.iloc[cut:])
+    _assert_close(pd.concat([first, second], ignore_index=True), _reference(m15))
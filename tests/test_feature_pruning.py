@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from src.strategies import feature_pruning
+from src.strategies.feature_pruning import _single_thread, prune_features
+
+
+@pytest.fixture(scope="module")
+def frames():
+    # 2 features informatives, 4 de bruit ; prix cohérent avec la cible
+    rng = np.random.default_rng(0)
+    n = 4000
+    X = rng.normal(size=(n, 6))
+    y = (X[:, 0] - X[:, 1] + rng.normal(size=n) > 0).astype(int)
+    price = np.exp(np.cumsum(np.r_[0.0, np.where(y[:-1] == 1, 1e-4, -1e-4)]))
+    df = pd.DataFrame(X, columns=[f"f{i}" for i in range(6)]).assign(target=y, close_15m=price)
+    return df.iloc[:3000].reset_index(drop=True), df.iloc[3000:].reset_index(drop=True)
+
+
+def test_decisions_never_see_validation(frames, monkeypatch):
+    train, val = frames
+    feats = [f"f{i}" for i in range(6)]
+    seen = []
+    real = feature_pruning._fit_eval
+
+    def spy(model, X_tr, y_tr, X_val, y_val, price, **kw):
+        seen.append((len(X_tr), len(X_val)))
+        return real(model, X_tr, y_tr, X_val, y_val, price, **kw)
+
+    monkeypatch.setattr(feature_pruning, "_fit_eval", spy)
+    model, meta, report = prune_features(LogisticRegression(), train, val, feats, n_repeats=2, n_jobs=1)
+
+    n_sel = report["selection_rows"]
+    assert n_sel == 750
+    # essais : fit sur le début de train (embargo 1), évalués sur la fin de train
+    assert all(s == (3000 - n_sel - 1, n_sel) for s in seen[:-2])
+    # seuls les deux derniers fits (complet / élagué) touchent la validation
+    assert seen[-2:] == [(3000, len(val)), (3000, len(val))]
+
+    assert {"f0", "f1"} <= set(meta["features"])
+    assert set(report["dropped"]) <= {"f2", "f3", "f4", "f5"}
+    assert meta["val_f1"] == report["final"]["f1"]
+    assert model.n_features_in_ == len(meta["features"])
+
+
+def test_selection_slice_must_fit(frames):
+    train, val = frames
+    with pytest.raises(ValueError):
+        prune_features(LogisticRegression(), train.iloc[:300], val, ["f0", "f1"], n_jobs=1)
+
+
+def test_ranking_model_predicts_single_threaded():
+    rf = _single_thread(RandomForestClassifier(n_jobs=-1))
+    assert rf.n_jobs == 1
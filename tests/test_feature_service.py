@@ -0,0 +1,110 @@
+import pandas as pd
+import pytest
+
+from api.services.feature_service import FeatureService
+from src.feature_store import write_features
+from src.features import FEATURE_COLS, add_features
+
+M15_COLS = ["timestamp", "open_15m", "high_15m", "low_15m", "close_15m", "volume_15m"]
+
+
+@pytest.fixture(scope="module")
+def features(m15):
+    return add_features(m15, backend="numpy")
+
+
+@pytest.mark.parametrize("use_store", [False, True])
+def test_latest_row_ignores_missing_columns(features, tmp_path, use_store):
+    processed = tmp_path / "data" / "processed"
+    processed.mkdir(parents=True)
+    if use_store:
+        write_features(features, processed / "features")
+    else:
+        features.to_parquet(processed / "m15_2024_features.parquet")
+
+    fs = FeatureService(tmp_path)
+    assert fs.use_store is use_store
+    row = fs.get_latest_row(columns=["rsi_14", "not_a_feature", "close_15m"])
+    assert row["timestamp"] == features["timestamp"].iloc[-1]
+    assert fs.row_to_feature_dict(row, ["rsi_14", "not_a_feature"]) == {
+        "rsi_14": features["rsi_14"].iloc[-1],
+        "not_a_feature": 0.0,
+    }
+
+
+def test_pushed_candles_resume_after_restart(m15, features, tmp_path):
+    candles = m15[M15_COLS]
+    cut = len(candles) // 2
+
+    first = FeatureService(tmp_path).push_candles(candles.iloc[:cut].to_dict("records"))
+    assert first["accepted"] == cut and first["skipped"] == 0
+
+    # nouvelle instance (redémarrage de l'API) ; renvoi de bougies déjà vues
+    fs = FeatureService(tmp_path)
+    second = fs.push_candles(candles.iloc[cut - 10:].to_dict("records"))
+    assert second["skipped"] == 10
+    assert second["accepted"] == len(candles) - cut
+
+    row = FeatureService(tmp_path).get_latest_row()
+    ref = features.iloc[-1]
+    assert row["timestamp"] == ref["timestamp"]
+    for f in FEATURE_COLS:
+        assert row[f] == pytest.approx(ref[f], rel=1e-9, abs=1e-12), f
+
+
+def test_warming_up_engine_has_no_row(m15, tmp_path):
+    fs = FeatureService(tmp_path)
+    res = fs.push_candles(m15[M15_COLS].iloc[:50].to_dict("records"))
+    assert res["latest_features"] is None
+    with pytest.raises(ValueError):
+        fs.get_latest_row()
+
+
+def test_latest_decision_uses_pushed_candles(m15, features, tmp_path):
+    from sklearn.linear_model import LogisticRegression
+
+    from api.services.inference_service import InferenceService
+    from src.strategies.ml_train import save_model
+
+    feats = ["rsi_14", "ema_diff", "volatility_ratio"]
+    y = (features["return_1"].shift(-1) > 0).astype(int)
+    model = LogisticRegression().fit(features[feats].to_numpy(), y)
+    save_model(model, {"features": feats}, tmp_path / "models" / "v1")
+    (tmp_path / "models" / "active_model.json").write_text('{"type": "ml"}', encoding="utf-8")
+
+    svc = InferenceService(tmp_path)
+    svc.push_candles(m15[M15_COLS].to_dict("records"))
+    out = svc.predict_latest()
+    assert out["timestamp"] == str(features["timestamp"].iloc[-1])
+    assert out["price"] == features["close_15m"].iloc[-1]
+    assert out["score"] == pytest.approx(model.predict_proba(features[feats].to_numpy()[-1:])[0, 1], rel=1e-9)
+
+
+def test_candles_endpoint(m15, tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api.routers.candles import router
+
+    app = FastAPI()
+    app.include_router(router)
+    app.state.infer = _PushOnly(tmp_path)
+    client = TestClient(app)
+
+    body = m15[M15_COLS].iloc[:300].assign(timestamp=lambda d: d["timestamp"].astype(str))
+    res = client.post("/candles", json={"candles": body.to_dict("records")})
+    assert res.status_code == 200
+    assert res.json()["accepted"] == 300
+    assert res.json()["latest_features"] == pd.Timestamp(body["timestamp"].iloc[-1]).isoformat()
+
+    bad = {**body.iloc[-1].to_dict(), "close_15m": "not a price"}
+    assert client.post("/candles", json={"candles": [bad]}).status_code == 422
+
+
+class _PushOnly:
+    # InferenceService sans modèle : seul push_candles sert à /candles
+    def __init__(self, root):
+        self.root = root
+
+    def push_candles(self, candles):
+        return FeatureService(self.root).push_candles(candles)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import FEATURE_COLS, add_features
+
+
+@pytest.fixture(scope="module")
+def ref(m15) -> pd.DataFrame:
+    return add_features(m15, backend="ta")
+
+
+@pytest.fixture(scope="module")
+def out(m15) -> pd.DataFrame:
+    return add_features(m15, backend="numpy")
+
+
+def test_numpy_backend_same_rows(ref, out):
+    assert list(out.columns) == list(ref.columns)
+    pd.testing.assert_series_equal(out["timestamp"], ref["timestamp"])
+
+
+@pytest.mark.parametrize("col", FEATURE_COLS)
+def test_numpy_backend_matches_ta(ref, out, col):
+    np.testing.assert_allclose(out[col].to_numpy(), ref[col].to_numpy(), rtol=1e-9, atol=1e-12, err_msg=col)
+
+
+def test_numpy_backend_float32(m15, out):
+    out32 = add_features(m15, backend="numpy", dtype=np.float32)
+    for col in FEATURE_COLS:
+        assert out32[col].dtype == np.float32, col
+        np.testing.assert_allclose(out32[col].to_numpy(), out[col].to_numpy(), rtol=1e-6, atol=1e-6, err_msg=col)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import FEATURE_COLS, add_features
+from src.features_parallel import add_features_chunked
+from src.synthetic import synthetic_m15
+
+# colonnes calculées par pandas rolling().std() dans le backend ta
+TA_ROLLING = {"rolling_std_20", "rolling_std_100", "volatility_ratio"}
+
+
+@pytest.fixture(scope="module")
+def long_m15() -> pd.DataFrame:
+    # plusieurs chunks, chacun plus long que le halo
+    return synthetic_m15(1).iloc[:21_000].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("chunk_rows", [7_000, 9_500])
+def test_numpy_chunked_is_bit_identical(long_m15, chunk_rows):
+    ref = add_features(long_m15, backend="numpy")
+    out = add_features_chunked(long_m15, chunk_rows=chunk_rows, n_jobs=1, backend="numpy")
+    pd.testing.assert_frame_equal(out, ref, check_exact=True)
+
+
+def test_selected_features_chunked_is_bit_identical(long_m15):
+    feats = ["rsi_14", "volatility_ratio", "adx_14", "distance_to_ema200"]
+    ref = add_features(long_m15, features=feats)
+    out = add_features_chunked(long_m15, chunk_rows=7_000, n_jobs=1, features=feats)
+    pd.testing.assert_frame_equal(out, ref, check_exact=True)
+
+
+def test_ta_chunked_matches_sequential(long_m15):
+    ref = add_features(long_m15, backend="ta")
+    out = add_features_chunked(long_m15, chunk_rows=7_000, n_jobs=1, backend="ta")
+    pd.testing.assert_series_equal(out["timestamp"], ref["timestamp"])
+    for col in FEATURE_COLS:
+        if col in TA_ROLLING:
+            np.testing.assert_allclose(out[col], ref[col], rtol=1e-10, atol=0, err_msg=col)
+        else:
+            np.testing.assert_array_equal(out[col], ref[col], err_msg=col)
+
+
+def test_halo_must_cover_ema200_warmup(long_m15):
+    with pytest.raises(ValueError):
+        add_features_chunked(long_m15, halo=100)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.m15_agg import IncrementalM15Aggregator, aggregate_m15
+from src.synthetic import synthetic_m1
+
+LATENESS = pd.Timedelta("1h")
+
+
+@pytest.fixture(scope="module")
+def m1() -> pd.DataFrame:
+    # ~1 mois de M1 (doublons et NaN de la génération synthétique compris)
+    return synthetic_m1(1).iloc[:40_000].reset_index(drop=True)
+
+
+def _batches(m1: pd.DataFrame, seed: int, size: int = 700) -> list[pd.DataFrame]:
+    """Lots mélangés ; ~5 % des barres arrivent dans un lot suivant, en retard < allowed_lateness."""
+    rng = np.random.default_rng(seed)
+    batches = [m1.iloc[s:s + size] for s in range(0, len(m1), size)]
+    out = [b.sample(frac=1.0, random_state=int(rng.integers(1 << 31))) for b in batches]
+    for i in range(len(out) - 1):
+        late = out[i].sample(frac=0.05, random_state=i)
+        out[i] = out[i].drop(late.index)
+        # livrées au lot suivant : seules celles encore dans la fenêtre (les
+        # autres sont perdues, et absentes de la référence concat(lots))
+        late = late[late["timestamp"] >= out[i]["timestamp"].max() - LATENESS + pd.Timedelta("15min")]
+        out[i + 1] = pd.concat([late, out[i + 1]])
+    return out
+
+
+def _final(parts: list[pd.DataFrame]) -> pd.DataFrame:
+    # révisions : la dernière émission d'une bougie fait foi
+    df = pd.concat(parts, ignore_index=True)
+    return df.drop_duplicates(subset=["timestamp"], keep="last").sort_values("timestamp").reset_index(drop=True)
+
+
+def test_in_order_stream_matches_batch(m1):
+    agg = IncrementalM15Aggregator()
+    parts = [agg.update(m1.iloc[s:s + 1000]) for s in range(0, len(m1), 1000)]
+    parts.append(agg.flush())
+    pd.testing.assert_frame_equal(_final(parts), aggregate_m15(m1), check_exact=True)
+    assert agg.n_late_dropped == 0
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_shuffled_and_late_updates_match_batch(m1, seed):
+    batches = _batches(m1, seed)
+    fed = pd.concat(batches)
+    assert (fed["timestamp"].diff() < pd.Timedelta(0)).sum() > len(batches)  # vraiment désordonné
+    agg = IncrementalM15Aggregator(allowed_lateness=LATENESS)
+    parts = [agg.update(b) for b in batches]
+    parts.append(agg.flush())
+    assert agg.n_late_dropped == 0
+    # doublons : la dernière barre reçue l'emporte, comme drop_duplicates(keep="last")
+    pd.testing.assert_frame_equal(_final(parts), aggregate_m15(fed), check_exact=True)
+
+
+def test_checkpoint_roundtrip_mid_stream(m1, tmp_path):
+    batches = _batches(m1, seed=2)
+    cut = len(batches) // 2
+    agg = IncrementalM15Aggregator(allowed_lateness=LATENESS)
+    parts = [agg.update(b) for b in batches[:cut]]
+    path = tmp_path / "m15.agg_state.parquet"
+    agg.save(path)
+
+    resumed = IncrementalM15Aggregator.load(path)
+    assert resumed.allowed_lateness == LATENESS
+    assert resumed.open_bucket == agg.open_bucket
+    pd.testing.assert_frame_equal(resumed.bars, agg.bars)
+    parts += [resumed.update(b) for b in batches[cut:]]
+    parts.append(resumed.flush())
+    pd.testing.assert_frame_equal(_final(parts), aggregate_m15(pd.concat(batches)), check_exact=True)
+
+
+def test_bars_beyond_lateness_are_dropped(m1):
+    agg = IncrementalM15Aggregator(allowed_lateness="30min")
+    agg.update(m1.iloc[:5000])
+    too_late = m1.iloc[:100]  # plusieurs jours avant le bucket ouvert
+    assert len(agg.update(too_late)) == 0
+    assert agg.n_late_dropped == 100
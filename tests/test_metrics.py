@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.backtest import backtest_m15
+from src.strategies.metrics import StreamingMetrics, summary_metrics
+
+
+@pytest.fixture(scope="module", params=["random", "long", "sparse"])
+def bt(request, m15) -> pd.DataFrame:
+    d = m15[["timestamp", "close_15m"]].iloc[:3000]
+    rng = np.random.default_rng(0)
+    pos = {
+        "random": rng.integers(-1, 2, len(d)),
+        "long": np.ones(len(d)),
+        "sparse": np.where(rng.random(len(d)) < 0.01, 1, 0),
+    }[request.param]
+    return backtest_m15(d.assign(position=pos))
+
+
+def _assert_summary(got: dict, ref: dict) -> None:
+    assert got.keys() == ref.keys()
+    assert got["n_trades"] == ref["n_trades"]
+    for k in ("final_equity", "max_drawdown", "sharpe", "profit_factor"):
+        assert math.isclose(got[k], ref[k], rel_tol=1e-12, abs_tol=1e-13), (k, got[k], ref[k])
+
+
+def test_update_matches_summary_metrics(bt):
+    m = StreamingMetrics()
+    for r, t in zip(bt["strat_ret_net"], bt["trade"]):
+        m.update(r, t)
+    _assert_summary(m.summary(), summary_metrics(bt))
+    _assert_summary(StreamingMetrics.from_backtest(bt).summary(), summary_metrics(bt))
+
+
+@pytest.mark.parametrize("cuts", [[1], [1000], [7, 1500, 2999], [500, 1000, 1500, 2000, 2500]])
+def test_merge_segments_matches_summary_metrics(bt, cuts):
+    edges = [0, *cuts, len(bt)]
+    parts = [StreamingMetrics.from_backtest(bt.iloc[a:b]) for a, b in zip(edges[:-1], edges[1:])]
+    merged = parts[0]
+    for p in parts[1:]:
+        merged = merged.merge(p)
+    _assert_summary(merged.summary(), summary_metrics(bt))
+
+    # update_many en place, et état sérialisable en cours de route
+    m = StreamingMetrics()
+    for a, b in zip(edges[:-1], edges[1:]):
+        m.update_many(bt["strat_ret_net"].iloc[a:b], bt["trade"].iloc[a:b])
+        m = StreamingMetrics.from_state(m.to_state())
+    _assert_summary(m.summary(), summary_metrics(bt))
+
+
+def test_save_load(bt, tmp_path):
+    m = StreamingMetrics.from_backtest(bt.iloc[:1200])
+    m.save(tmp_path / "metrics.json")
+    loaded = StreamingMetrics.load(tmp_path / "metrics.json")
+    loaded.update_many(bt["strat_ret_net"].iloc[1200:], bt["trade"].iloc[1200:])
+    _assert_summary(loaded.summary(), summary_metrics(bt))
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.strategies.ml_infer import load_model
+from src.strategies.ml_stream import XGB_AVAILABLE, ParquetBatches, fit_incremental
+from src.strategies.ml_train import save_model
+
+
+def _noise_parquet(path, n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, 6)), columns=[f"f{i}" for i in range(6)])
+    df["target"] = (rng.random(n) < 0.49).astype(np.int8)
+    df.to_parquet(path)
+    return df
+
+
+@pytest.fixture(scope="module")
+def noise(tmp_path_factory):
+    d = tmp_path_factory.mktemp("stream")
+    tr = [_noise_parquet(d / f"train_{k}.parquet", 20_000, k) for k in range(2)]
+    _noise_parquet(d / "val.parquet", 20_000, 9)
+    train = ParquetBatches([d / "train_0.parquet", d / "train_1.parquet"], batch_rows=8_192)
+    val = ParquetBatches([d / "val.parquet"], features=train.features, batch_rows=8_192)
+    return train, val, pd.concat(tr, ignore_index=True)
+
+
+def test_sgd_converges_on_noise(noise):
+    train, val, df = noise
+    model, meta = fit_incremental(train, val, model="sgd", epochs=3)
+    X = df[train.features].to_numpy()
+    ref = LogisticRegression().fit(model[0].transform(X), df["target"])
+    coef = model[-1].coef_
+    assert np.abs(coef).max() < 5 * np.abs(ref.coef_).max() + 0.02
+    # probas calibrées : pas de biais vers une classe, log-loss ~ entropie du taux de base
+    assert abs(meta["val_mean_proba"] - meta["val_pos_rate"]) < 0.02
+    p = meta["val_pos_rate"]
+    assert meta["val_log_loss"] < -(p * np.log(p) + (1 - p) * np.log(1 - p)) + 0.005
+
+
+@pytest.mark.parametrize("name", ["sgd", pytest.param("xgb", marks=pytest.mark.skipif(
+    not XGB_AVAILABLE, reason="xgboost not installed"))])
+def test_save_and_reload(noise, tmp_path, name):
+    train, val, df = noise
+    model, meta = fit_incremental(train, val, model=name, epochs=3, cache_dir=tmp_path / "cache")
+    save_model(model, meta, tmp_path / "model")
+    loaded, meta2 = load_model(tmp_path / "model")
+    assert meta2["features"] == train.features
+    X = df[train.features].to_numpy(dtype=np.float32)[:1000]
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
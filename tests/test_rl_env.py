@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from src.features import add_features
+from src.strategies.rl_env import TradingEnv
+from src.strategies.rl_vec_env import BatchTradingEnv
+
+COLS = ["return_1", "rsi_14", "ema_diff", "atr_14"]
+
+
+@pytest.fixture(scope="module")
+def features(m15):
+    return add_features(m15, backend="numpy")
+
+
+def test_observations_are_read_only(features):
+    env = TradingEnv(features, COLS)
+    obs, _ = env.reset()
+    with pytest.raises(ValueError):
+        obs[0] = 1.0
+    obs, *_ = env.step(2)
+    assert not obs.flags.writeable
+    assert not env.X.flags.writeable
+
+
+def test_batch_env_observations_do_not_alias_data(features):
+    env = BatchTradingEnv(features, COLS, n_envs=4, episode_len=50, seed=0)
+    before = env.X.copy()
+    obs = env.reset()
+    for _ in range(120):
+        obs[:] = np.nan  # les observations renvoyées sont des copies
+        obs, _, _, _ = env.step(np.full(4, 2))
+    np.testing.assert_array_equal(env.X, before)
+
+
+def test_batch_env_vec_interface_indices(features):
+    env = BatchTradingEnv(features, COLS, n_envs=4, episode_len=50, seed=0)
+    env.reset()
+    calls = []
+    env.ping = lambda: calls.append(1) or "ok"
+    # méthode commune : un seul appel pour tous les envs
+    assert env.env_method("ping") == ["ok"] * 4
+    assert env.env_method("ping", indices=[3, 2, 1, 0]) == ["ok"] * 4
+    assert len(calls) == 2
+    with pytest.raises(NotImplementedError):
+        env.env_method("reset", indices=[1])
+
+    # état par env : indices respectés
+    env.set_attr("pos", 1, indices=[2])
+    assert env.get_attr("pos") == [0, 0, 1, 0]
+    assert env.get_attr("pos", indices=2) == [1]
+
+    # attribut commun : refusé pour un sous-ensemble
+    env.set_attr("tc", 0.001)
+    assert env.get_attr("tc", indices=[0, 1]) == [0.001, 0.001]
+    with pytest.raises(NotImplementedError):
+        env.set_attr("tc", 0.0, indices=[0])
+    assert env.tc == 0.001
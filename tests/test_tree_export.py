@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import BaggingClassifier, ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from src.strategies.ml_infer import load_flat_forest, load_model
+from src.strategies.ml_train import save_model
+from src.strategies.tree_export import FOREST_FILE, FlatForest, export_forest
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 8))
+    y = (X[:, 0] + 0.5 * X[:, 1] * X[:, 2] + rng.normal(size=3000) > 0).astype(int)
+    X_nan = X.copy()
+    X_nan[rng.random(X.shape) < 0.1] = np.nan
+    return X, y, X_nan
+
+
+FORESTS = [
+    RandomForestClassifier(n_estimators=25, min_samples_leaf=5, random_state=0),
+    ExtraTreesClassifier(n_estimators=25, min_samples_leaf=5, random_state=0),
+]
+
+
+def _assert_matches(model, X):
+    flat = FlatForest.from_sklearn(model)
+    ref = model.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(flat.predict_proba(X), ref, rtol=0, atol=1e-12)
+    one = np.array([flat.predict_one(x) for x in X[:200]])
+    np.testing.assert_allclose(one, ref[:200], rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("model", FORESTS, ids=lambda m: type(m).__name__)
+def test_flat_forest_matches_sklearn(data, model):
+    X, y, _ = data
+    _assert_matches(model.fit(X, y), X)
+
+
+@pytest.mark.parametrize("model", FORESTS, ids=lambda m: type(m).__name__)
+def test_flat_forest_matches_sklearn_with_nan(data, model):
+    # NaN vus à l'entraînement : côté appris (missing_go_to_left)
+    _, y, X_nan = data
+    _assert_matches(model.fit(X_nan, y), X_nan)
+
+
+def test_only_forest_classifiers_are_flattened(data, tmp_path):
+    X, y, _ = data
+    bagging = BaggingClassifier(DecisionTreeClassifier(), n_estimators=5, max_features=0.5, random_state=0).fit(X, y)
+    with pytest.raises(TypeError):
+        FlatForest.from_sklearn(bagging)
+    assert export_forest(bagging, tmp_path) is None
+    assert not (tmp_path / FOREST_FILE).exists()
+
+
+def test_save_model_roundtrip_and_stale_forest(data, tmp_path):
+    X, y, _ = data
+    rf = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    save_model(rf, {"features": [f"f{i}" for i in range(8)]}, tmp_path)
+    flat = load_flat_forest(tmp_path)
+    assert load_model(tmp_path)[1]["flat_forest"] == FOREST_FILE
+    np.testing.assert_allclose(flat.predict_proba(X), rf.predict_proba(X)[:, 1], rtol=0, atol=1e-12)
+
+    # le modèle suivant n'est pas une forêt : forest.npz ne doit pas survivre
+    save_model(LogisticRegression().fit(X, y), {"features": [f"f{i}" for i in range(8)]}, tmp_path)
+    assert not (tmp_path / FOREST_FILE).exists()
+    assert load_flat_forest(tmp_path) is None
+    assert "flat_forest" not in load_model(tmp_path)[1]
+
+
+def test_inference_service_serves_flat_forest(data, tmp_path):
+    from api.services.inference_service import InferenceService
+
+    X, y, _ = data
+    feats = [f"f{i}" for i in range(8)]
+    rf = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    save_model(rf, {"features": feats}, tmp_path / "models" / "v1")
+    (tmp_path / "models" / "active_model.json").write_text('{"type": "ml"}', encoding="utf-8")
+
+    svc = InferenceService(tmp_path)
+    assert svc.forest is not None and svc.model is None
+    ref = rf.predict_proba(X[:50])[:, 1]
+    for x, p in zip(X[:50], ref):
+        _, proba = svc.predict(dict(zip(feats, x)))
+        assert abs(proba - p) <= 1e-12